@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import Conversation, ConversationMessage
 
-# Register your models here.
+
+class ConversationMessageInline(admin.TabularInline):
+    model = ConversationMessage
+    extra = 0
+    readonly_fields = ('role', 'content', 'token_count', 'created_at')
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'created_at', 'updated_at')
+    search_fields = ('user__email',)
+    inlines = [ConversationMessageInline]
@@ -1,108 +1,192 @@
 # services/ai_assistant_service.py
+import json
+import logging
+import uuid
 import openai
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import connection
 from django.utils import timezone
 from datetime import datetime, timedelta
-from booking.models import WorkSpace, Booking, Location, Feature
-import uuid
+from booking.models import WorkSpace
+from booking.availability import AvailabilityIndex
+from booking.slots import SlotFinder
+from .models import estimate_tokens
+from .response_cache import assistant_response_cache
+from .search import HybridSearch
+
+logger = logging.getLogger(__name__)
+
+CHAT_SYSTEM_PROMPT = """
+You are an AI booking assistant for a workspace booking system called Volt. 
+Your role is to help users find and book workspaces like desks, meeting rooms, 
+conference rooms, phone booths, event halls, and collaboration spaces.
+
+You can help users with:
+1. Finding available workspaces based on their requirements
+2. Checking availability of specific workspaces
+3. Explaining the booking process
+4. Answering questions about workspace features and locations
+5. Providing information about pricing
+
+Always use the tools to answer questions about which workspaces exist or are free,
+never guess. When several lookups are needed, request them all at once.
+
+Be concise, helpful, and friendly in your responses. If you don't know something, 
+say so clearly and offer to connect them with human support.
+"""
+CHAT_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "find_available_workspaces",
+            "description": "Search open workspaces by type, location, minimum capacity, features and free time window",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": [key for key, _ in WorkSpace.WORKSPACE_TYPES]},
+                    "location": {"type": "string", "description": "Part of the location name"},
+                    "capacity": {"type": "integer", "description": "Minimum number of people"},
+                    "features": {"type": "array", "items": {"type": "string"}, "description": "e.g. Projector"},
+                    "date": {"type": "string", "description": "YYYY-MM-DD, with start_time and end_time"},
+                    "start_time": {"type": "string", "description": "HH:MM, only workspaces free from then"},
+                    "end_time": {"type": "string", "description": "HH:MM, until then"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_availability",
+            "description": "Check whether a workspace is free for a time range on a date",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "workspace_id": {"type": "integer"},
+                    "date": {"type": "string", "description": "YYYY-MM-DD"},
+                    "start_time": {"type": "string", "description": "HH:MM"},
+                    "end_time": {"type": "string", "description": "HH:MM"},
+                },
+                "required": ["workspace_id", "date", "start_time", "end_time"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "suggest_available_times",
+            "description": "List the free time slots of a workspace on a date",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "workspace_id": {"type": "integer"},
+                    "date": {"type": "string", "description": "YYYY-MM-DD"},
+                    "duration_hours": {"type": "number", "description": "Length of the booking, default 1"},
+                },
+                "required": ["workspace_id", "date"],
+            },
+        },
+    },
+]
+CHAT_FALLBACK_RESPONSE = "I'm here to help with workspace bookings. You can ask me about availability, pricing, or book a space directly."
+CHAT_ERROR_RESPONSE = "I'm sorry, I'm having trouble processing your request. Please try again or contact support."
 
 class AIBookingAssistant:
     @staticmethod
-    def find_similar_workspaces(query, limit=5):
-        """Find workspaces similar to the user's query using vector search"""
+    def find_similar_workspaces(query, limit=5, filters=None):
+        """
+        Find workspaces matching the user's query, ranking them by both
+        full-text and vector similarity (see HybridSearch).
+        
+        ``filters`` may restrict the candidates by type, capacity, location,
+        features and a date/start_time/end_time window they must be free in.
+        When no query embedding can be generated the search is full-text only.
+        """
         from .embedding_service import EmbeddingService
         
-        # Generate embedding for the query
-        query_embedding = EmbeddingService.generate_embedding(query)
-        if not query_embedding:
-            return []
-            
-        # Execute vector similarity search using pgvector
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, name, description, type, capacity, hourly_rate,
-                       embedding <=> %s AS distance
-                FROM WorkSpace
-                WHERE is_available = TRUE
-                ORDER BY distance ASC
-                LIMIT %s
-            """, [query_embedding, limit])
-            results = cursor.fetchall()
+        if filters is None:
+            filters = {}
         
-        workspaces = []
-        for row in results:
-            workspaces.append({
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'type': row[3],
-                'capacity': row[4],
-                'hourly_rate': row[5],
-                'relevance_score': 1 - row[6],  # Convert distance to similarity score
-            })
-            
+        workspaces = AIBookingAssistant.filter_workspaces(filters)
+        
+        # Generate embedding for the query (cached across searches)
+        query_embedding = EmbeddingService.generate_query_embedding(query)
+        
+        search = HybridSearch()
+        results = search.search(query, workspaces, query_embedding=query_embedding, limit=limit)
+        
+        return [
+            {
+                'id': workspace.id,
+                'name': workspace.name,
+                'description': workspace.description,
+                'type': workspace.type,
+                'capacity': workspace.capacity,
+                'location': workspace.location_name or "Unknown",
+                'hourly_rate': workspace.hourly_rate,
+                # Fused score scaled so a workspace ranked first by both rankings scores 1
+                'relevance_score': round(float(workspace.score) / search.max_score(), 4),
+            }
+            for workspace in results
+        ]
+    
+    @staticmethod
+    def filter_workspaces(criteria):
+        """
+        Open workspaces matching the criteria: type, minimum capacity,
+        location name, features (all required) and, when date, start_time
+        and end_time are given, free for that whole window. Every criterion
+        is part of a single query.
+        """
+        capacity = criteria.get('capacity')
+        try:
+            capacity = int(capacity) if capacity else None
+        except (ValueError, TypeError):
+            # If capacity is not a valid integer, ignore this filter
+            capacity = None
+        features = criteria.get('features')
+        if isinstance(features, str):
+            features = [features]
+        
+        workspaces = WorkSpace.objects.filter(is_available=True).matching(
+            criteria.get('type'), capacity, criteria.get('location'), features
+        )
+        
+        if criteria.get('date') and criteria.get('start_time') and criteria.get('end_time'):
+            start_datetime = timezone.make_aware(
+                datetime.strptime(f"{criteria['date']} {criteria['start_time']}", '%Y-%m-%d %H:%M'))
+            end_datetime = timezone.make_aware(
+                datetime.strptime(f"{criteria['date']} {criteria['end_time']}", '%Y-%m-%d %H:%M'))
+            workspaces = workspaces.free_between(start_datetime, end_datetime)
         return workspaces
     
     @staticmethod
     def find_available_workspaces(criteria=None, limit=5):
-        """Find available workspaces based on criteria"""
+        """Find available workspaces based on criteria (see filter_workspaces)"""
         if criteria is None:
             criteria = {}
-            
-        # Start with all available workspaces
-        workspaces_query = WorkSpace.objects.filter(is_available=True)
         
-        # Apply filters based on criteria
-        if 'type' in criteria and criteria['type']:
-            workspaces_query = workspaces_query.filter(type__icontains=criteria['type'])
-            
-        if 'location' in criteria and criteria['location']:
-            # Find locations that match the criteria
-            locations = Location.objects.filter(name__icontains=criteria['location'])
-            if locations.exists():
-                workspaces_query = workspaces_query.filter(location__in=locations)
-                
-        if 'capacity' in criteria and criteria['capacity']:
-            try:
-                min_capacity = int(criteria['capacity'])
-                workspaces_query = workspaces_query.filter(capacity__gte=min_capacity)
-            except (ValueError, TypeError):
-                # If capacity is not a valid integer, ignore this filter
-                pass
-                
-        if 'features' in criteria and criteria['features']:
-            # Find features that match the criteria
-            features = Feature.objects.filter(name__in=criteria['features'])
-            if features.exists():
-                for feature in features:
-                    workspaces_query = workspaces_query.filter(features=feature)
+        try:
+            workspaces = AIBookingAssistant.filter_workspaces(criteria)
+        except ValueError as e:
+            return {'error': str(e)}
         
-        # Get the workspaces
-        workspaces = workspaces_query[:limit]
+        workspaces = workspaces.select_related('location').prefetch_related('features').order_by('id')[:limit]
         
-        # Format the response
-        result = []
-        for workspace in workspaces:
-            # Get the location name
-            location_name = workspace.location.name if workspace.location else "Unknown"
-            
-            # Get the features
-            features = [feature.name for feature in workspace.features.all()]
-            
-            result.append({
+        return [
+            {
                 'id': workspace.id,
                 'name': workspace.name,
                 'type': workspace.type,
                 'description': workspace.description,
-                'location': location_name,
+                'location': workspace.location.name if workspace.location else "Unknown",
                 'capacity': workspace.capacity,
                 'hourly_rate': float(workspace.hourly_rate) if workspace.hourly_rate else None,
-                'features': features,
+                'features': [feature.name for feature in workspace.features.all()],
                 'is_available': workspace.is_available,
-            })
-            
-        return result
+            }
+            for workspace in workspaces
+        ]
     
     @staticmethod
     def check_availability(workspace_id, date, start_time, end_time):
@@ -124,13 +208,13 @@ class AIBookingAssistant:
             else:
                 end_datetime = end_time
             
+            if timezone.is_naive(start_datetime):
+                start_datetime = timezone.make_aware(start_datetime)
+            if timezone.is_naive(end_datetime):
+                end_datetime = timezone.make_aware(end_datetime)
+            
             # Check for conflicting bookings
-            conflicting_bookings = Booking.objects.filter(
-                work_space=workspace,
-                status='confirmed',
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime
-            ).count()
+            index = AvailabilityIndex.for_workspace(workspace, start_datetime, end_datetime)
             
             return {
                 'workspace': {
@@ -141,7 +225,9 @@ class AIBookingAssistant:
                 'date': date.strftime('%Y-%m-%d'),
                 'start_time': start_datetime.strftime('%H:%M'),
                 'end_time': end_datetime.strftime('%H:%M'),
-                'is_available': conflicting_bookings == 0
+                'is_available': index.is_free(),
+                'available_desks': index.free_desks(),
+                'available_meeting_rooms': index.free_meeting_rooms(),
             }
         except WorkSpace.DoesNotExist:
             return {'error': 'Workspace not found'}
@@ -149,54 +235,28 @@ class AIBookingAssistant:
             return {'error': str(e)}
     
     @staticmethod
-    def suggest_available_times(workspace_id, date, duration_hours=1):
+    def suggest_available_times(workspace_id, date, duration_hours=1, granularity_minutes=30):
         """Suggest available time slots for a workspace on a given date"""
         try:
-            workspace = WorkSpace.objects.get(id=workspace_id)
+            workspace = WorkSpace.objects.select_related('location').get(id=workspace_id)
             
             # Convert string date to date object if necessary
             if isinstance(date, str):
                 date = datetime.strptime(date, '%Y-%m-%d').date()
             
-            # Get all bookings for this workspace on the specified date
-            bookings = Booking.objects.filter(
-                work_space=workspace,
-                status='confirmed',
-                start_time__date=date
-            ).order_by('start_time')
-            
-            # Define business hours (e.g., 8 AM to 6 PM)
-            business_start = datetime.combine(date, datetime.min.time()).replace(hour=8)
-            business_end = datetime.combine(date, datetime.min.time()).replace(hour=18)
-            
-            # Calculate duration in minutes
-            duration_minutes = int(duration_hours * 60)
-            
-            # Find available slots
-            available_slots = []
-            current_time = business_start
-            
-            # Add existing bookings to a list of busy times
-            busy_times = [(b.start_time, b.end_time) for b in bookings]
+            finder = SlotFinder(
+                duration=timedelta(hours=duration_hours),
+                granularity=timedelta(minutes=granularity_minutes)
+            )
+            slots = finder.find([workspace], date)[workspace]
             
-            while current_time + timedelta(minutes=duration_minutes) <= business_end:
-                slot_end = current_time + timedelta(minutes=duration_minutes)
-                is_available = True
-                
-                # Check if this time slot overlaps with any booking
-                for start, end in busy_times:
-                    if max(current_time, start) < min(slot_end, end):
-                        is_available = False
-                        break
-                
-                if is_available:
-                    available_slots.append({
-                        'start_time': current_time.strftime('%H:%M'),
-                        'end_time': slot_end.strftime('%H:%M')
-                    })
-                
-                # Move to next time slot (30-minute increments)
-                current_time += timedelta(minutes=30)
+            available_slots = [
+                {
+                    'start_time': timezone.localtime(start).strftime('%H:%M'),
+                    'end_time': timezone.localtime(end).strftime('%H:%M')
+                }
+                for start, end in slots
+            ]
             
             return {
                 'workspace': {
@@ -211,6 +271,58 @@ class AIBookingAssistant:
         except Exception as e:
             return {'error': str(e)}
     
+    @staticmethod
+    def find_available_slots(criteria=None, limit=5):
+        """
+        Find free slots across all workspaces matching the criteria, e.g.
+        {"date": "2025-05-01", "duration": 2, "type": "meeting", "capacity": 8,
+         "features": ["Projector"]}, ranked best first
+        """
+        if criteria is None:
+            criteria = {}
+        
+        try:
+            date = criteria.get('date') or timezone.localdate().isoformat()
+            if isinstance(date, str):
+                date = datetime.strptime(date, '%Y-%m-%d').date()
+            
+            finder = SlotFinder(
+                duration=timedelta(hours=float(criteria.get('duration') or 1)),
+                granularity=timedelta(minutes=int(criteria.get('granularity') or 30))
+            )
+            ranked = finder.search(
+                date,
+                workspace_type=criteria.get('type'),
+                capacity=int(criteria['capacity']) if criteria.get('capacity') else None,
+                features=criteria.get('features'),
+                location=criteria.get('location'),
+                limit=limit
+            )
+        except (ValueError, TypeError) as e:
+            return {'error': str(e)}
+        
+        return [
+            {
+                'workspace': {
+                    'id': workspace.id,
+                    'name': workspace.name,
+                    'type': workspace.type,
+                    'capacity': workspace.capacity,
+                    'location': workspace.location.name if workspace.location else "Unknown",
+                    'hourly_rate': float(workspace.hourly_rate) if workspace.hourly_rate else None,
+                },
+                'date': date.strftime('%Y-%m-%d'),
+                'available_slots': [
+                    {
+                        'start_time': timezone.localtime(start).strftime('%H:%M'),
+                        'end_time': timezone.localtime(end).strftime('%H:%M')
+                    }
+                    for start, end in slots
+                ]
+            }
+            for workspace, slots in ranked
+        ]
+    
     @staticmethod
     def generate_booking_instructions():
         """Generate step-by-step booking instructions"""
@@ -226,68 +338,208 @@ class AIBookingAssistant:
         return instructions
     
     @staticmethod
-    def process_chat_message(user_message, conversation_history=None):
-        """Process a user message and generate an AI response"""
-        if conversation_history is None:
-            conversation_history = []
+    def trim_history(conversation_history, token_budget=None):
+        """The most recent messages of the history that fit in the token budget"""
+        if token_budget is None:
+            token_budget = settings.CHAT_HISTORY_TOKEN_BUDGET
         
-        try:
-            # For debugging
-            print(f"Processing message: {user_message}")
-            print(f"Conversation history length: {len(conversation_history)}")
-            
-            # If OpenAI API key is not available, use a fallback response
-            if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
-                print("OpenAI API key not found, using fallback response")
-                return "I'm here to help with workspace bookings. You can ask me about availability, pricing, or book a space directly."
-            
-            # Create prompt with context about the booking system
-            system_prompt = """
-            You are an AI booking assistant for a workspace booking system called Volt. 
-            Your role is to help users find and book workspaces like desks, meeting rooms, 
-            conference rooms, phone booths, event halls, and collaboration spaces.
-            
-            You can help users with:
-            1. Finding available workspaces based on their requirements
-            2. Checking availability of specific workspaces
-            3. Explaining the booking process
-            4. Answering questions about workspace features and locations
-            5. Providing information about pricing
-            
-            Be concise, helpful, and friendly in your responses. If you don't know something, 
-            say so clearly and offer to connect them with human support.
-            """
-            
-            # Format conversation history for OpenAI
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history
-            for msg in conversation_history:
-                role = "user" if msg.get('is_user', True) else "assistant"
-                content = msg.get('message', '')
-                
-                # Skip empty messages
-                if content:
-                    messages.append({"role": role, "content": content})
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+        trimmed, used = [], 0
+        for msg in reversed(conversation_history or []):
+            used += estimate_tokens(msg.get('message', ''))
+            if used > token_budget:
+                break
+            trimmed.append(msg)
+        trimmed.reverse()
+        return trimmed
+    
+    @staticmethod
+    def build_chat_messages(user_message, conversation_history=None):
+        """System prompt, recent conversation and the new message in OpenAI's format"""
+        system_prompt = f"{CHAT_SYSTEM_PROMPT}\nToday is {timezone.localdate():%A %Y-%m-%d}."
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Add the part of the conversation history that fits the budget
+        for msg in AIBookingAssistant.trim_history(conversation_history):
+            role = "user" if msg.get('is_user', True) else "assistant"
+            content = msg.get('message', '')
             
-            # Get response from OpenAI
+            # Skip empty messages
+            if content:
+                messages.append({"role": role, "content": content})
+        
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    @staticmethod
+    def call_tool(name, arguments):
+        """Run one of CHAT_TOOLS with the JSON arguments the model chose"""
+        try:
+            arguments = json.loads(arguments or '{}')
+        except ValueError:
+            return {'error': 'Arguments must be a JSON object'}
+        
+        if name == 'find_available_workspaces':
+            return AIBookingAssistant.find_available_workspaces(arguments)
+        if name == 'check_availability':
+            return AIBookingAssistant.check_availability(
+                arguments.get('workspace_id'), arguments.get('date'),
+                arguments.get('start_time'), arguments.get('end_time')
+            )
+        if name == 'suggest_available_times':
+            return AIBookingAssistant.suggest_available_times(
+                arguments.get('workspace_id'), arguments.get('date'),
+                duration_hours=arguments.get('duration_hours') or 1
+            )
+        return {'error': f'Unknown tool {name}'}
+    
+    @staticmethod
+    def run_tool_calls(messages, content, tool_calls):
+        """Append the model's tool calls and the result of each to the messages"""
+        messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls})
+        for tool_call in tool_calls:
+            result = AIBookingAssistant.call_tool(
+                tool_call['function']['name'], tool_call['function']['arguments']
+            )
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call['id'],
+                "content": json.dumps(result, default=str),
+            })
+    
+    @staticmethod
+    def merge_tool_call_delta(tool_calls, delta):
+        """Add a streamed fragment of a tool call to the calls collected by index"""
+        tool_call = tool_calls.setdefault(delta['index'], {
+            "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+        })
+        if delta.get('id'):
+            tool_call['id'] = delta['id']
+        function = delta.get('function') or {}
+        tool_call['function']['name'] += function.get('name') or ''
+        tool_call['function']['arguments'] += function.get('arguments') or ''
+    
+    @staticmethod
+    def generate_chat_reply(user_message, conversation_history=None):
+        """
+        Ask the model for a reply, returning ``(reply, cacheable)``.
+        
+        The model may call the CHAT_TOOLS to look up real workspaces and
+        availability; all calls it requests in a turn are answered before
+        asking it again, and after CHAT_MAX_TOOL_ROUNDS it has to answer.
+        Replies built from tool results depend on live data and are not
+        cacheable.
+        """
+        messages = AIBookingAssistant.build_chat_messages(user_message, conversation_history)
+        used_tools = False
+        for round_number in range(settings.CHAT_MAX_TOOL_ROUNDS):
+            last_round = round_number == settings.CHAT_MAX_TOOL_ROUNDS - 1
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+                model=settings.CHAT_MODEL,
                 messages=messages,
+                tools=CHAT_TOOLS,
+                tool_choice="none" if last_round else "auto",
                 max_tokens=500,
                 temperature=0.7
             )
+            message = response.choices[0].message
+            tool_calls = message.get('tool_calls')
+            if not tool_calls:
+                break
+            
+            used_tools = True
+            AIBookingAssistant.run_tool_calls(messages, message.get('content'), tool_calls)
+        
+        reply = message.get('content')
+        if not reply:
+            return CHAT_ERROR_RESPONSE, False
+        return reply, not used_tools
+    
+    @staticmethod
+    def process_chat_message(user_message, conversation_history=None, conversation=None):
+        """
+        Process a user message and generate an AI response.
+        
+        Opening messages (no prior history) are answered from the assistant
+        response cache when the same prompt was asked before. With a
+        ``conversation`` the history is read from and the exchange saved to
+        it, instead of relying on ``conversation_history``.
+        """
+        if conversation is not None:
+            conversation_history = conversation.recent_history()
+        
+        try:
+            # If OpenAI API key is not available, use a fallback response
+            if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
+                logger.warning("OpenAI API key not found, using fallback response")
+                return CHAT_FALLBACK_RESPONSE
+            
+            if conversation_history:
+                reply, _ = AIBookingAssistant.generate_chat_reply(user_message, conversation_history)
+            else:
+                reply = assistant_response_cache.get_or_create(user_message, AIBookingAssistant.generate_chat_reply)
             
-            ai_response = response.choices[0].message['content']
-            print(f"AI response generated: {ai_response[:50]}...")
-            return ai_response
+        except Exception as e:
+            logger.error(f"Error generating AI response: {e}")
+            return CHAT_ERROR_RESPONSE
+        
+        if conversation is not None:
+            conversation.add_exchange(user_message, reply)
+        return reply
+    
+    @staticmethod
+    async def stream_chat_message(user_message, conversation_history=None):
+        """
+        Async generator yielding the AI response to a user message piece by
+        piece as the model produces it. The event loop is free while waiting
+        on the model, so no worker is held for the length of the completion.
+        
+        Every round is streamed with the CHAT_TOOLS available, like
+        ``generate_chat_reply``: tool calls arrive in fragments and are
+        collected, answered, and sent back for another round, until the
+        model answers or CHAT_MAX_TOOL_ROUNDS forces it to.
+        """
+        if not getattr(settings, 'OPENAI_API_KEY', None):
+            logger.warning("OpenAI API key not found, using fallback response")
+            yield CHAT_FALLBACK_RESPONSE
+            return
+        
+        try:
+            messages = AIBookingAssistant.build_chat_messages(user_message, conversation_history)
+            answered = False
+            for round_number in range(settings.CHAT_MAX_TOOL_ROUNDS):
+                last_round = round_number == settings.CHAT_MAX_TOOL_ROUNDS - 1
+                response = await openai.ChatCompletion.acreate(
+                    model=settings.CHAT_MODEL,
+                    messages=messages,
+                    tools=CHAT_TOOLS,
+                    tool_choice="none" if last_round else "auto",
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True
+                )
+                content, tool_calls = [], {}
+                async for chunk in response:
+                    delta = chunk.choices[0].delta
+                    if delta.get('content'):
+                        answered = True
+                        content.append(delta['content'])
+                        yield delta['content']
+                    for tool_call_delta in delta.get('tool_calls') or []:
+                        AIBookingAssistant.merge_tool_call_delta(tool_calls, tool_call_delta)
+                
+                if not tool_calls:
+                    break
+                # Tools query the database, which is sync only
+                await sync_to_async(AIBookingAssistant.run_tool_calls)(
+                    messages, ''.join(content) or None, [tool_calls[index] for index in sorted(tool_calls)]
+                )
             
+            if not answered:
+                yield CHAT_ERROR_RESPONSE
         except Exception as e:
-            print(f"Error generating AI response: {e}")
-            return "I'm sorry, I'm having trouble processing your request. Please try again or contact support."
+            logger.error(f"Error streaming AI response: {e}")
+            yield CHAT_ERROR_RESPONSE
         
     @staticmethod
     def generate_unique_meeting_id():
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AibookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'aibooking'
+
+    def ready(self):
+        # Re-embed workspaces whose content changed
+        from . import signals  # noqa: F401
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+import openai
+from django.conf import settings
+from django.utils.module_loading import import_string
+try:
+    from openai.error import RateLimitError
+except ImportError:  # openai>=1.0
+    from openai import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class BaseEmbeddingBackend:
+    """
+    Turns texts into vectors of EMBEDDING_DIMENSIONS floats.
+
+    ``name`` identifies the vector space: embeddings (and cached query
+    embeddings) from backends with different names are never compared.
+    """
+    name = None
+
+    def is_available(self):
+        """Whether the backend is configured well enough to be called"""
+        return True
+
+    def embed(self, texts):
+        """Return one vector per text, in order. Raise on failure."""
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingBackend(BaseEmbeddingBackend):
+    """Remote embeddings from the OpenAI API, retried with backoff when rate limited"""
+
+    def __init__(self):
+        self.model = settings.EMBEDDING_MODEL
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES
+
+    @property
+    def name(self):
+        return f'openai:{self.model}'
+
+    def is_available(self):
+        return bool(settings.OPENAI_API_KEY)
+
+    def embed(self, texts):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = openai.Embedding.create(input=list(texts), model=self.model)
+            except RateLimitError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(2 ** attempt)
+                continue
+            data = sorted(response['data'], key=lambda item: item['index'])
+            return [item['embedding'] for item in data]
+
+
+class LocalHashingEmbeddingBackend(BaseEmbeddingBackend):
+    """
+    Deterministic in-process embeddings, for offline use, tests and load tests.
+
+    Words, word bigrams and character trigrams of each word are hashed
+    (the "hashing trick") into signed buckets of a fixed-size vector, term
+    frequencies are dampened logarithmically and the result is L2
+    normalized, so cosine distance behaves like a bag-of-words similarity.
+    No network access and no model files are needed.
+    """
+    name = 'local-hashing'
+
+    WORD_PATTERN = re.compile(r'\w+')
+    WORD_WEIGHT = 1.0
+    BIGRAM_WEIGHT = 0.5
+    TRIGRAM_WEIGHT = 0.25
+
+    def __init__(self):
+        self.dimensions = settings.EMBEDDING_DIMENSIONS
+
+    @staticmethod
+    @lru_cache(maxsize=100_000)
+    def _bucket(token, dimensions):
+        """Stable (index, sign) of a token; Python's hash() is salted per process"""
+        value = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+        return value % dimensions, 1.0 if value >> 63 else -1.0
+
+    def _features(self, text):
+        words = self.WORD_PATTERN.findall(text.lower())
+        for word in words:
+            yield word, self.WORD_WEIGHT
+            padded = f'#{word}#'
+            for i in range(len(padded) - 2):
+                yield f'3:{padded[i:i + 3]}', self.TRIGRAM_WEIGHT
+        for first, second in zip(words, words[1:]):
+            yield f'2:{first} {second}', self.BIGRAM_WEIGHT
+
+    def embed_one(self, text):
+        indices, weights = [], []
+        for token, weight in self._features(text):
+            index, sign = self._bucket(token, self.dimensions)
+            indices.append(index)
+            weights.append(sign * weight)
+
+        vector = np.zeros(self.dimensions)
+        if indices:
+            np.add.at(vector, np.array(indices), np.array(weights))
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, texts):
+        return [self.embed_one(text) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def get_embedding_backend():
+    """The backend selected by the EMBEDDING_BACKEND setting"""
+    return load_backend(settings.EMBEDDING_BACKEND)
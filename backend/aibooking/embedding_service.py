@@ -1,46 +1,129 @@
 # services/embedding_service.py
-import openai
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 from django.conf import settings
 from booking.models import WorkSpace
+from .embedding_backends import get_embedding_backend
+from .query_cache import query_embedding_cache
+
+logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     @staticmethod
     def generate_embedding(text):
-        """Generate embedding vector for text using OpenAI API"""
+        """Generate embedding vector for text"""
+        embeddings = EmbeddingService.generate_embeddings([text])
+        return embeddings[0] if embeddings else None
+
+    @staticmethod
+    def generate_query_embedding(query):
+        """Embedding of a search query, served from the query embedding cache when possible"""
+        return query_embedding_cache.get_or_create(query, EmbeddingService.generate_embedding)
+
+    @staticmethod
+    def is_enabled():
+        """Whether the configured embedding backend can be used"""
+        return get_embedding_backend().is_available()
+
+    @staticmethod
+    def generate_embeddings(texts):
+        """
+        Generate embedding vectors for many texts at once with the backend
+        selected by EMBEDDING_BACKEND. Returns the vectors in the order of
+        ``texts``, or None on failure.
+        """
         try:
-            response = openai.Embedding.create(
-                input=text,
-                model="text-embedding-ada-002"
-            )
-            return response['data'][0]['embedding']
+            return get_embedding_backend().embed(texts)
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error(f"Error generating embeddings: {e}")
             return None
-    
+
+    @staticmethod
+    def build_workspace_text(workspace):
+        """Rich description of a workspace, including its features and location"""
+        description = f"{workspace.name}. {workspace.description or ''}. "
+        description += f"Type: {workspace.get_type_display()}. "
+        description += f"Capacity: {workspace.capacity or 'Unknown'}. "
+
+        # Uses the prefetched features, so no query per workspace
+        features = ", ".join([f.name for f in workspace.features.all()])
+        if features:
+            description += f"Features: {features}. "
+
+        if workspace.location:
+            description += f"Location: {workspace.location.name}."
+        return description
+
+    @staticmethod
+    def content_hash(text):
+        # Switching backends changes every vector, so it changes every hash too
+        backend = get_embedding_backend()
+        return hashlib.sha256(f"{backend.name}\n{text}".encode('utf-8')).hexdigest()
+
     @staticmethod
-    def update_workspace_embeddings():
-        """Generate and update embeddings for all workspaces"""
-        workspaces = WorkSpace.objects.filter(embedding__isnull=True)
+    def update_workspace_embeddings(workspace_ids=None, force=False, batch_size=None, concurrency=None, progress=None):
+        """
+        Generate and update embeddings for the workspaces whose content
+        changed since they were last embedded (all of them with ``force``),
+        optionally limited to ``workspace_ids``.
+
+        The text of every candidate is rebuilt and hashed, which is cheap;
+        only those whose hash differs from the stored ``embedding_hash`` are
+        sent to the API. They are embedded ``batch_size`` at a time, with up
+        to ``concurrency`` API calls in flight, and each finished batch is
+        written back with a single bulk_update. ``progress(done, total)`` is
+        called after every batch.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        concurrency = concurrency or settings.EMBEDDING_CONCURRENCY
+
+        workspaces = WorkSpace.objects.defer('embedding').select_related(
+            'location'
+        ).prefetch_related('features').order_by('id')
+        if workspace_ids is not None:
+            workspaces = workspaces.filter(id__in=workspace_ids)
+
+        changed = []
+        for workspace in workspaces.iterator(chunk_size=1000):
+            text = EmbeddingService.build_workspace_text(workspace)
+            content_hash = EmbeddingService.content_hash(text)
+            if force or content_hash != workspace.embedding_hash:
+                workspace.embedding_hash = content_hash
+                changed.append((workspace, text))
+
+        total = len(changed)
+        processed = 0
         updated_count = 0
-        
-        for workspace in workspaces:
-            # Create rich description including features and location
-            description = f"{workspace.name}. {workspace.description or ''}. "
-            description += f"Type: {workspace.get_type_display()}. "
-            description += f"Capacity: {workspace.capacity or 'Unknown'}. "
-            
-            if workspace.features.exists():
-                features = ", ".join([f.name for f in workspace.features.all()])
-                description += f"Features: {features}. "
-                
-            if workspace.location:
-                description += f"Location: {workspace.location.name}."
-            
-            # Generate embedding
-            embedding = EmbeddingService.generate_embedding(description)
-            if embedding:
-                workspace.embedding = embedding
-                workspace.save(update_fields=['embedding'])
-                updated_count += 1
-        
-        return updated_count
\ No newline at end of file
+
+        def save_batch(future):
+            nonlocal processed, updated_count
+            batch, embeddings = future.result()
+            processed += len(batch)
+            if embeddings:
+                for workspace, embedding in zip(batch, embeddings):
+                    workspace.embedding = embedding
+                WorkSpace.objects.bulk_update(batch, ['embedding', 'embedding_hash'])
+                updated_count += len(batch)
+            if progress:
+                progress(processed, total)
+
+        def embed_batch(batch, texts):
+            return batch, EmbeddingService.generate_embeddings(texts)
+
+        # Only the API calls run in the pool; all database work stays on this thread
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+            for start in range(0, total, batch_size):
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        save_batch(future)
+                batch, texts = zip(*changed[start:start + batch_size])
+                pending.add(executor.submit(embed_batch, list(batch), list(texts)))
+
+            for future in wait(pending).done:
+                save_batch(future)
+
+        return updated_count
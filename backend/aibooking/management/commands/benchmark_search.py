@@ -0,0 +1,135 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from aibooking.embedding_backends import LocalHashingEmbeddingBackend
+from aibooking.search import HybridSearch
+from booking.models import WorkSpace, Location, Feature
+
+TYPES = dict(WorkSpace.WORKSPACE_TYPES)
+FEATURES = [
+    'Projector', 'Whiteboard', 'Standing desk', 'Dual monitors', 'Video conferencing', 'Speakerphone',
+    'Ergonomic chair', 'Natural light', 'Privacy screen', 'Coffee machine', 'Lockers', 'Sofa',
+    'Smart TV', 'Noise cancellation', 'Phone charger', 'Plants',
+]
+WORDS = [
+    'quiet', 'bright', 'spacious', 'cosy', 'modern', 'corner', 'open', 'private', 'sunny', 'calm',
+    'airy', 'compact', 'central', 'window', 'garden', 'rooftop', 'lounge', 'studio', 'library', 'atrium',
+    'focus', 'creative', 'executive', 'team', 'huddle', 'lively', 'minimal', 'industrial', 'loft', 'view',
+    'river', 'park', 'courtyard', 'balcony', 'terrace', 'glass', 'wooden', 'green', 'blue', 'north',
+    'south', 'east', 'west', 'upper', 'lower', 'mezzanine', 'gallery', 'harbour', 'skyline', 'canal',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks recall and latency of lexical, vector and hybrid workspace search on a generated catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50000, help='Number of workspaces to generate')
+        parser.add_argument('--queries', type=int, default=200, help='Number of queries per search mode')
+        parser.add_argument('--limit', type=int, default=10, help='Results per query (recall@limit)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated catalog instead of rolling it back')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        backend = LocalHashingEmbeddingBackend()
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            targets = self.generate_catalog(rng, backend, options['size'])
+            self.stdout.write(f"Generated {options['size']} workspaces in {time.perf_counter() - started:.1f}s")
+
+            queries = self.build_queries(rng, backend, targets, options['queries'])
+            search = HybridSearch()
+            for mode in (HybridSearch.LEXICAL, HybridSearch.VECTOR, HybridSearch.HYBRID):
+                self.run_mode(search, mode, queries, options['limit'])
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def generate_catalog(self, rng, backend, size, batch_size=2000):
+        # Building the vector index once at the end is much faster than
+        # maintaining it row by row
+        vector_index = next(index for index in WorkSpace._meta.indexes if index.name == 'workspace_embedding_hnsw_idx')
+        with connection.schema_editor(atomic=False) as editor:
+            editor.remove_index(WorkSpace, vector_index)
+
+        locations = Location.objects.bulk_create([Location(name=f'{word.title()} Building') for word in WORDS[:30]])
+        features = Feature.objects.bulk_create([Feature(name=name) for name in FEATURES])
+        through = WorkSpace.features.through
+
+        targets = []
+        for start in range(0, size, batch_size):
+            batch, batch_features = [], []
+            for number in range(start, min(start + batch_size, size)):
+                workspace_type = rng.choice(list(TYPES))
+                location = rng.choice(locations)
+                chosen = rng.sample(features, rng.randint(1, 4))
+                workspace = WorkSpace(
+                    name=f'{TYPES[workspace_type]} {number}',
+                    type=workspace_type,
+                    description=' '.join(rng.sample(WORDS, 4)),
+                    capacity=rng.randint(1, 40),
+                    location=location,
+                )
+                text = (f"{workspace.name}. {workspace.description}. Type: {TYPES[workspace_type]}. "
+                        f"Capacity: {workspace.capacity}. Features: {', '.join(f.name for f in chosen)}. "
+                        f"Location: {location.name}.")
+                workspace.embedding = backend.embed_one(text)
+                batch.append(workspace)
+                batch_features.append(chosen)
+
+            WorkSpace.objects.bulk_create(batch)
+            through.objects.bulk_create([
+                through(workspace_id=workspace.id, feature_id=feature.id)
+                for workspace, chosen in zip(batch, batch_features) for feature in chosen
+            ])
+            targets.extend(batch)
+            self.stdout.write(f'  {len(targets)}/{size} workspaces generated')
+
+        WorkSpace.objects.filter(id__in=[w.id for w in targets]).update_search_documents()
+        with connection.cursor() as cursor:
+            # Run the deferred foreign key checks, an index cannot be built with them pending
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        with connection.schema_editor(atomic=False) as editor:
+            editor.add_index(WorkSpace, vector_index)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {WorkSpace._meta.db_table}')
+        return targets
+
+    def build_queries(self, rng, backend, targets, count):
+        """Alternate exact-name lookups and loose descriptions of a known workspace"""
+        queries = []
+        for i, target in enumerate(rng.sample(targets, count)):
+            if i % 2 == 0:
+                text = target.name
+            else:
+                # Part of the description, the type and a word the workspace does not have
+                words = target.description.split()
+                rng.shuffle(words)
+                extra = rng.choice([word for word in WORDS if word not in words])
+                text = f"{words[0]} {extra} {words[1]} {TYPES[target.type].lower()} in {target.location.name}"
+            queries.append((text, backend.embed_one(text), target.id))
+        return queries
+
+    def run_mode(self, search, mode, queries, limit):
+        latencies, hits = [], {'exact': 0, 'loose': 0}
+        for i, (text, query_embedding, target_id) in enumerate(queries):
+            started = time.perf_counter()
+            results = search.search(text, query_embedding=query_embedding, limit=limit, mode=mode)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if target_id in [workspace.id for workspace in results]:
+                hits['exact' if i % 2 == 0 else 'loose'] += 1
+
+        per_kind = (len(queries) + 1) // 2, len(queries) // 2
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f"{mode:>8}: recall@{limit} exact {hits['exact'] / per_kind[0]:.2f}, "
+            f"loose {hits['loose'] / max(per_kind[1], 1):.2f} | "
+            f"latency p50 {statistics.median(latencies):.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}ms"
+        ))
@@ -2,16 +2,32 @@ from django.core.management.base import BaseCommand
 from aibooking.embedding_service import EmbeddingService
 
 class Command(BaseCommand):
-    help = 'Update embeddings for all workspaces that don\'t have embeddings yet'
+    help = 'Update embeddings for workspaces whose content changed since they were last embedded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Number of workspaces embedded per API call (default: EMBEDDING_BATCH_SIZE)')
+        parser.add_argument('--concurrency', type=int,
+                            help='Number of API calls in flight (default: EMBEDDING_CONCURRENCY)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-embed every workspace, even unchanged ones')
 
     def handle(self, *args, **options):
         # Display starting message
         self.stdout.write(self.style.WARNING('Starting to update workspace embeddings...'))
         
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} workspaces processed')
+        
         # Call the service to update embeddings
-        count = EmbeddingService.update_workspace_embeddings()
+        count = EmbeddingService.update_workspace_embeddings(
+            force=options['force'],
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            progress=progress
+        )
         
         # Display success message with count
         self.stdout.write(
             self.style.SUCCESS(f'Successfully updated {count} workspace embeddings')
-        )
\ No newline at end of file
+        )
@@ -1,3 +1,74 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+def estimate_tokens(text):
+    """Rough token count of a chat message (about 4 characters per token, plus framing)"""
+    return len(text or '') // 4 + 4
+
+
+class Conversation(models.Model):
+    """Server-side state of a chat with the booking assistant"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_conversations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Conversation {self.id} with {self.user}"
+
+    def recent_history(self, token_budget=None):
+        """
+        The latest messages that fit in ``token_budget`` tokens, oldest first,
+        in the {"message", "is_user"} format the assistant takes
+        """
+        if token_budget is None:
+            token_budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+
+        history, used = [], 0
+        for message in self.messages.order_by('-created_at', '-id')[:settings.CHAT_HISTORY_MAX_MESSAGES]:
+            used += message.token_count
+            if used > token_budget:
+                break
+            history.append({'message': message.content, 'is_user': message.role == ConversationMessage.USER})
+        history.reverse()
+        return history
+
+    def add_history(self, history):
+        """Store earlier messages in the {"message", "is_user"} format, e.g. a client's history"""
+        ConversationMessage.objects.bulk_create([
+            ConversationMessage(
+                conversation=self,
+                role=ConversationMessage.USER if msg.get('is_user', True) else ConversationMessage.ASSISTANT,
+                content=msg['message'],
+                token_count=estimate_tokens(msg['message'])
+            )
+            for msg in history if msg.get('message')
+        ])
+
+    def add_exchange(self, user_message, response):
+        ConversationMessage.objects.bulk_create([
+            ConversationMessage(conversation=self, role=role, content=content, token_count=estimate_tokens(content))
+            for role, content in ((ConversationMessage.USER, user_message), (ConversationMessage.ASSISTANT, response))
+        ])
+        self.save(update_fields=['updated_at'])
+
+
+class ConversationMessage(models.Model):
+    USER = 'user'
+    ASSISTANT = 'assistant'
+    ROLES = (
+        (USER, 'User'),
+        (ASSISTANT, 'Assistant'),
+    )
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    role = models.CharField(max_length=10, choices=ROLES)
+    content = models.TextField()
+    token_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+
+    def __str__(self):
+        return f"{self.get_role_display()}: {self.content[:50]}"
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .embedding_backends import get_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of search query embeddings.
+
+    Queries are normalized (case, whitespace, surrounding punctuation) so
+    that "Quiet desk" and "quiet  desk?" share an entry. Lookups go to an
+    in-process LRU first, then to the shared cache (Redis when
+    EMBEDDING_CACHE_URL is set), and only then to the embeddings API. Both
+    tiers are bounded by EMBEDDING_CACHE_TIMEOUT; the local one also by
+    EMBEDDING_CACHE_SIZE entries.
+
+    Hit and miss counters are kept per process, see ``stats()``.
+    """
+    KEY_PREFIX = 'query-embedding'
+
+    def __init__(self, max_size=None, timeout=None):
+        self.max_size = max_size or settings.EMBEDDING_CACHE_SIZE
+        self.timeout = timeout or settings.EMBEDDING_CACHE_TIMEOUT
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query):
+        query = re.sub(r'\s+', ' ', query.lower()).strip()
+        return query.strip('.,;:!?"\' ')
+
+    @staticmethod
+    def get_shared_cache():
+        return caches[settings.EMBEDDING_CACHE_ALIAS]
+
+    def make_key(self, normalized):
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        # A different backend or model means different vectors
+        return f'{self.KEY_PREFIX}:{get_embedding_backend().name}:{digest}'
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            embedding, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return embedding
+
+    def _set_local(self, key, embedding):
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, query, generate):
+        """Return the embedding of ``query``, calling ``generate(text)`` on a miss"""
+        normalized = self.normalize(query)
+        key = self.make_key(normalized)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.local_hits += 1
+            return embedding
+
+        try:
+            embedding = self.get_shared_cache().get(key)
+        except Exception as e:
+            logger.error(f"Error reading query embedding cache: {str(e)}")
+            embedding = None
+        if embedding is not None:
+            self.shared_hits += 1
+            self._set_local(key, embedding)
+            return embedding
+
+        self.misses += 1
+        embedding = generate(normalized)
+        if embedding is None:
+            # Do not cache failures
+            return None
+
+        self._set_local(key, embedding)
+        try:
+            self.get_shared_cache().set(key, embedding, timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Error writing query embedding cache: {str(e)}")
+        return embedding
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache()
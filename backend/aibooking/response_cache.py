@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from booking.catalog import CatalogCache
+from .embedding_service import EmbeddingService
+from .query_cache import QueryEmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An upstream request other threads asking the same prompt wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reply = None
+
+
+class AssistantResponseCache:
+    """
+    Cache of assistant replies to prompts asked without prior conversation.
+
+    Prompts are normalized like search queries, so "How do I book?" and
+    "how do i book" share an entry. Entries live in the catalog cache under
+    the current catalog version and today's date, so they are dropped as
+    soon as a workspace, location or feature changes (or the date in the
+    system prompt does), and otherwise expire after ASSISTANT_CACHE_TIMEOUT.
+
+    When ASSISTANT_CACHE_SIMILARITY is set, a prompt whose embedding is at
+    least that cosine-similar to a recently cached one reuses its reply.
+
+    Concurrent requests for the same prompt in a process are coalesced: the
+    first one calls the model, the others wait for and share its reply.
+    """
+    KEY_PREFIX = 'assistant-response'
+
+    def __init__(self, timeout=None, similarity=None, max_size=None):
+        self.timeout = timeout or settings.ASSISTANT_CACHE_TIMEOUT
+        self.similarity = similarity if similarity is not None else settings.ASSISTANT_CACHE_SIMILARITY
+        self.max_size = max_size or settings.ASSISTANT_CACHE_SIZE
+        # key -> (prefix, unit embedding) of recently cached prompts
+        self._embeddings = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_cache():
+        return CatalogCache.get_cache()
+
+    def make_prefix(self):
+        return f'{self.KEY_PREFIX}:{CatalogCache.get_version()}:{timezone.localdate().isoformat()}'
+
+    @staticmethod
+    def make_key(prefix, normalized):
+        return f"{prefix}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+    def _embed(self, normalized):
+        if not self.similarity or not EmbeddingService.is_enabled():
+            return None
+        embedding = EmbeddingService.generate_query_embedding(normalized)
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=float)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _find_similar(self, prefix, vector):
+        with self._lock:
+            candidates = [(key, other) for key, (other_prefix, other) in self._embeddings.items()
+                          if other_prefix == prefix]
+        if vector is None or not candidates:
+            return None
+        similarities = np.stack([other for _, other in candidates]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity:
+            return None
+        return self.get_cache().get(candidates[best][0])
+
+    def _remember(self, key, prefix, vector):
+        with self._lock:
+            self._embeddings[key] = (prefix, vector)
+            self._embeddings.move_to_end(key)
+            while len(self._embeddings) > self.max_size:
+                self._embeddings.popitem(last=False)
+
+    def get_or_create(self, prompt, generate):
+        """
+        Return the reply to ``prompt``, calling ``generate(prompt)`` on a
+        miss. ``generate`` returns ``(reply, cacheable)``; replies built from
+        live lookups (tool calls) or errors should not be cached.
+        """
+        normalized = QueryEmbeddingCache.normalize(prompt)
+        prefix = self.make_prefix()
+        key = self.make_key(prefix, normalized)
+
+        try:
+            reply = self.get_cache().get(key)
+        except Exception as e:
+            logger.error(f"Error reading assistant response cache: {str(e)}")
+            reply = None
+        if reply is not None:
+            self.hits += 1
+            return reply
+
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+        if not leader:
+            self.coalesced += 1
+            call.done.wait()
+            if call.reply is not None:
+                return call.reply
+            # The first request failed, try on our own
+            reply, _ = generate(prompt)
+            return reply
+
+        try:
+            vector = None
+            try:
+                vector = self._embed(normalized)
+                reply = self._find_similar(prefix, vector)
+            except Exception as e:
+                logger.error(f"Error matching similar assistant prompts: {str(e)}")
+            if reply is not None:
+                self.similar_hits += 1
+            else:
+                self.misses += 1
+                reply, cacheable = generate(prompt)
+                if cacheable:
+                    try:
+                        self.get_cache().set(key, reply, timeout=self.timeout)
+                    except Exception as e:
+                        logger.error(f"Error writing assistant response cache: {str(e)}")
+                    if vector is not None:
+                        self._remember(key, prefix, vector)
+            call.reply = reply
+            return reply
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._embeddings.clear()
+        self.hits = self.similar_hits = self.coalesced = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.similar_hits + self.coalesced + self.misses
+        return {
+            'hits': self.hits,
+            'similar_hits': self.similar_hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'hit_rate': round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+        }
+
+
+assistant_response_cache = AssistantResponseCache()
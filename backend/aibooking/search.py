@@ -0,0 +1,128 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import F
+from pgvector.django import CosineDistance
+
+from booking.models import WorkSpace, Location, SEARCH_CONFIG
+
+
+class HybridSearch:
+    """
+    Workspace search combining full-text and vector similarity rankings.
+
+    The best HYBRID_SEARCH_CANDIDATES matches of each ranking (full-text
+    over the GIN-indexed search document, cosine distance over the HNSW
+    indexed embedding) are fused with reciprocal-rank fusion,
+    score = sum(1 / (k + rank)), so exact matches on names such as
+    "Desk 101" surface even when their embedding is not the closest.
+    Both rankings, the fusion and the final rows are computed in a single
+    query.
+
+    ``mode`` may be 'lexical' or 'vector' to use a single ranking; the
+    search falls back to whichever ranking is possible when the query has
+    no searchable words or no embedding.
+    """
+    HYBRID = 'hybrid'
+    LEXICAL = 'lexical'
+    VECTOR = 'vector'
+
+    # Columns returned for each result; the embedding is never needed
+    COLUMNS = ('id', 'name', 'type', 'description', 'location_id', 'capacity', 'is_available', 'hourly_rate')
+
+    def __init__(self, k=None, candidates=None):
+        self.k = k or settings.HYBRID_SEARCH_RRF_K
+        self.candidates = candidates or settings.HYBRID_SEARCH_CANDIDATES
+
+    @staticmethod
+    def build_query(text):
+        """
+        Match workspaces containing every word of the text (web search
+        syntax, so "or", quotes and -word work too). Loose, descriptive
+        queries are left to the vector ranking.
+        """
+        if not re.search(r'\w', text):
+            return None
+        return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+    def max_score(self):
+        """Score of a workspace ranked first by both rankings"""
+        return 2 / (self.k + 1)
+
+    def _lexical(self, queryset, text_query):
+        return queryset.filter(search_document=text_query).annotate(
+            score=SearchRank(F('search_document'), text_query, cover_density=True)
+        ).order_by('-score', 'id').values('id', 'score')[:self.candidates]
+
+    def _vector(self, queryset, query_embedding):
+        # Ordered by the bare distance so the HNSW index can serve it
+        return queryset.filter(embedding__isnull=False).annotate(
+            distance=CosineDistance('embedding', query_embedding)
+        ).order_by('distance').values('id', score=-F('distance'))[:self.candidates]
+
+    def search(self, text, queryset=None, query_embedding=None, limit=5, mode=HYBRID):
+        """
+        Return up to ``limit`` workspaces of ``queryset`` (default: all)
+        best matching ``text``, each with ``score``, ``lexical_rank``,
+        ``semantic_rank`` and ``location_name`` attributes.
+        """
+        if queryset is None:
+            queryset = WorkSpace.objects.all()
+        text_query = self.build_query(text) if mode != self.VECTOR else None
+        if mode == self.LEXICAL:
+            query_embedding = None
+
+        rankings = []
+        if text_query is not None:
+            rankings.append(('lexical', self._lexical(queryset, text_query)))
+        if query_embedding is not None:
+            rankings.append(('semantic', self._vector(queryset, query_embedding)))
+        if not rankings:
+            return []
+
+        ctes, params = [], []
+        for name, ranking in rankings:
+            sql, ranking_params = ranking.query.sql_with_params()
+            ctes.append(
+                f"{name} AS (SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC, id) AS position FROM ({sql}) AS ranked)"
+            )
+            params.extend(ranking_params)
+
+        names = [name for name, _ in rankings]
+        first = names[0]
+        joins = ''.join(f" FULL OUTER JOIN {name} ON {name}.id = {first}.id" for name in names[1:])
+        ranks = ', '.join(
+            f"{name}.position AS {name}_rank" if name in names else f"NULL AS {name}_rank"
+            for name in ('lexical', 'semantic')
+        )
+        score = ' + '.join(f"COALESCE(1.0 / (%s + {name}.position), 0)" for name in names)
+        params.extend([self.k] * len(names))
+
+        workspace_table = WorkSpace._meta.db_table
+        location_table = Location._meta.db_table
+        columns = ', '.join(f"workspace.{column}" for column in self.COLUMNS)
+        sql = f"""
+            WITH {', '.join(ctes)},
+            fused AS (
+                SELECT COALESCE({', '.join(f'{name}.id' for name in names)}) AS id, {ranks}, {score} AS score
+                FROM {first}{joins}
+            )
+            SELECT {columns}, location.name AS location_name,
+                   fused.lexical_rank, fused.semantic_rank, fused.score
+            FROM fused
+            JOIN {workspace_table} workspace ON workspace.id = fused.id
+            LEFT JOIN {location_table} location ON location.id = workspace.location_id
+            ORDER BY fused.score DESC, workspace.id
+            LIMIT %s
+        """
+        params.append(limit)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if query_embedding is not None:
+                # Filters are applied to the candidates the HNSW index
+                # returns, so widen the candidate list enough to fill it
+                cursor.execute("SET LOCAL hnsw.ef_search = %s",
+                               [max(settings.VECTOR_SEARCH_EF_SEARCH, self.candidates)])
+            return list(WorkSpace.objects.raw(sql, params))
@@ -0,0 +1,57 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, m2m_changed
+
+from booking.models import WorkSpace, Location, Feature
+from .embedding_service import EmbeddingService
+from .tasks import refresh_workspace_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Saves touching only these fields cannot change the embedding text
+EMBEDDING_FIELDS = {'embedding', 'embedding_hash'}
+
+
+def queue_refresh(workspace_ids):
+    """Refresh the embeddings of the workspaces once the write is committed"""
+    if not EmbeddingService.is_enabled():
+        return
+    workspace_ids = list(workspace_ids)
+    if not workspace_ids:
+        return
+
+    def enqueue():
+        try:
+            refresh_workspace_embeddings.delay(workspace_ids)
+        except Exception as e:
+            # The periodic refresh picks these up later
+            logger.warning(f"Could not queue embedding refresh for workspaces {workspace_ids}: {str(e)}")
+
+    transaction.on_commit(enqueue)
+
+
+def workspace_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and set(update_fields) <= EMBEDDING_FIELDS):
+        return
+    queue_refresh([instance.pk])
+
+
+def related_saved(sender, instance, raw=False, **kwargs):
+    """A location or feature was renamed, refresh every workspace using it"""
+    if raw:
+        return
+    queue_refresh(instance.workspaces.values_list('id', flat=True))
+
+
+def features_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        queue_refresh(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear':
+        queue_refresh(instance.workspaces.values_list('id', flat=True) if reverse else [instance.pk])
+
+
+post_save.connect(workspace_saved, sender=WorkSpace, dispatch_uid='embedding_workspace_save')
+post_save.connect(related_saved, sender=Location, dispatch_uid='embedding_location_save')
+post_save.connect(related_saved, sender=Feature, dispatch_uid='embedding_feature_save')
+m2m_changed.connect(features_changed, sender=WorkSpace.features.through, dispatch_uid='embedding_features_changed')
@@ -0,0 +1,16 @@
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def refresh_workspace_embeddings(workspace_ids=None):
+    """
+    Re-embed the given workspaces (or every workspace) whose content hash
+    changed since they were last embedded
+    """
+    from .embedding_service import EmbeddingService
+    
+    count = EmbeddingService.update_workspace_embeddings(workspace_ids=workspace_ids)
+    logger.info(f"Refreshed {count} workspace embeddings")
+    return count
@@ -1,3 +1,594 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+import threading
+import time as time_module
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import User
+from booking.catalog import CatalogCache
+from booking.models import WorkSpace, Location, Feature, Booking, MeetingRoom
+from .ai_assistant_service import AIBookingAssistant
+from .embedding_backends import LocalHashingEmbeddingBackend
+from .embedding_service import EmbeddingService
+from .models import Conversation
+from .query_cache import QueryEmbeddingCache
+from .response_cache import AssistantResponseCache, assistant_response_cache
+from .search import HybridSearch
+
+
+def fake_embeddings(input, model):
+    """One distinct vector per input, returned out of order like the API may"""
+    return {'data': [
+        {'index': i, 'embedding': [float(len(text))] * 1536}
+        for i, text in reversed(list(enumerate(input)))
+    ]}
+
+
+@override_settings(OPENAI_API_KEY='test-key')
+@mock.patch('openai.Embedding', create=True)
+class IncrementalEmbeddingTests(TestCase):
+
+    def setUp(self):
+        self.projector = Feature.objects.create(name='Projector')
+        self.location = Location.objects.create(name='East Wing')
+        self.workspaces = [
+            WorkSpace.objects.create(name=f'Room {i}', type='meeting', location=self.location) for i in range(3)
+        ]
+        self.workspaces[0].features.add(self.projector)
+
+    def embedded_inputs(self, embedding_api):
+        return [text for call in embedding_api.create.call_args_list for text in call.kwargs['input']]
+
+    def test_only_changed_workspaces_are_embedded(self, embedding_api):
+        embedding_api.create.side_effect = fake_embeddings
+        self.assertEqual(EmbeddingService.update_workspace_embeddings(batch_size=2), 3)
+        self.assertEqual(embedding_api.create.call_count, 2)
+
+        embedding_api.create.reset_mock()
+        self.assertEqual(EmbeddingService.update_workspace_embeddings(), 0)
+        embedding_api.create.assert_not_called()
+
+        self.projector.name = 'Projector 4K'
+        self.projector.save()
+        self.assertEqual(EmbeddingService.update_workspace_embeddings(), 1)
+        self.assertIn('Projector 4K', self.embedded_inputs(embedding_api)[0])
+
+        workspace = WorkSpace.objects.get(id=self.workspaces[0].id)
+        text = EmbeddingService.build_workspace_text(workspace)
+        self.assertEqual(workspace.embedding_hash, EmbeddingService.content_hash(text))
+        self.assertEqual(workspace.embedding[0], len(text))
+
+    def test_edits_queue_a_refresh(self, embedding_api):
+        with mock.patch('aibooking.signals.refresh_workspace_embeddings') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.workspaces[1].description = 'Now with a view'
+                self.workspaces[1].save()
+            task.delay.assert_called_once_with([self.workspaces[1].id])
+
+            task.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.location.name = 'West Wing'
+                self.location.save()
+            self.assertCountEqual(task.delay.call_args.args[0], [w.id for w in self.workspaces])
+
+            task.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.workspaces[2].embedding_hash = 'stale'
+                self.workspaces[2].save(update_fields=['embedding_hash'])
+            task.delay.assert_not_called()
+
+
+class BatchedEmbeddingUpdateTests(TestCase):
+
+    def setUp(self):
+        self.workspaces = [WorkSpace.objects.create(name=f'Room {i}', type='meeting') for i in range(5)]
+        self.backend = mock.Mock()
+        self.backend.name = 'fake'
+        patcher = mock.patch('aibooking.embedding_service.get_embedding_backend', return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def embed(self, texts):
+        if any(text.startswith('Room 2.') for text in texts):
+            raise ConnectionError('API unavailable')
+        return [[float(len(text))] * 1536 for text in texts]
+
+    def test_batches_are_embedded_concurrently_and_saved(self):
+        self.backend.embed.side_effect = self.embed
+        progress = mock.Mock()
+        updated = EmbeddingService.update_workspace_embeddings(batch_size=2, concurrency=2, progress=progress)
+
+        # ceil(5 / 2) batches: [0, 1], [2, 3] (fails) and [4]
+        self.assertEqual(self.backend.embed.call_count, 3)
+        self.assertEqual(updated, 3)
+        # Batches may finish in any order; progress counts up to the total
+        done = [call.args[0] for call in progress.call_args_list]
+        self.assertEqual(len(done), 3)
+        self.assertEqual(done, sorted(done))
+        self.assertEqual(done[-1], 5)
+        self.assertTrue(all(call.args[1] == 5 for call in progress.call_args_list))
+
+        hashes = dict(WorkSpace.objects.values_list('name', 'embedding_hash'))
+        self.assertIsNone(hashes['Room 2'])
+        self.assertIsNone(hashes['Room 3'])
+        for name in ('Room 0', 'Room 1', 'Room 4'):
+            self.assertIsNotNone(hashes[name])
+
+        # Only the failed batch is retried
+        self.backend.embed.reset_mock(side_effect=True)
+        self.backend.embed.side_effect = lambda texts: [[1.0] * 1536 for _ in texts]
+        self.assertEqual(EmbeddingService.update_workspace_embeddings(batch_size=2), 2)
+        self.assertEqual(self.backend.embed.call_count, 1)
+
+
+class QueryEmbeddingCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = QueryEmbeddingCache(max_size=2, timeout=60)
+        self.generate = mock.Mock(side_effect=lambda text: [float(len(text))])
+
+    def test_normalized_queries_share_an_entry(self):
+        self.assertEqual(self.cache.get_or_create('Quiet  Desk?', self.generate), [10.0])
+        self.assertEqual(self.cache.get_or_create('quiet desk', self.generate), [10.0])
+        self.generate.assert_called_once_with('quiet desk')
+        self.assertEqual(self.cache.stats()['local_hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for query in ('a', 'b', 'a', 'c'):
+            self.cache.get_or_create(query, self.generate)
+        self.generate.reset_mock()
+        self.cache.get_or_create('a', self.generate)
+        self.generate.assert_not_called()
+        self.cache.get_or_create('b', self.generate)
+        self.generate.assert_called_once_with('b')
+
+    def test_expired_entries_are_regenerated(self):
+        with mock.patch('aibooking.query_cache.time.monotonic', return_value=0):
+            self.cache.get_or_create('a', self.generate)
+        with mock.patch('aibooking.query_cache.time.monotonic', return_value=61):
+            self.cache.get_or_create('a', self.generate)
+        self.assertEqual(self.generate.call_count, 2)
+
+    def test_failures_are_not_cached(self):
+        generate = mock.Mock(return_value=None)
+        self.assertIsNone(self.cache.get_or_create('a', generate))
+        self.cache.get_or_create('a', generate)
+        self.assertEqual(generate.call_count, 2)
+
+
+class SimilarWorkspaceSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.projector = Feature.objects.create(name='Projector')
+        east = Location.objects.create(name='East Wing')
+        west = Location.objects.create(name='West Wing')
+
+        def workspace(name, direction, **kwargs):
+            # Each workspace points in its own direction of the embedding space
+            embedding = [0.0] * 1536
+            embedding[direction] = 1.0
+            embedding[0] += 0.5
+            return WorkSpace.objects.create(name=name, embedding=embedding, **kwargs)
+
+        cls.board_room = workspace('Board Room', 1, type='meeting', capacity=10, location=east)
+        cls.board_room.features.add(cls.projector)
+        cls.huddle = workspace('Huddle Room', 2, type='meeting', capacity=4, location=east)
+        cls.quiet_desk = workspace('Quiet Desk', 3, type='desk', capacity=1, location=west)
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.board_room)
+        cls.date = date(2030, 1, 7)
+
+    def search(self, filters=None):
+        query_embedding = [0.0] * 1536
+        query_embedding[1] = 1.0
+        with mock.patch('aibooking.embedding_service.EmbeddingService.generate_query_embedding',
+                        return_value=query_embedding):
+            return [w['name'] for w in AIBookingAssistant.find_similar_workspaces('board', filters=filters)]
+
+    def test_orders_by_similarity(self):
+        self.assertEqual(self.search()[0], 'Board Room')
+
+    def test_filters_are_applied_before_ranking(self):
+        self.assertEqual(self.search({'type': 'meeting', 'capacity': 5}), ['Board Room'])
+        self.assertEqual(self.search({'location': 'west'}), ['Quiet Desk'])
+        self.assertEqual(self.search({'features': ['projector']}), ['Board Room'])
+
+    def test_time_filter_skips_booked_workspaces(self):
+        start = timezone.make_aware(datetime.combine(self.date, time(10)))
+        Booking.objects.create(
+            user=self.user, work_space=self.board_room, meeting_room=self.room,
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+        results = self.search({'date': '2030-01-07', 'start_time': '10:30', 'end_time': '11:30'})
+        self.assertNotIn('Board Room', results)
+        results = self.search({'date': '2030-01-07', 'start_time': '11:00', 'end_time': '12:00'})
+        self.assertIn('Board Room', results)
+
+
+LOCAL_BACKEND = 'aibooking.embedding_backends.LocalHashingEmbeddingBackend'
+
+
+class LocalEmbeddingBackendTests(TestCase):
+
+    def setUp(self):
+        self.backend = LocalHashingEmbeddingBackend()
+
+    def similarity(self, first, second):
+        return sum(a * b for a, b in zip(*self.backend.embed([first, second])))
+
+    def test_vectors_are_deterministic_and_normalized(self):
+        vector = self.backend.embed_one('Quiet desk by the window')
+        self.assertEqual(len(vector), 1536)
+        self.assertEqual(vector, LocalHashingEmbeddingBackend().embed_one('Quiet desk by the window'))
+        self.assertAlmostEqual(sum(v * v for v in vector), 1.0)
+
+    def test_related_texts_are_closer(self):
+        self.assertGreater(
+            self.similarity('meeting room with projectors', 'Board room. Features: Projector.'),
+            self.similarity('meeting room with projectors', 'Quiet desk. Features: Standing desk.')
+        )
+
+    @override_settings(EMBEDDING_BACKEND=LOCAL_BACKEND)
+    def test_search_works_offline(self):
+        for name in ('Board Room', 'Quiet Desk'):
+            WorkSpace.objects.create(name=name, type='meeting' if 'Room' in name else 'desk')
+        self.assertEqual(EmbeddingService.update_workspace_embeddings(), 2)
+
+        results = AIBookingAssistant.find_similar_workspaces('a quiet desk')
+        self.assertEqual(results[0]['name'], 'Quiet Desk')
+
+
+class HybridSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.whiteboard = Feature.objects.create(name='Whiteboard')
+        cls.desks = []
+        for number in range(100, 110):
+            embedding = [0.0] * 1536
+            embedding[number - 99] = 1.0
+            cls.desks.append(WorkSpace.objects.create(name=f'Desk {number}', type='desk', embedding=embedding))
+        cls.desks[5].features.add(cls.whiteboard)
+
+    def names(self, text, query_embedding=None, mode=HybridSearch.HYBRID):
+        return [w.name for w in HybridSearch().search(text, query_embedding=query_embedding, limit=3, mode=mode)]
+
+    def test_exact_name_outranks_closer_embeddings(self):
+        # The embedding points at Desk 100, the words at Desk 101
+        query_embedding = [0.0] * 1536
+        query_embedding[1] = 1.0
+        self.assertEqual(self.names('Desk 101', query_embedding, mode=HybridSearch.VECTOR)[0], 'Desk 100')
+        self.assertEqual(self.names('Desk 101', query_embedding)[0], 'Desk 101')
+
+    def test_lexical_only_without_embedding(self):
+        self.assertEqual(self.names('desk with a whiteboard')[0], 'Desk 105')
+
+    def test_search_documents_follow_feature_changes(self):
+        self.whiteboard.name = 'Glass board'
+        self.whiteboard.save()
+        self.assertEqual(self.names('glass', mode=HybridSearch.LEXICAL), ['Desk 105'])
+
+        self.whiteboard.workspaces.clear()
+        self.assertEqual(self.names('glass', mode=HybridSearch.LEXICAL), [])
+
+
+class FakeStream:
+    """Async iterator over streamed completion chunks"""
+
+    def __init__(self, pieces):
+        # Text pieces become content deltas, dicts are used as the delta itself
+        self.chunks = iter([
+            mock.Mock(choices=[mock.Mock(delta=piece if isinstance(piece, dict) else {'content': piece} if piece else {})])
+            for piece in pieces
+        ])
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@override_settings(OPENAI_API_KEY='test-key')
+@mock.patch('openai.ChatCompletion', create=True)
+class AssistantStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+
+    async def post(self, data):
+        token = AccessToken.for_user(self.user)
+        return await self.async_client.post('/api/ai/assistant/stream/', data, content_type='application/json',
+                                            headers={'Authorization': f'Bearer {token}'})
+
+    async def read(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_tokens_are_streamed_as_events(self, chat_api):
+        chat_api.acreate = mock.AsyncMock(return_value=FakeStream(['Desk 4', None, ' is free']))
+        response = await self.post({'message': 'Any desks?', 'conversation_history': [
+            {'message': 'Hi', 'is_user': True}, {'message': 'Hello!', 'is_user': False},
+        ]})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = await self.read(response)
+
+        self.assertIn('data: {"token": "Desk 4"}\n\n', body)
+        self.assertIn('data: {"token": " is free"}\n\n', body)
+        self.assertIn('event: done\n', body)
+        messages = chat_api.acreate.call_args.kwargs['messages']
+        self.assertEqual([m['role'] for m in messages], ['system', 'user', 'assistant', 'user'])
+        self.assertTrue(chat_api.acreate.call_args.kwargs['stream'])
+
+    async def test_tools_are_answered_before_the_reply_is_streamed(self, chat_api):
+        desk = await WorkSpace.objects.acreate(name='Quiet Desk', type='desk')
+        chat_api.acreate = mock.AsyncMock(side_effect=[
+            FakeStream([
+                {'tool_calls': [{'index': 0, 'id': 'call_1', 'function': {'name': 'find_available_workspaces',
+                                                                          'arguments': '{"type": '}}]},
+                {'tool_calls': [{'index': 0, 'function': {'arguments': '"desk"}'}}]},
+            ]),
+            FakeStream(['Quiet Desk', ' is free.']),
+        ])
+        body = await self.read(await self.post({'message': 'Any desks?'}))
+
+        self.assertIn('data: {"token": "Quiet Desk"}\n\n', body)
+        first, second = chat_api.acreate.call_args_list
+        self.assertEqual(first.kwargs['tool_choice'], 'auto')
+        self.assertIn('tools', first.kwargs)
+        messages = second.kwargs['messages']
+        self.assertEqual(messages[-2]['tool_calls'][0]['function'],
+                         {'name': 'find_available_workspaces', 'arguments': '{"type": "desk"}'})
+        self.assertEqual(messages[-1]['tool_call_id'], 'call_1')
+        self.assertEqual([w['id'] for w in json.loads(messages[-1]['content'])], [desk.id])
+
+    async def test_requires_authentication_and_message(self, chat_api):
+        response = await self.async_client.post('/api/ai/assistant/stream/', {'message': 'Hi'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        # A session cookie alone is not accepted, as the endpoint is CSRF exempt
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post('/api/ai/assistant/stream/', {'message': 'Hi'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(await Conversation.objects.aexists())
+        response = await self.post({'message': ''})
+        self.assertEqual(response.status_code, 400)
+
+
+def chat_reply(content=None, tool_calls=None):
+    message = {'role': 'assistant', 'content': content}
+    if tool_calls:
+        message['tool_calls'] = tool_calls
+    return mock.Mock(choices=[mock.Mock(message=message)])
+
+
+@override_settings(OPENAI_API_KEY='test-key')
+@mock.patch('openai.ChatCompletion', create=True)
+class ToolCallingAssistantTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.desk = WorkSpace.objects.create(name='Quiet Desk', type='desk')
+        WorkSpace.objects.create(name='Board Room', type='meeting', capacity=10)
+
+    def test_tool_results_are_sent_back_to_the_model(self, chat_api):
+        chat_api.create.side_effect = [
+            chat_reply(tool_calls=[
+                {'id': 'call_1', 'type': 'function',
+                 'function': {'name': 'find_available_workspaces', 'arguments': '{"type": "desk"}'}},
+                {'id': 'call_2', 'type': 'function',
+                 'function': {'name': 'suggest_available_times',
+                              'arguments': f'{{"workspace_id": {self.desk.id}, "date": "2030-01-07"}}'}},
+            ]),
+            chat_reply('Quiet Desk is free all day.'),
+        ]
+        self.assertEqual(AIBookingAssistant.process_chat_message('Any desks free?'), 'Quiet Desk is free all day.')
+        self.assertEqual(chat_api.create.call_count, 2)
+
+        messages = chat_api.create.call_args.kwargs['messages']
+        tool_messages = [m for m in messages if m['role'] == 'tool']
+        self.assertEqual([m['tool_call_id'] for m in tool_messages], ['call_1', 'call_2'])
+        self.assertEqual([w['name'] for w in json.loads(tool_messages[0]['content'])], ['Quiet Desk'])
+        self.assertTrue(json.loads(tool_messages[1]['content'])['available_slots'])
+
+    @override_settings(CHAT_MAX_TOOL_ROUNDS=2)
+    def test_model_must_answer_after_the_last_round(self, chat_api):
+        chat_api.create.side_effect = [
+            chat_reply(tool_calls=[{'id': 'call_1', 'type': 'function',
+                                    'function': {'name': 'unknown', 'arguments': '{}'}}]),
+            chat_reply('Sorry, I could not look that up.'),
+        ]
+        AIBookingAssistant.process_chat_message('Hi')
+        self.assertEqual([c.kwargs['tool_choice'] for c in chat_api.create.call_args_list], ['auto', 'none'])
+
+    @override_settings(CHAT_HISTORY_TOKEN_BUDGET=30)
+    def test_conversation_is_kept_on_the_server_within_budget(self, chat_api):
+        chat_api.create.return_value = chat_reply('Sure.')
+        self.client.force_login(self.user)
+        response = self.client.post('/api/ai/assistant/', {'message': 'x' * 120}, content_type='application/json')
+        conversation_id = response.json()['conversation_id']
+
+        response = self.client.post('/api/ai/assistant/', {'message': 'And tomorrow?', 'conversation_id': conversation_id},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['conversation_id'], conversation_id)
+        # The long first message no longer fits, the short reply to it does
+        sent = [m['content'] for m in chat_api.create.call_args.kwargs['messages'][1:]]
+        self.assertEqual(sent, ['Sure.', 'And tomorrow?'])
+        self.assertEqual(Conversation.objects.get(id=conversation_id).messages.count(), 4)
+
+    def test_client_history_seeds_a_new_conversation(self, chat_api):
+        chat_api.create.return_value = chat_reply('Booked it.')
+        self.client.force_login(self.user)
+        history = [{'message': 'Is Quiet Desk free?', 'is_user': True},
+                   {'message': 'Yes, all afternoon.', 'is_user': False}]
+        with mock.patch.object(assistant_response_cache, 'get_or_create') as cached:
+            response = self.client.post('/api/ai/assistant/', {'message': 'Yes, that one', 'conversation_history': history},
+                                        content_type='application/json')
+        # A follow-up is answered in context, never from the cache of opening messages
+        cached.assert_not_called()
+        sent = [m['content'] for m in chat_api.create.call_args.kwargs['messages'][1:]]
+        self.assertEqual(sent, ['Is Quiet Desk free?', 'Yes, all afternoon.', 'Yes, that one'])
+
+        conversation = Conversation.objects.get(id=response.json()['conversation_id'])
+        self.assertEqual([m.content for m in conversation.messages.all()],
+                         ['Is Quiet Desk free?', 'Yes, all afternoon.', 'Yes, that one', 'Booked it.'])
+
+    def test_other_users_conversations_are_not_found(self, chat_api):
+        other = User.objects.create_user(email='other@example.com', password='testpass123',
+                                         first_name='Other', last_name='Member')
+        conversation = Conversation.objects.create(user=other)
+        self.client.force_login(self.user)
+        response = self.client.post('/api/ai/assistant/', {'message': 'Hi', 'conversation_id': conversation.id},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(OPENAI_API_KEY='test-key')
+@mock.patch('openai.ChatCompletion', create=True)
+class AssistantResponseCacheTests(TestCase):
+
+    def setUp(self):
+        assistant_response_cache.clear()
+        # A fresh catalog version, so nothing cached by other tests is seen
+        CatalogCache.bump_version()
+
+    def test_repeated_prompts_are_answered_once(self, chat_api):
+        chat_api.create.return_value = chat_reply('Pick a workspace and a time.')
+        self.assertEqual(AIBookingAssistant.process_chat_message('How do I book?'), 'Pick a workspace and a time.')
+        self.assertEqual(AIBookingAssistant.process_chat_message('  how do I BOOK '), 'Pick a workspace and a time.')
+        self.assertEqual(chat_api.create.call_count, 1)
+
+        # Follow-up questions depend on the conversation and are not cached
+        AIBookingAssistant.process_chat_message('How do I book?', [{'message': 'Hi', 'is_user': True}])
+        self.assertEqual(chat_api.create.call_count, 2)
+
+    def test_catalog_changes_invalidate_replies(self, chat_api):
+        chat_api.create.return_value = chat_reply('Desks cost 5 an hour.')
+        AIBookingAssistant.process_chat_message('What are the prices?')
+        with mock.patch('aibooking.signals.refresh_workspace_embeddings'), self.captureOnCommitCallbacks(execute=True):
+            WorkSpace.objects.create(name='Quiet Desk', type='desk', hourly_rate=7)
+        AIBookingAssistant.process_chat_message('What are the prices?')
+        self.assertEqual(chat_api.create.call_count, 2)
+
+    def test_replies_from_live_data_are_not_cached(self, chat_api):
+        chat_api.create.side_effect = lambda **kwargs: (
+            chat_reply('Quiet Desk is free.') if kwargs['messages'][-1]['role'] == 'tool' else
+            chat_reply(tool_calls=[{'id': 'call_1', 'type': 'function',
+                                    'function': {'name': 'find_available_workspaces', 'arguments': '{}'}}])
+        )
+        AIBookingAssistant.process_chat_message('Which desks are free?')
+        AIBookingAssistant.process_chat_message('Which desks are free?')
+        self.assertEqual(chat_api.create.call_count, 4)
+
+    def test_concurrent_identical_prompts_are_coalesced(self, chat_api):
+        cache = AssistantResponseCache()
+        release = threading.Event()
+
+        def generate(prompt):
+            release.wait(5)
+            return 'Pick a workspace and a time.', True
+        generate = mock.Mock(side_effect=generate)
+
+        replies = []
+        threads = [threading.Thread(target=lambda: replies.append(cache.get_or_create('How do I book?', generate)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(500):
+            if cache.coalesced == 3:
+                break
+            time_module.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        generate.assert_called_once()
+        self.assertEqual(replies, ['Pick a workspace and a time.'] * 4)
+
+    @override_settings(EMBEDDING_BACKEND=LOCAL_BACKEND)
+    def test_similar_prompts_share_a_reply(self, chat_api):
+        cache = AssistantResponseCache(similarity=0.75)
+        generate = mock.Mock(return_value=('Pick a workspace and a time.', True))
+        cache.get_or_create('How do I book a desk?', generate)
+        self.assertEqual(cache.get_or_create('How can I book a desk?', generate), 'Pick a workspace and a time.')
+        cache.get_or_create('What are the prices?', generate)
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(cache.stats()['similar_hits'], 1)
+
+
+class FindAvailableWorkspacesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.features = {name: Feature.objects.create(name=name)
+                        for name in ('Projector', 'Whiteboard', 'Speakerphone', 'Sofa')}
+        # A second feature with an existing name
+        cls.other_sofa = Feature.objects.create(name='sofa')
+        east = Location.objects.create(name='East Wing')
+        cls.board_room = WorkSpace.objects.create(name='Board Room', type='meeting', capacity=10, location=east)
+        cls.board_room.features.add(*[cls.features[name] for name in ('Projector', 'Whiteboard', 'Speakerphone')])
+        cls.huddle = WorkSpace.objects.create(name='Huddle Room', type='meeting', capacity=4, location=east)
+        cls.huddle.features.add(cls.features['Whiteboard'], cls.other_sofa)
+        cls.lounge = WorkSpace.objects.create(name='Lounge', type='collaboration', capacity=8)
+        cls.lounge.features.add(cls.features['Sofa'])
+
+    def names(self, **criteria):
+        return [w['name'] for w in AIBookingAssistant.find_available_workspaces(criteria)]
+
+    def test_all_features_are_required(self):
+        self.assertEqual(self.names(features=['whiteboard', 'PROJECTOR']), ['Board Room'])
+        self.assertEqual(self.names(features=['Whiteboard']), ['Board Room', 'Huddle Room'])
+        self.assertEqual(self.names(features=['Sofa']), ['Huddle Room', 'Lounge'])
+        self.assertEqual(self.names(features=['Sofa', 'Whiteboard']), ['Huddle Room'])
+        self.assertEqual(self.names(features=['Hot tub']), [])
+        self.assertEqual(self.names(type='meeting', capacity=5, location='east'), ['Board Room'])
+
+    def test_feature_ids_follow_changes(self):
+        self.board_room.features.remove(self.features['Projector'])
+        self.assertEqual(self.names(features=['Projector']), [])
+        self.features['Whiteboard'].delete()
+        self.board_room.refresh_from_db()
+        self.assertEqual(sorted(self.board_room.feature_ids), [self.features['Speakerphone'].id])
+
+    def test_query_count_does_not_grow_with_features(self):
+        for features in (['Whiteboard'], ['Whiteboard', 'Projector', 'Speakerphone']):
+            # Feature lookup, workspaces with locations, prefetched features
+            with self.assertNumQueries(3):
+                self.names(features=features)
+
+    def test_time_window_is_filtered_in_the_same_query(self):
+        start = timezone.make_aware(datetime(2030, 1, 7, 10))
+        Booking.objects.create(user=self.user, work_space=self.lounge,
+                               start_time=start, end_time=start + timedelta(hours=2))
+        window = {'date': '2030-01-07', 'start_time': '11:00', 'end_time': '12:00'}
+        self.assertEqual(self.names(**window), ['Board Room', 'Huddle Room'])
+        self.assertEqual(self.names(date='2030-01-07', start_time='12:00', end_time='13:00'),
+                         ['Board Room', 'Huddle Room', 'Lounge'])
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/ai/assistant/find-workspaces/', {'features': ['Projector']},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['features'], ['Projector', 'Whiteboard', 'Speakerphone'])
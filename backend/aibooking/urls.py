@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import WorkSpaceViewSet, AIAssistantView, AdminAIView, create_meeting
+from .views import WorkSpaceViewSet, AIAssistantView, FindWorkspacesView, AdminAIView, create_meeting, assistant_stream
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -7,7 +7,8 @@ router.register(r'workspaces', WorkSpaceViewSet, basename='workspace')
 
 urlpatterns = [
     path('assistant/', AIAssistantView.as_view(), name='ai_assistant'),
-    path('assistant/find-workspaces/', AIAssistantView.as_view(), name='find_workspaces'),
+    path('assistant/stream/', assistant_stream, name='ai_assistant_stream'),
+    path('assistant/find-workspaces/', FindWorkspacesView.as_view(), name='find_workspaces'),
     path('admin/', AdminAIView.as_view(), name='ai_admin'),
     path('meetings/create/', create_meeting, name='create_meeting'),
 ]
@@ -1,18 +1,27 @@
-from django.shortcuts import render
+import json
+from django.shortcuts import render, get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from booking.models import WorkSpace, Booking
 from booking.serializers import WorkSpaceSerializer, BookingSerializer
+from booking.catalog import CatalogCache
 from .ai_assistant_service import AIBookingAssistant
+from .models import Conversation
 from .embedding_service import EmbeddingService
+from .query_cache import query_embedding_cache
+from .response_cache import assistant_response_cache
 from rest_framework.decorators import api_view
 
 @api_view(['POST'])
@@ -21,14 +30,35 @@ def create_meeting(request):
     meeting_id = AIBookingAssistant.generate_unique_meeting_id()
     return Response({'meeting_id': meeting_id}, status=status.HTTP_201_CREATED)
 class WorkSpaceViewSet(viewsets.ModelViewSet):
-    queryset = WorkSpace.objects.all()
+    queryset = WorkSpaceSerializer.setup_eager_loading(WorkSpace.objects.all())
     serializer_class = WorkSpaceSerializer
     
+    def list(self, request, *args, **kwargs):
+        """Return all the workspaces from the shared catalog cache"""
+        def build_catalog():
+            serializer = self.get_serializer(self.get_queryset(), many=True)
+            return list(serializer.data)
+        
+        return CatalogCache.respond(request, 'workspaces', build_catalog)
+    
     @action(detail=False, methods=['post'])
     def search(self, request):
         """Search for workspaces using AI-powered similarity search"""
         query = request.data.get('query', '')
-        similar_spaces = AIBookingAssistant.find_similar_workspaces(query)
+        filters = {
+            key: request.data.get(key)
+            for key in ('type', 'capacity', 'location', 'features', 'date', 'start_time', 'end_time')
+        }
+        try:
+            limit = int(request.data.get('limit', 5))
+            if filters['capacity']:
+                filters['capacity'] = int(filters['capacity'])
+            similar_spaces = AIBookingAssistant.find_similar_workspaces(query, limit=limit, filters=filters)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid limit, capacity, date or time"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(similar_spaces)
     
     @action(detail=True, methods=['get'])
@@ -67,8 +97,38 @@ class WorkSpaceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        suggestions = AIBookingAssistant.suggest_available_times(pk, date, duration)
+        try:
+            granularity = int(request.query_params.get('granularity', 30))
+        except ValueError:
+            return Response(
+                {"error": "Granularity must be a whole number of minutes"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if duration <= 0 or granularity <= 0:
+            return Response(
+                {"error": "Duration and granularity must be positive"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        suggestions = AIBookingAssistant.suggest_available_times(pk, date, duration, granularity)
         return Response(suggestions)
+    
+    @action(detail=False, methods=['post'])
+    def find_slots(self, request):
+        """Find free time slots across every workspace matching the criteria"""
+        try:
+            limit = int(request.data.get('limit', 10))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Limit must be a number"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = AIBookingAssistant.find_available_slots(request.data, limit=limit)
+        if isinstance(results, dict) and 'error' in results:
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+        return Response(results)
 
 class AIAssistantView(APIView):
     """API view for interacting with the AI booking assistant"""
@@ -86,18 +146,104 @@ class AIAssistantView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        response = AIBookingAssistant.process_chat_message(message, conversation_history)
+        # Continue a stored conversation, or start one seeded by the client's history
+        conversation_id = request.data.get('conversation_id')
+        if conversation_id:
+            conversation = get_object_or_404(Conversation, id=conversation_id, user=request.user)
+            response = AIBookingAssistant.process_chat_message(message, conversation=conversation)
+        else:
+            conversation = Conversation.objects.create(user=request.user)
+            conversation.add_history(AIBookingAssistant.trim_history(conversation_history))
+            response = AIBookingAssistant.process_chat_message(message, conversation=conversation)
         return Response({
             "response": response,
+            "conversation_id": conversation.id,
             "timestamp": timezone.now().isoformat()
         })
 
-    def find_workspaces(self, request):
-        """Find available workspaces based on criteria"""
-        criteria = request.data
-        workspaces = AIBookingAssistant.find_available_workspaces(criteria)
+# Structured workspace finder
+class FindWorkspacesView(APIView):
+    """Find open workspaces by type, capacity, location, features and free time window"""
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            limit = min(int(request.data.get('limit', 5)), 50)
+        except (ValueError, TypeError):
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        workspaces = AIBookingAssistant.find_available_workspaces(request.data, limit=limit)
+        if isinstance(workspaces, dict):
+            return Response(workspaces, status=status.HTTP_400_BAD_REQUEST)
         return Response(workspaces)
 
+# Streaming assistant endpoint
+def _authenticate_jwt(request):
+    """The JWT user of the request (or None), the same check AIAssistantView makes"""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+async def assistant_stream(request):
+    """
+    Stream the assistant's reply as server-sent events while it is generated:
+    one ``data: {"token": ...}`` event per piece, then an ``event: done``
+    carrying the conversation id and timestamp. Being async, the view holds no worker thread
+    while the model is answering when the project is served over ASGI. Requires
+    a JWT ``Authorization: Bearer`` header.
+    """
+    # Bearer tokens only: the view is CSRF exempt, so a session cookie must
+    # not be enough to spend tokens and create conversations
+    user = await sync_to_async(_authenticate_jwt)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
+    message = data.get('message', '')
+    conversation_history = data.get('conversation_history', [])
+    if not message:
+        return JsonResponse({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    conversation_id = data.get('conversation_id')
+    if conversation_id:
+        conversation = await Conversation.objects.filter(id=conversation_id, user=user).afirst()
+        if conversation is None:
+            return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        conversation_history = await sync_to_async(conversation.recent_history)()
+    else:
+        conversation = await Conversation.objects.acreate(user=user)
+        conversation_history = AIBookingAssistant.trim_history(conversation_history)
+        await sync_to_async(conversation.add_history)(conversation_history)
+
+    async def events():
+        tokens = []
+        async for token in AIBookingAssistant.stream_chat_message(message, conversation_history):
+            tokens.append(token)
+            yield _sse_event({"token": token})
+        await sync_to_async(conversation.add_exchange)(message, ''.join(tokens))
+        yield _sse_event({"conversation_id": conversation.id, "timestamp": timezone.now().isoformat()}, event="done")
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 class AdminAIView(APIView):
     """Admin-only view for AI management tasks"""
     authentication_classes = [JWTAuthentication, SessionAuthentication]
@@ -119,6 +265,12 @@ class AdminAIView(APIView):
                 count = EmbeddingService.update_workspace_embeddings()
                 return Response({"updated_count": count})
             
+            if action == 'embedding_cache_stats':
+                return Response(query_embedding_cache.stats())
+            
+            if action == 'response_cache_stats':
+                return Response(assistant_response_cache.stats())
+            
             return Response(
                 {"error": "Invalid action"}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -9,6 +9,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework.views import APIView
 from booking.models import Booking
 from booking.serializers import BookingSerializer
+from booking.filters import BookingListMixin
 
 
 User = get_user_model()
@@ -161,9 +162,10 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
         # Non-admins can only see themselves
         return User.objects.filter(id=user.id)
 
-class UserBookingsView(generics.ListAPIView):
+class UserBookingsView(BookingListMixin, generics.ListAPIView):
     """
-    API endpoint that allows viewing all bookings for a specific user.
+    API endpoint that allows viewing all bookings for a specific user,
+    one cursor-paginated page at a time.
     """
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -172,5 +174,5 @@ class UserBookingsView(generics.ListAPIView):
         user_id = self.kwargs.get('pk')
         # Only allow admins to see other users' bookings
         if self.request.user.role == 'ADMIN' or self.request.user.is_superuser or str(self.request.user.id) == user_id:
-            return Booking.objects.filter(user_id=user_id)
+            return BookingSerializer.setup_eager_loading(Booking.objects.filter(user_id=user_id))
         return Booking.objects.none()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WorkSpace, Hub, Desk, MeetingRoom, Booking, Notification, Location, Feature
+from .models import WorkSpace, Hub, Desk, MeetingRoom, Booking, BookingSeries, Notification, Location, Feature
 
 @admin.register(WorkSpace)
 class WorkSpaceAdmin(admin.ModelAdmin):
@@ -13,19 +13,27 @@ class HubAdmin(admin.ModelAdmin):
     list_display = ('name', 'workspace', 'capacity',)
     search_fields = ('name', 'description')
 
+class BookableAdminMixin:
+    """Shows whether a desk or meeting room is free right now"""
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_availability()
+    
+    @admin.display(boolean=True, description='Available now')
+    def is_available(self, obj):
+        return obj.is_available
+
 @admin.register(Desk)
-class DeskAdmin(admin.ModelAdmin):
+class DeskAdmin(BookableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'hub', 'is_available', )
-    list_filter = ('is_available', 'hub')
+    list_filter = ('hub', )
     search_fields = ('name', 'description')
-    list_editable = ('is_available', )
 
 @admin.register(MeetingRoom)
-class MeetingRoomAdmin(admin.ModelAdmin):
+class MeetingRoomAdmin(BookableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'workspace', 'capacity', 'is_available', )
-    list_filter = ('is_available', 'workspace', 'capacity')
+    list_filter = ('workspace', 'capacity')
     search_fields = ('name', 'description')
-    list_editable = ('is_available', )
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -50,6 +58,14 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'work_space', 'desk', 'meeting_room', 'rrule', 'start_time', 'until', 'status')
+    list_filter = ('status', 'start_time')
+    search_fields = ('title', 'user__email', 'work_space__name')
+    readonly_fields = ('until', 'materialized_until', 'created_at')
+    raw_id_fields = ('user', 'work_space', 'desk', 'meeting_room')
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'type', 'title', 'read', 'created_at')
@@ -61,7 +77,7 @@ class NotificationAdmin(admin.ModelAdmin):
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    list_display = ('name', 'address')
+    list_display = ('name', 'address', 'opens_at', 'closes_at')
     search_fields = ('name', 'address')
     list_per_page = 20
 
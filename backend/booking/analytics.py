@@ -0,0 +1,159 @@
+from datetime import datetime, time
+
+import numpy as np
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import Desk, Location, MeetingRoom, OccupancyRollup
+
+DAYS = 7
+HOURS = 24
+
+
+def weekday_counts(start_date, end_date):
+    """How many Mondays, Tuesdays, ... Sundays fall in [start_date, end_date)"""
+    days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D')).astype(np.int64)
+    # Day 0 of the epoch (1970-01-01) was a Thursday
+    return np.bincount((days + 3) % DAYS, minlength=DAYS)
+
+
+def open_hours(location):
+    """(7, 24) array with the fraction of each hour of the week a location is open"""
+    if location is None:
+        opens_at, closes_at, open_days = Location.DEFAULT_OPENS_AT, Location.DEFAULT_CLOSES_AT, Location.ALL_DAYS
+    else:
+        opens_at, closes_at, open_days = location.opens_at, location.closes_at, location.open_days
+
+    opens = opens_at.hour + opens_at.minute / 60
+    closes = closes_at.hour + closes_at.minute / 60
+    hours = np.arange(HOURS)
+    fraction = np.clip(np.minimum(hours + 1, closes) - np.maximum(hours, opens), 0, 1)
+    days = np.array([str(day) in open_days for day in range(DAYS)])
+    return np.outer(days, fraction)
+
+
+class OccupancyReport:
+    """
+    Utilization of a set of workspaces between two dates.
+
+    The rollups are summed per workspace and hour of the week by the
+    database, so at most workspaces x 168 rows are read whatever the length
+    of the range. Everything else is computed with NumPy on a
+    (workspaces, 7, 24) cube of booked seconds.
+
+    Utilization is booked time divided by the time the workspace's desks and
+    meeting rooms (at least one unit per workspace) are open for booking.
+    """
+
+    def __init__(self, workspaces, start_date, end_date):
+        self.workspaces = list(workspaces)
+        self.start_date = start_date
+        self.end_date = end_date
+
+        ids = np.array([workspace.id for workspace in self.workspaces], dtype=np.int64)
+        self._order = np.argsort(ids)
+        self._sorted_ids = ids[self._order]
+
+        self.booked = self._booked_seconds()
+        self.available = self._available_seconds()
+
+    def _positions(self, workspace_ids):
+        """Row of each workspace id in the cube"""
+        return self._order[np.searchsorted(self._sorted_ids, workspace_ids)]
+
+    def _booked_seconds(self):
+        tz = timezone.get_current_timezone()
+        rows = list(
+            OccupancyRollup.objects.filter(
+                workspace__in=self._sorted_ids.tolist(),
+                bucket__gte=timezone.make_aware(datetime.combine(self.start_date, time.min), tz),
+                bucket__lt=timezone.make_aware(datetime.combine(self.end_date, time.min), tz)
+            )
+            .annotate(weekday=ExtractIsoWeekDay('bucket'), hour=ExtractHour('bucket'))
+            .values('workspace_id', 'weekday', 'hour')
+            .annotate(seconds=Sum('booked_seconds'))
+            .order_by()
+            .values_list('workspace_id', 'weekday', 'hour', 'seconds')
+        )
+
+        booked = np.zeros((len(self.workspaces), DAYS, HOURS))
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            np.add.at(booked, (self._positions(rows[:, 0]), rows[:, 1] - 1, rows[:, 2]), rows[:, 3])
+        return booked
+
+    def _resource_counts(self):
+        units = np.zeros(len(self.workspaces), dtype=np.int64)
+        ids = self._sorted_ids.tolist()
+        for queryset, field in (
+                (Desk.objects.filter(hub__workspace__in=ids), 'hub__workspace'),
+                (MeetingRoom.objects.filter(workspace__in=ids), 'workspace')):
+            counts = list(queryset.values(field).annotate(count=Count('id')).order_by().values_list(field, 'count'))
+            if counts:
+                counts = np.array(counts, dtype=np.int64)
+                np.add.at(units, self._positions(counts[:, 0]), counts[:, 1])
+        return np.maximum(units, 1)
+
+    def _available_seconds(self):
+        hours_per_week = {}
+        weekly = np.empty((len(self.workspaces), DAYS, HOURS))
+        for row, workspace in enumerate(self.workspaces):
+            if workspace.location_id not in hours_per_week:
+                hours_per_week[workspace.location_id] = open_hours(workspace.location)
+            weekly[row] = hours_per_week[workspace.location_id]
+
+        weeks = weekday_counts(self.start_date, self.end_date)[None, :, None]
+        return weekly * weeks * 3600 * self._resource_counts()[:, None, None]
+
+    @staticmethod
+    def _utilization(booked, available):
+        return np.divide(booked, available, out=np.zeros_like(booked), where=available > 0)
+
+    def heatmap(self):
+        """Booked minutes and utilization per hour of the week, Monday first"""
+        booked = self.booked.sum(axis=0)
+        return {
+            'booked_minutes': np.round(booked / 60, 1).tolist(),
+            'utilization': np.round(self._utilization(booked, self.available.sum(axis=0)), 4).tolist(),
+        }
+
+    def _summary(self, booked, available):
+        return {
+            'booked_minutes': round(float(booked) / 60, 1),
+            'available_minutes': round(float(available) / 60, 1),
+            'utilization': round(float(booked / available) if available else 0.0, 4),
+        }
+
+    def by_workspace(self):
+        booked = self.booked.sum(axis=(1, 2))
+        available = self.available.sum(axis=(1, 2))
+        return [
+            {
+                'id': workspace.id,
+                'name': workspace.name,
+                'location': workspace.location.name if workspace.location else None,
+                **self._summary(booked[row], available[row]),
+            }
+            for row, workspace in enumerate(self.workspaces)
+        ]
+
+    def by_location(self):
+        locations = {}
+        for workspace in self.workspaces:
+            locations.setdefault(workspace.location_id, workspace.location)
+        position = {location_id: i for i, location_id in enumerate(locations)}
+        rows = np.array([position[workspace.location_id] for workspace in self.workspaces], dtype=np.int64)
+
+        booked = np.zeros(len(locations))
+        available = np.zeros(len(locations))
+        np.add.at(booked, rows, self.booked.sum(axis=(1, 2)))
+        np.add.at(available, rows, self.available.sum(axis=(1, 2)))
+        return [
+            {
+                'id': location_id,
+                'name': location.name if location else None,
+                **self._summary(booked[i], available[i]),
+            }
+            for i, (location_id, location) in enumerate(locations.items())
+        ]
@@ -0,0 +1,204 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .models import Booking, BookingSeries, Desk, MeetingRoom
+
+
+class AvailabilityIndex:
+    """
+    In-memory interval index over the active (not cancelled) bookings of one
+    workspace.
+
+    All bookings touching the workspace inside the requested window are
+    loaded with a single query and grouped per desk and per meeting room,
+    so availability questions for any number of resources are answered
+    without going back to the database.
+    """
+
+    DESK = 'desk'
+    MEETING_ROOM = 'meeting_room'
+    WORKSPACE = 'workspace'
+
+    def __init__(self, workspace, start_time, end_time, bookings, desk_ids=None, meeting_room_ids=None):
+        self.workspace = workspace
+        self.start_time = start_time
+        self.end_time = end_time
+        # Occurrences of a series that are not materialized yet have no id
+        self.bookings = sorted(bookings, key=lambda b: (b.start_time, b.id or 0))
+        self.desk_ids = list(desk_ids or [])
+        self.meeting_room_ids = list(meeting_room_ids or [])
+
+        # Bookings per resource, sorted by start time, with a parallel list
+        # of start times for bisecting
+        self._intervals = defaultdict(list)
+        for booking in self.bookings:
+            self._intervals[self._key_for_booking(booking)].append(booking)
+        self._starts = {
+            key: [b.start_time for b in bookings]
+            for key, bookings in self._intervals.items()
+        }
+
+    @classmethod
+    def for_workspace(cls, workspace, start_time, end_time):
+        """Build the index for a workspace and time window"""
+        desk_ids = Desk.objects.filter(hub__workspace=workspace).values_list('id', flat=True)
+        meeting_room_ids = MeetingRoom.objects.filter(workspace=workspace).values_list('id', flat=True)
+
+        bookings = Booking.objects.filter(
+            Q(work_space=workspace) | Q(desk__hub__workspace=workspace) | Q(meeting_room__workspace=workspace),
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        ).exclude(status='cancelled').select_related('user', 'work_space')
+
+        series_list = BookingSeries.objects.overlapping(start_time, end_time).filter(
+            Q(work_space=workspace) | Q(desk__hub__workspace=workspace) | Q(meeting_room__workspace=workspace)
+        ).select_related('user', 'work_space')
+
+        return cls(
+            workspace, start_time, end_time,
+            cls._with_series_occurrences(bookings, series_list, start_time, end_time),
+            desk_ids, meeting_room_ids
+        )
+
+    @classmethod
+    def for_resource(cls, start_time, end_time, desk=None, meeting_room=None):
+        """Build the index for a single desk or meeting room and time window"""
+        resource = Q(desk=desk) if desk else Q(meeting_room=meeting_room)
+        bookings = Booking.objects.filter(
+            resource,
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        ).exclude(status='cancelled')
+        series_list = BookingSeries.objects.overlapping(start_time, end_time).for_resource(desk, meeting_room)
+
+        return cls(None, start_time, end_time,
+                   cls._with_series_occurrences(bookings, series_list, start_time, end_time))
+
+    @classmethod
+    def for_resources(cls, start_time, end_time, desk_ids=(), meeting_room_ids=()):
+        """Build the index for a set of desks and meeting rooms and time window"""
+        resources = Q(desk__in=desk_ids) | Q(meeting_room__in=meeting_room_ids)
+        bookings = Booking.objects.filter(
+            resources,
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        ).exclude(status='cancelled')
+        series_list = BookingSeries.objects.overlapping(start_time, end_time).filter(resources)
+
+        return cls(None, start_time, end_time,
+                   cls._with_series_occurrences(bookings, series_list, start_time, end_time),
+                   desk_ids, meeting_room_ids)
+
+    @staticmethod
+    def _with_series_occurrences(bookings, series_list, start_time, end_time):
+        """Bookings plus the pending occurrences of each series in the window"""
+        bookings = list(bookings)
+        for series in series_list:
+            bookings.extend(series.virtual_bookings(start_time, end_time))
+        return bookings
+
+    @classmethod
+    def _key_for_booking(cls, booking):
+        if booking.desk_id:
+            return (cls.DESK, booking.desk_id)
+        if booking.meeting_room_id:
+            return (cls.MEETING_ROOM, booking.meeting_room_id)
+        return (cls.WORKSPACE, booking.work_space_id)
+
+    def add(self, booking):
+        """Add a booking to the index, e.g. one accepted earlier in the same batch"""
+        key = self._key_for_booking(booking)
+        starts = self._starts.setdefault(key, [])
+        position = bisect_right(starts, booking.start_time)
+        starts.insert(position, booking.start_time)
+        self._intervals[key].insert(position, booking)
+        position = bisect_right(self.bookings, booking.start_time, key=lambda b: b.start_time)
+        self.bookings.insert(position, booking)
+
+    def _window(self, start_time, end_time):
+        return (start_time or self.start_time, end_time or self.end_time)
+
+    def _overlapping(self, key, start_time, end_time):
+        """Bookings of a single resource overlapping [start_time, end_time)"""
+        intervals = self._intervals.get(key)
+        if not intervals:
+            return []
+        # Nothing starting at or after end_time can overlap
+        cutoff = bisect_left(self._starts[key], end_time)
+        return [b for b in intervals[:cutoff] if b.end_time > start_time]
+
+    def conflicts(self, desk=None, meeting_room=None, start_time=None, end_time=None):
+        """
+        Return the bookings overlapping the window.
+
+        When a desk or meeting room id is given only that resource is
+        considered, otherwise every booking in the workspace is returned.
+        """
+        start_time, end_time = self._window(start_time, end_time)
+
+        if desk is not None:
+            return self._overlapping((self.DESK, desk), start_time, end_time)
+        if meeting_room is not None:
+            return self._overlapping((self.MEETING_ROOM, meeting_room), start_time, end_time)
+
+        return [
+            b for b in self.bookings
+            if b.start_time < end_time and b.end_time > start_time
+        ]
+
+    def is_free(self, desk=None, meeting_room=None, start_time=None, end_time=None):
+        """Whether the resource (or the whole workspace) has no conflicting bookings"""
+        return not self.conflicts(desk, meeting_room, start_time, end_time)
+
+    def desk_conflicts(self, start_time=None, end_time=None):
+        """All bookings on desks of the workspace overlapping the window"""
+        start_time, end_time = self._window(start_time, end_time)
+        return [
+            b for b in self.bookings
+            if b.desk_id and b.start_time < end_time and b.end_time > start_time
+        ]
+
+    def meeting_room_conflicts(self, start_time=None, end_time=None):
+        """All bookings on meeting rooms of the workspace overlapping the window"""
+        start_time, end_time = self._window(start_time, end_time)
+        return [
+            b for b in self.bookings
+            if b.meeting_room_id and b.start_time < end_time and b.end_time > start_time
+        ]
+
+    def free_desks(self, start_time=None, end_time=None):
+        """Ids of the desks with no conflicting booking in the window"""
+        return [
+            desk_id for desk_id in self.desk_ids
+            if self.is_free(desk=desk_id, start_time=start_time, end_time=end_time)
+        ]
+
+    def free_meeting_rooms(self, start_time=None, end_time=None):
+        """Ids of the meeting rooms with no conflicting booking in the window"""
+        return [
+            room_id for room_id in self.meeting_room_ids
+            if self.is_free(meeting_room=room_id, start_time=start_time, end_time=end_time)
+        ]
+
+
+def find_series_conflicts(series, until):
+    """
+    Start times of the occurrences of an (unsaved) series that clash with
+    existing bookings or other series on the same desk or meeting room.
+    Occurrences are only expanded up to ``until``.
+    """
+    if not (series.desk_id or series.meeting_room_id):
+        return []
+
+    span_end = min(series.until, until) if series.until else until
+    index = AvailabilityIndex.for_resource(
+        series.start_time, span_end, desk=series.desk_id, meeting_room=series.meeting_room_id
+    )
+    return [
+        occurrence_start
+        for occurrence_start, occurrence_end in series.occurrences(series.start_time, span_end)
+        if not index.is_free(desk=series.desk_id, meeting_room=series.meeting_room_id,
+                             start_time=occurrence_start, end_time=occurrence_end)
+    ]
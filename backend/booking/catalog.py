@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """
+    Cache of the serialized workspace catalog (workspaces with their
+    location and features, hubs).
+
+    Every entry is stored under the current catalog version, which is bumped
+    whenever a catalog model is saved or deleted, so stale entries are never
+    read again and simply expire. Entries carry an ETag derived from their
+    content so clients can revalidate with If-None-Match.
+    """
+    VERSION_KEY = 'catalog:version'
+
+    @staticmethod
+    def get_cache():
+        return caches[settings.CATALOG_CACHE_ALIAS]
+
+    @classmethod
+    def get_version(cls):
+        cache = cls.get_cache()
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, 1, timeout=None)
+            version = cache.get(cls.VERSION_KEY, 1)
+        return version
+
+    @classmethod
+    def bump_version(cls):
+        """Invalidate every cached catalog entry"""
+        cache = cls.get_cache()
+        try:
+            return cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            # No version yet (or it was evicted): start a fresh one
+            cache.set(cls.VERSION_KEY, 1, timeout=None)
+            return 1
+        except Exception as e:
+            logger.error(f"Error bumping catalog cache version: {str(e)}")
+
+    @classmethod
+    def get_or_build(cls, name, builder):
+        """Return the cached ``{'data', 'etag'}`` entry for name, building it on a miss"""
+        cache = cls.get_cache()
+        key = f'catalog:{cls.get_version()}:{name}'
+
+        entry = cache.get(key)
+        if entry is None:
+            data = builder()
+            content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+            entry = {
+                'data': data,
+                'etag': '"%s"' % hashlib.md5(content.encode('utf-8')).hexdigest(),
+            }
+            cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+        return entry
+
+    @classmethod
+    def respond(cls, request, name, builder):
+        """
+        Build a Response for a catalog entry, answering 304 Not Modified when
+        the client already holds the current version.
+        """
+        entry = cls.get_or_build(name, builder)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and entry['etag'] in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'])
+
+        response['ETag'] = entry['etag']
+        # Clients may keep the catalog but must revalidate it every time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
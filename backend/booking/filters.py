@@ -0,0 +1,47 @@
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking
+from .pagination import BookingCursorPagination
+
+
+class BookingListMixin:
+    """
+    Cursor pagination plus ``when`` (upcoming/past) and ``status`` filters
+    for booking list views. Both filters are expressed on start_time so every
+    page stays a range scan over the (user, start_time, id) indexes.
+    """
+    pagination_class = BookingCursorPagination
+    when_choices = ('upcoming', 'past')
+
+    def get_when(self):
+        when = self.request.query_params.get('when')
+        if when and when not in self.when_choices:
+            raise ValidationError({'when': [f"Must be one of: {', '.join(self.when_choices)}"]})
+        return when
+
+    def get_status(self):
+        status = self.request.query_params.get('status')
+        if status and status not in dict(Booking.STATUS_CHOICES):
+            raise ValidationError({'status': [f"Must be one of: {', '.join(dict(Booking.STATUS_CHOICES))}"]})
+        return status
+
+    @property
+    def descending(self):
+        # Past bookings are listed most recent first
+        return self.get_when() == 'past'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        when = self.get_when()
+        if when == 'upcoming':
+            queryset = queryset.filter(start_time__gte=timezone.now())
+        elif when == 'past':
+            queryset = queryset.filter(start_time__lt=timezone.now())
+
+        status = self.get_status()
+        if status:
+            queryset = queryset.filter(status=status)
+
+        return queryset
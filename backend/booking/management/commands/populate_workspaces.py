@@ -79,8 +79,7 @@ class Command(BaseCommand):
         # Create the desk
         Desk.objects.create(
             name='101',
-            hub=hubs['east_wing_hub'],
-            is_available=True
+            hub=hubs['east_wing_hub']
         )
         
         # Desk 102
@@ -96,8 +95,7 @@ class Command(BaseCommand):
         # Create the desk
         Desk.objects.create(
             name='102',
-            hub=hubs['east_wing_hub'],
-            is_available=True
+            hub=hubs['east_wing_hub']
         )
         
         # Quiet Zone Desk 5
@@ -113,8 +111,7 @@ class Command(BaseCommand):
         # Create the desk
         Desk.objects.create(
             name='Quiet 5',
-            hub=hubs['west_wing_hub'],
-            is_available=True
+            hub=hubs['west_wing_hub']
         )
         
         # Create Meeting Rooms
@@ -134,8 +131,7 @@ class Command(BaseCommand):
             name='Meeting Room A',
             workspace=meeting_room_a,
             location=locations['north_wing'],
-            capacity=8,
-            is_available=True
+            capacity=8
         )
         
         # Conference Room B
@@ -152,8 +148,7 @@ class Command(BaseCommand):
             name='Conference Room B',
             workspace=conference_room_b,
             location=locations['north_wing'],
-            capacity=12,
-            is_available=True
+            capacity=12
         )
         
         # Event Hall
@@ -170,8 +165,7 @@ class Command(BaseCommand):
             name='Event Hall',
             workspace=event_hall,
             location=locations['south_wing'],
-            capacity=50,
-            is_available=True
+            capacity=50
         )
         
         # Collaboration Space
@@ -188,8 +182,7 @@ class Command(BaseCommand):
             name='Collaboration Space',
             workspace=collab_space,
             location=locations['central_area'],
-            capacity=15,
-            is_available=True
+            capacity=15
         )
         
         # Phone Booths
@@ -206,8 +199,7 @@ class Command(BaseCommand):
             name='Phone Booth 1',
             workspace=phone_booth_1,
             location=locations['east_wing'],
-            capacity=1,
-            is_available=False  # Already booked
+            capacity=1
         )
         
         phone_booth_3 = WorkSpace.objects.create(
@@ -223,8 +215,7 @@ class Command(BaseCommand):
             name='Phone Booth 3',
             workspace=phone_booth_3,
             location=locations['west_wing'],
-            capacity=1,
-            is_available=False  # Already booked
+            capacity=1
         )
         
         self.stdout.write(self.style.SUCCESS('Successfully populated the database with workspaces'))
\ No newline at end of file
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from booking.models import Booking, OccupancyRollup
+
+class Command(BaseCommand):
+    help = 'Rebuilds the occupancy rollups from the booking table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Number of bookings added to the rollups per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('Rebuilding occupancy rollups...')
+
+        bookings = Booking.objects.exclude(status='cancelled').filter(
+            work_space__isnull=False
+        ).only('work_space_id', 'start_time', 'end_time', 'status')
+
+        total = 0
+        with transaction.atomic():
+            OccupancyRollup.objects.all().delete()
+            batch = []
+            for booking in bookings.iterator(chunk_size=batch_size):
+                batch.append(booking)
+                if len(batch) == batch_size:
+                    OccupancyRollup.objects.record(batch)
+                    total += len(batch)
+                    batch = []
+            OccupancyRollup.objects.record(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Added {total} bookings to the occupancy rollups'))
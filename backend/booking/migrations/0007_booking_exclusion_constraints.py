@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:48
+
+import booking.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_workspace_embedding'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Needed for the '=' operator on the desk / meeting room columns in GiST
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('desk__isnull', False), models.Q(('status', 'cancelled'), _negated=True)), expressions=[('desk', '='), (booking.models.TsTzRange('start_time', 'end_time'), '&&')], name='booking_desk_no_overlap', violation_error_message='This space is already booked for the selected time range.'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('meeting_room__isnull', False), models.Q(('status', 'cancelled'), _negated=True)), expressions=[('meeting_room', '='), (booking.models.TsTzRange('start_time', 'end_time'), '&&')], name='booking_meeting_room_no_overlap', violation_error_message='This space is already booked for the selected time range.'),
+        ),
+    ]
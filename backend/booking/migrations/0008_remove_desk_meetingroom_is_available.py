@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_booking_exclusion_constraints'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='desk',
+            name='is_available',
+        ),
+        migrations.RemoveField(
+            model_name='meetingroom',
+            name='is_available',
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_remove_desk_meetingroom_is_available'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(blank=True, max_length=200, null=True)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('rrule', models.CharField(max_length=500)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('materialized_until', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('cancelled', 'Cancelled')], default='active', max_length=20)),
+                ('attendees', models.JSONField(blank=True, default=list, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('desk', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='booking.desk')),
+                ('meeting_room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='booking.meetingroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to=settings.AUTH_USER_MODEL)),
+                ('work_space', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='booking.workspace')),
+            ],
+            options={
+                'verbose_name_plural': 'booking series',
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='booking.bookingseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('series', 'start_time'), name='booking_series_occurrence_unique'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:58
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_booking_user_start_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='closes_at',
+            field=models.TimeField(default=datetime.time(18, 0)),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='open_days',
+            field=models.CharField(default='0123456', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='opens_at',
+            field=models.TimeField(default=datetime.time(8, 0)),
+        ),
+    ]
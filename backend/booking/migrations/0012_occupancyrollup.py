@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_location_business_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('booked_seconds', models.BigIntegerField(default=0)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_rollups', to='booking.workspace')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='occupancy_rollup_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('workspace', 'bucket'), name='occupancy_rollup_bucket_unique')],
+            },
+        ),
+    ]
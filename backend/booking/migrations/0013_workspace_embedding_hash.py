@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0012_occupancyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='embedding_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:07
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('booking', '0013_workspace_embedding_hash'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='workspace',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='workspace_embedding_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
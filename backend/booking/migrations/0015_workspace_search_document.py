@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+
+def build_search_documents(apps, schema_editor):
+    # Same as WorkSpaceQuerySet.update_search_documents()
+    WorkSpace = apps.get_model('booking', 'WorkSpace')
+    Feature = apps.get_model('booking', 'Feature')
+    Location = apps.get_model('booking', 'Location')
+
+    features = Feature.objects.filter(workspaces=OuterRef('pk')).values('workspaces').annotate(
+        names=StringAgg('name', ' ')
+    ).values('names')
+    location = Location.objects.filter(pk=OuterRef('location_id')).values('name')
+    WorkSpace.objects.update(search_document=(
+        SearchVector('name', weight='A', config='english')
+        + SearchVector(Coalesce(Subquery(features), Value(''), output_field=TextField()), weight='B', config='english')
+        + SearchVector(Coalesce(Subquery(location), Value(''), output_field=TextField()), weight='B', config='english')
+        + SearchVector('type', 'description', weight='C', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_workspace_embedding_hnsw_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='workspace',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='workspace_search_document_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:35
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def build_feature_ids(apps, schema_editor):
+    # Same as WorkSpaceQuerySet.update_feature_ids()
+    WorkSpace = apps.get_model('booking', 'WorkSpace')
+
+    feature_ids = WorkSpace.features.through.objects.filter(workspace=OuterRef('pk')).values('workspace').annotate(
+        ids=ArrayAgg('feature_id', ordering='feature_id')
+    ).values('ids')
+    WorkSpace.objects.update(feature_ids=Coalesce(Subquery(feature_ids), Value([]),
+                                                  output_field=ArrayField(models.IntegerField())))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0015_workspace_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='feature_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunPython(build_feature_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='workspace',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['feature_ids'], name='workspace_feature_ids_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0017_booking_reminder_sent_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
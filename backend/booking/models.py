@@ -1,16 +1,87 @@
-from django.db import models
+import logging
+from django.db import models, connections, transaction, IntegrityError
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.fields import ArrayField, DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
 from django.utils import timezone
-from django.db.models import Q
-from pgvector.django import VectorField
+from collections import defaultdict
+from datetime import time, timedelta, timezone as dt_timezone
+from django.db.models import F, Q, Func, Exists, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from pgvector.django import HnswIndex, VectorField
+from dateutil.rrule import rrulestr
 
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# PostgreSQL error code raised when an exclusion constraint is violated
+EXCLUSION_VIOLATION = '23P01'
+BOOKING_CONFLICT_MESSAGE = "This space is already booked for the selected time range."
+
+# Text search configuration of the workspace search documents
+SEARCH_CONFIG = 'english'
+
+class TsTzRange(Func):
+    """tstzrange(start, end) with the default [start, end) bounds"""
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+class BookableQuerySet(models.QuerySet):
+    """Availability derived from booking intervals for desks and meeting rooms"""
+    booking_field = None
+    
+    def with_availability(self, start_time=None, end_time=None):
+        """
+        Annotate ``is_available``: True when no active booking overlaps the
+        window. Without a window the resource is checked for right now.
+        """
+        start_time = start_time or timezone.now()
+        if end_time and end_time > start_time:
+            window = DateTimeTZRange(start_time, end_time, '[)')
+        else:
+            window = DateTimeTZRange(start_time, start_time, '[]')
+        
+        # Same predicate as the exclusion constraints, so the lookup is
+        # served from their GiST index
+        overlapping = Booking.objects.alias(
+            period=TsTzRange('start_time', 'end_time')
+        ).filter(
+            **{self.booking_field: OuterRef('pk')},
+            period__overlap=window
+        ).exclude(status='cancelled')
+        
+        return self.annotate(is_available=~Exists(overlapping))
+
+class DeskQuerySet(BookableQuerySet):
+    booking_field = 'desk'
+
+class MeetingRoomQuerySet(BookableQuerySet):
+    booking_field = 'meeting_room'
+
+class BookableMixin:
+    def is_free(self, start_time=None, end_time=None):
+        """Whether this resource has no active booking in the window (default: now)"""
+        return type(self).objects.filter(pk=self.pk).with_availability(
+            start_time, end_time
+        ).values_list('is_available', flat=True).get()
 
 class Location(models.Model):
+    DEFAULT_OPENS_AT = time(8, 0)
+    DEFAULT_CLOSES_AT = time(18, 0)
+    ALL_DAYS = '0123456'
+    
     name = models.CharField(max_length=100)
     address = models.TextField(blank=True, null=True)
+    # Business hours in the project time zone, on the listed weekdays (Monday is 0)
+    opens_at = models.TimeField(default=DEFAULT_OPENS_AT)
+    closes_at = models.TimeField(default=DEFAULT_CLOSES_AT)
+    open_days = models.CharField(max_length=7, default=ALL_DAYS)
     
     def __str__(self):
         return self.name
@@ -22,6 +93,88 @@ class Feature(models.Model):
     def __str__(self):
         return self.name
 
+class WorkSpaceQuerySet(models.QuerySet):
+    def matching(self, workspace_type=None, capacity=None, location=None, features=None):
+        """Filter on type, minimum capacity, location name and required feature names"""
+        workspaces = self
+        if workspace_type:
+            workspaces = workspaces.filter(type=workspace_type)
+        if capacity:
+            workspaces = workspaces.filter(capacity__gte=capacity)
+        if location:
+            workspaces = workspaces.filter(location__name__icontains=location)
+        if features:
+            workspaces = workspaces.with_features(features)
+        return workspaces
+    
+    def with_features(self, names):
+        """
+        Workspaces having every named feature (case-insensitive), matched
+        with a single containment test on the GIN-indexed ``feature_ids``
+        """
+        wanted = {name.lower() for name in names}
+        ids_by_name = defaultdict(list)
+        lookup = Q()
+        for name in wanted:
+            lookup |= Q(name__iexact=name)
+        for feature_id, name in Feature.objects.filter(lookup).values_list('id', 'name'):
+            ids_by_name[name.lower()].append(feature_id)
+        if len(ids_by_name) < len(wanted):
+            # Some feature does not exist at all
+            return self.none()
+        
+        required = [ids[0] for ids in ids_by_name.values() if len(ids) == 1]
+        workspaces = self.filter(feature_ids__contains=required) if required else self
+        # Several features sharing a name: any one of them will do
+        for ids in ids_by_name.values():
+            if len(ids) > 1:
+                workspaces = workspaces.filter(feature_ids__overlap=ids)
+        return workspaces
+    
+    def free_between(self, start_time, end_time):
+        """
+        Workspaces with at least one desk or meeting room free for the whole
+        window, or, for workspaces without any, no booking of their own.
+        """
+        workspace = OuterRef('pk')
+        free_desks = Desk.objects.with_availability(start_time, end_time).filter(
+            hub__workspace=workspace, is_available=True)
+        free_rooms = MeetingRoom.objects.with_availability(start_time, end_time).filter(
+            workspace=workspace, is_available=True)
+        has_resources = (Exists(Desk.objects.filter(hub__workspace=workspace))
+                         | Exists(MeetingRoom.objects.filter(workspace=workspace)))
+        own_bookings = Booking.objects.filter(
+            work_space=workspace, desk__isnull=True, meeting_room__isnull=True,
+            start_time__lt=end_time, end_time__gt=start_time
+        ).exclude(status='cancelled')
+        
+        return self.filter(Exists(free_desks) | Exists(free_rooms) | (~has_resources & ~Exists(own_bookings)))
+    
+    def update_feature_ids(self):
+        """Recompute the ``feature_ids`` of every workspace in the queryset with one UPDATE"""
+        feature_ids = WorkSpace.features.through.objects.filter(workspace=OuterRef('pk')).values('workspace').annotate(
+            ids=ArrayAgg('feature_id', ordering='feature_id')
+        ).values('ids')
+        return self.update(feature_ids=Coalesce(Subquery(feature_ids), Value([]),
+                                                output_field=ArrayField(models.IntegerField())))
+    
+    def update_search_documents(self):
+        """
+        Recompute the full-text search document of every workspace in the
+        queryset with one UPDATE: name (weight A), features and location (B),
+        type and description (C).
+        """
+        features = Feature.objects.filter(workspaces=OuterRef('pk')).values('workspaces').annotate(
+            names=StringAgg('name', ' ')
+        ).values('names')
+        location = Location.objects.filter(pk=OuterRef('location_id')).values('name')
+        return self.update(search_document=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Coalesce(Subquery(features), Value(''), output_field=TextField()), weight='B', config=SEARCH_CONFIG)
+            + SearchVector(Coalesce(Subquery(location), Value(''), output_field=TextField()), weight='B', config=SEARCH_CONFIG)
+            + SearchVector('type', 'description', weight='C', config=SEARCH_CONFIG)
+        ))
+
 class WorkSpace(models.Model):
     WORKSPACE_TYPES = (
         ('desk', 'Desk'),
@@ -41,6 +194,28 @@ class WorkSpace(models.Model):
     features = models.ManyToManyField(Feature, related_name='workspaces', blank=True)
     hourly_rate = models.DecimalField(max_digits=6, decimal_places=2, default=5.00)
     embedding = VectorField(dimensions=1536, null=True, blank=True)
+    # Hash of the text the embedding was generated from
+    embedding_hash = models.CharField(max_length=64, null=True, blank=True)
+    # Maintained by WorkSpaceQuerySet.update_search_documents()
+    search_document = SearchVectorField(null=True, editable=False)
+    # Ids of the workspace's features, kept by WorkSpaceQuerySet.update_feature_ids()
+    feature_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    
+    objects = WorkSpaceQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Approximate nearest neighbour index for similarity search
+            HnswIndex(
+                name='workspace_embedding_hnsw_idx',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+            GinIndex(fields=['search_document'], name='workspace_search_document_idx'),
+            GinIndex(fields=['feature_ids'], name='workspace_feature_ids_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_type_display()})"
@@ -53,23 +228,45 @@ class Hub(models.Model):
     def __str__(self):
         return f"{self.name} in {self.workspace.name}"
 
-class Desk(models.Model):
+class Desk(BookableMixin, models.Model):
     name = models.CharField(max_length=100)
     hub = models.ForeignKey(Hub, on_delete=models.CASCADE, related_name='desks')
-    is_available = models.BooleanField(default=True)
+    
+    objects = DeskQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} in {self.hub.name}"
 
-class MeetingRoom(models.Model):
+class MeetingRoom(BookableMixin, models.Model):
     name = models.CharField(max_length=100)
     workspace = models.ForeignKey(WorkSpace, on_delete=models.CASCADE, related_name='meeting_rooms')
     capacity = models.IntegerField(default=0)
-    is_available = models.BooleanField(default=True)
+    
+    objects = MeetingRoomQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} in {self.workspace.name}"
 
+class BookingQuerySet(models.QuerySet):
+    def reminders_due(self, now, offsets):
+        """
+        Confirmed, upcoming bookings with a reminder window (``start_time -
+        offset``) that has opened since their last reminder, unless a failed
+        reminder is waiting to be retried. Windows that were already open
+        when the booking was made are skipped.
+        """
+        due = Q()
+        for offset in offsets:
+            opens_at = F('start_time') - offset
+            due |= (Q(start_time__lte=now + offset, booking_date__lt=opens_at)
+                    & (Q(reminder_sent_at__isnull=True) | Q(reminder_sent_at__lt=opens_at)))
+        # Bounded by the widest window, so the (status, start_time) index is
+        # scanned over that range only
+        return self.filter(
+            due, Q(reminder_retry_at__isnull=True) | Q(reminder_retry_at__lte=now),
+            status='confirmed', start_time__gt=now, start_time__lte=now + max(offsets)
+        )
+
 class Booking(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -89,37 +286,334 @@ class Booking(models.Model):
     booking_date = models.DateTimeField(auto_now_add=True)
     attendees = models.JSONField(default=list, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    series = models.ForeignKey('BookingSeries', on_delete=models.SET_NULL, related_name='bookings', null=True, blank=True)
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
+    # Failed sends of the current reminder, retried from reminder_retry_at
+    reminder_attempts = models.PositiveSmallIntegerField(default=0)
+    reminder_retry_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = BookingQuerySet.as_manager()
+    
+    OCCUPANCY_FIELDS = {'work_space_id', 'start_time', 'end_time', 'status'}
     
     def __str__(self):
         space_name = self.desk.name if self.desk else (self.meeting_room.name if self.meeting_room else "Unknown")
         return f"Booking for {space_name} by {self.user.email}"
     
-    def clean(self):
-        """Custom validation for bookings"""
-        # Skip validation if the booking is being cancelled
-        if self.status == 'cancelled':
-            return
-            
-        # Check for overlapping bookings
-        overlapping_bookings = Booking.objects.filter(
-            Q(desk=self.desk) | Q(meeting_room=self.meeting_room),
-            ~Q(status='cancelled'),  # Exclude cancelled bookings
-            start_time__lt=self.end_time,
-            end_time__gt=self.start_time
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the occupancy rollups currently hold for this booking,
+        # unless that would mean fetching deferred fields one by one
+        if not cls.OCCUPANCY_FIELDS & instance.get_deferred_fields():
+            instance._occupancy = instance.get_occupancy()
+        return instance
+    
+    def get_occupancy(self):
+        """(workspace id, start, end) counted in the occupancy rollups, or None"""
+        if self.status == 'cancelled' or not self.work_space_id:
+            return None
+        return (self.work_space_id, self.start_time, self.end_time)
+    
+    class Meta:
+        constraints = [
+            # Overlapping bookings are rejected by the database itself, so two
+            # concurrent requests can never double-book the same desk or room
+            ExclusionConstraint(
+                name='booking_desk_no_overlap',
+                expressions=[
+                    ('desk', RangeOperators.EQUAL),
+                    (TsTzRange('start_time', 'end_time'), RangeOperators.OVERLAPS),
+                ],
+                condition=Q(desk__isnull=False) & ~Q(status='cancelled'),
+                violation_error_message=BOOKING_CONFLICT_MESSAGE,
+            ),
+            ExclusionConstraint(
+                name='booking_meeting_room_no_overlap',
+                expressions=[
+                    ('meeting_room', RangeOperators.EQUAL),
+                    (TsTzRange('start_time', 'end_time'), RangeOperators.OVERLAPS),
+                ],
+                condition=Q(meeting_room__isnull=False) & ~Q(status='cancelled'),
+                violation_error_message=BOOKING_CONFLICT_MESSAGE,
+            ),
+            # An occurrence of a series is only ever materialized once
+            models.UniqueConstraint(fields=['series', 'start_time'], name='booking_series_occurrence_unique'),
+        ]
+        indexes = [
+            # Keyset pagination of a user's bookings, with and without a status filter
+            models.Index(fields=['user', 'start_time', 'id'], name='booking_user_start_idx'),
+            models.Index(fields=['user', 'status', 'start_time', 'id'], name='booking_user_status_start_idx'),
+            # The reminder sweep's scan of upcoming confirmed bookings
+            models.Index(fields=['status', 'start_time'], name='booking_status_start_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Occurrences of a series that are not materialized yet are invisible
+        # to the exclusion constraints, so check them explicitly
+        if (self.series_id is None and self.status != 'cancelled'
+                and (self.desk_id or self.meeting_room_id)
+                and BookingSeries.objects.has_conflict(self.desk_id, self.meeting_room_id,
+                                                       self.start_time, self.end_time)):
+            raise ValidationError(BOOKING_CONFLICT_MESSAGE)
+        
+        # Overlaps are enforced by the exclusion constraints above; translate
+        # a violation into the ValidationError callers already handle
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if getattr(e.__cause__, 'pgcode', None) == EXCLUSION_VIOLATION:
+                raise ValidationError(BOOKING_CONFLICT_MESSAGE)
+            raise
+
+class BookingSeriesQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status='active')
+    
+    def overlapping(self, start_time, end_time):
+        """Active series whose span intersects [start_time, end_time)"""
+        return self.active().filter(
+            Q(until__isnull=True) | Q(until__gt=start_time),
+            start_time__lt=end_time
+        )
+    
+    def for_resource(self, desk=None, meeting_room=None):
+        if desk:
+            return self.filter(desk=desk)
+        return self.filter(meeting_room=meeting_room)
+    
+    def has_conflict(self, desk, meeting_room, start_time, end_time):
+        """Whether any not-yet-materialized occurrence overlaps the window"""
+        series_list = self.overlapping(start_time, end_time).for_resource(desk, meeting_room)
+        return any(
+            next(series.pending_occurrences(start_time, end_time), None) is not None
+            for series in series_list
+        )
+
+class BookingSeries(models.Model):
+    """
+    A recurring booking described by an RFC 5545 recurrence rule, e.g.
+    ``FREQ=WEEKLY;BYDAY=MO;COUNT=52``.
+    
+    Occurrences are expanded lazily for the window being looked at and are
+    only materialized as Booking rows shortly before they happen.
+    """
+    STATUS_CHOICES = (
+        ('active', 'Active'),
+        ('cancelled', 'Cancelled'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_series')
+    work_space = models.ForeignKey(WorkSpace, on_delete=models.CASCADE, related_name='booking_series')
+    desk = models.ForeignKey(Desk, on_delete=models.CASCADE, related_name='booking_series', null=True, blank=True)
+    meeting_room = models.ForeignKey(MeetingRoom, on_delete=models.CASCADE, related_name='booking_series', null=True, blank=True)
+    title = models.CharField(max_length=200, blank=True, null=True)
+    # Anchor of the recurrence; every occurrence lasts end_time - start_time
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    rrule = models.CharField(max_length=500)
+    # End of the last occurrence, empty for open-ended series
+    until = models.DateTimeField(null=True, blank=True)
+    # Occurrences starting before this have been created as Booking rows
+    materialized_until = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    attendees = models.JSONField(default=list, blank=True, null=True)
+    notes = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = BookingSeriesQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name_plural = 'booking series'
+    
+    def __str__(self):
+        return f"{self.title or 'Booking series'} ({self.rrule}) by {self.user.email}"
+    
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+    
+    def get_rule(self):
+        """Parse the recurrence rule anchored at the first occurrence"""
+        return rrulestr(self.rrule, dtstart=self.start_time)
+    
+    def is_bounded(self):
+        rule = self.rrule.upper()
+        return 'COUNT=' in rule or 'UNTIL=' in rule
+    
+    def compute_until(self):
+        """End of the last occurrence, or None for open-ended series"""
+        if not self.is_bounded():
+            return None
+        last_start = None
+        for last_start in self.get_rule():
+            pass
+        return last_start + self.duration if last_start else self.end_time
+    
+    def occurrences(self, start_time, end_time):
+        """Lazily yield (start, end) of every occurrence overlapping [start_time, end_time)"""
+        duration = self.duration
+        # Occurrences starting after start_time - duration end after start_time
+        for occurrence_start in self.get_rule().xafter(start_time - duration, inc=False):
+            if occurrence_start >= end_time:
+                break
+            yield occurrence_start, occurrence_start + duration
+    
+    def pending_occurrences(self, start_time, end_time):
+        """Occurrences overlapping the window that are not Booking rows yet"""
+        for occurrence_start, occurrence_end in self.occurrences(start_time, end_time):
+            if self.materialized_until is None or occurrence_start >= self.materialized_until:
+                yield occurrence_start, occurrence_end
+    
+    def build_booking(self, start_time, end_time):
+        """Unsaved Booking for a single occurrence"""
+        return Booking(
+            user=self.user,
+            work_space=self.work_space,
+            desk=self.desk,
+            meeting_room=self.meeting_room,
+            title=self.title,
+            date=start_time.date(),
+            start_time=start_time,
+            end_time=end_time,
+            attendees=self.attendees,
+            notes=self.notes,
+            series=self
         )
+    
+    def virtual_bookings(self, start_time, end_time):
+        """Lazily yield unsaved Bookings for the pending occurrences in the window"""
+        for occurrence_start, occurrence_end in self.pending_occurrences(start_time, end_time):
+            yield self.build_booking(occurrence_start, occurrence_end)
+    
+    def materialize(self, until):
+        """
+        Create Booking rows for every occurrence starting before ``until``
+        that has not been materialized yet. Returns the number of occurrences
+        processed.
+        """
+        if self.status != 'active':
+            return 0
+        start = self.materialized_until or self.start_time
+        duration = self.duration
         
-        # Exclude self when updating
-        if self.pk:
-            overlapping_bookings = overlapping_bookings.exclude(pk=self.pk)
+        bookings = []
+        for occurrence_start in self.get_rule().xafter(start, inc=True):
+            if occurrence_start >= until:
+                break
+            bookings.append(self.build_booking(occurrence_start, occurrence_start + duration))
         
-        if overlapping_bookings.exists():
-            raise ValidationError("This space is already booked for the selected time range.")
+        # Occurrences clashing with an existing booking are skipped by the
+        # database instead of failing the whole batch
+        Booking.objects.bulk_create(bookings, ignore_conflicts=True)
+        # ignore_conflicts leaves the primary keys unset, so read back the
+        # occurrences that made it in
+        created = list(Booking.objects.filter(series=self, start_time__gte=start, start_time__lt=until))
+        OccupancyRollup.objects.record(created)
+        created_starts = {booking.start_time for booking in created}
+        skipped = [booking.start_time for booking in bookings if booking.start_time not in created_starts]
+        if skipped:
+            self.report_skipped(skipped)
+        self.materialized_until = until
+        self.save(update_fields=['materialized_until'])
+        return len(bookings)
+    
+    def report_skipped(self, skipped):
+        """Tell the owner about occurrences that could not be booked"""
+        logger.warning(f"Skipped {len(skipped)} occurrences of booking series {self.id} that clash with "
+                       f"other bookings: {', '.join(start.isoformat() for start in skipped)}")
+        dates = ', '.join(f"{start:%Y-%m-%d %H:%M}" for start in skipped)
+        Notification.objects.create(
+            user=self.user,
+            type='booking_conflict',
+            title='Recurring Booking Conflict',
+            message=f"The space of your recurring booking for {self.work_space.name} was already taken, "
+                    f"so these occurrences were not booked: {dates}.",
+        )
     
     def save(self, *args, **kwargs):
-        # Only run validation if this is a new booking or status is not cancelled
-        if not self.pk or self.status != 'cancelled':
-            self.clean()  # Run the custom validation before saving the booking
+        if not kwargs.get('update_fields'):
+            self.until = self.compute_until()
         super().save(*args, **kwargs)
+
+class OccupancyRollupQuerySet(models.QuerySet):
+    def apply(self, added=(), removed=()):
+        """
+        Add the booked time of the ``added`` occupancies (see
+        ``Booking.get_occupancy``) to the rollups and subtract the ``removed``
+        ones, all with a single upsert.
+        """
+        deltas = defaultdict(int)
+        for sign, occupancies in ((1, added), (-1, removed)):
+            for occupancy in occupancies:
+                if occupancy is None:
+                    continue
+                workspace_id, start_time, end_time = occupancy
+                for bucket, seconds in OccupancyRollup.split(start_time, end_time):
+                    deltas[(workspace_id, bucket)] += sign * seconds
+        
+        rows = [(workspace_id, bucket, seconds) for (workspace_id, bucket), seconds in deltas.items() if seconds]
+        if not rows:
+            return
+        
+        table = self.model._meta.db_table
+        values = ', '.join(['(%s, %s, %s)'] * len(rows))
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (workspace_id, bucket, booked_seconds)
+                VALUES {values}
+                ON CONFLICT (workspace_id, bucket)
+                DO UPDATE SET booked_seconds = {table}.booked_seconds + EXCLUDED.booked_seconds
+                """,
+                [value for row in rows for value in row]
+            )
+    
+    def record(self, bookings):
+        """Count newly created bookings, e.g. after a bulk_create"""
+        self.apply(added=[booking.get_occupancy() for booking in bookings])
+    
+    def discard(self, bookings):
+        """Stop counting bookings that were cancelled or deleted in bulk"""
+        self.apply(removed=[booking.get_occupancy() for booking in bookings])
+
+class OccupancyRollup(models.Model):
+    """
+    Booked time per workspace per hour, kept up to date as bookings are
+    created, moved and cancelled so that utilization reports never have to
+    scan the booking table.
+    """
+    workspace = models.ForeignKey(WorkSpace, on_delete=models.CASCADE, related_name='occupancy_rollups')
+    # Start of the hour, in the current time zone
+    bucket = models.DateTimeField()
+    booked_seconds = models.BigIntegerField(default=0)
+    
+    objects = OccupancyRollupQuerySet.as_manager()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['workspace', 'bucket'], name='occupancy_rollup_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='occupancy_rollup_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.workspace_id} @ {self.bucket}: {self.booked_seconds}s"
+    
+    @staticmethod
+    def split(start_time, end_time):
+        """Yield (hour bucket, seconds) pairs covering [start_time, end_time)"""
+        # Step in UTC so that DST transitions do not skip or repeat an hour
+        bucket = timezone.localtime(start_time).replace(minute=0, second=0, microsecond=0).astimezone(dt_timezone.utc)
+        while bucket < end_time:
+            next_bucket = bucket + timedelta(hours=1)
+            seconds = int((min(next_bucket, end_time) - max(bucket, start_time)).total_seconds())
+            if seconds > 0:
+                yield bucket, seconds
+            bucket = next_bucket
+
 class Notification(models.Model):
     TYPE_CHOICES = (
         ('booking_confirmation', 'Booking Confirmation'),
@@ -0,0 +1,132 @@
+import base64
+import heapq
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class BookingCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over (start_time, id).
+
+    The cursor encodes the position of the last item of the previous page,
+    so every page is a single index range scan no matter how many bookings
+    come before it. Views may set ``descending = True`` to walk backwards in
+    time, and may provide ``get_extra_items(position)`` returning an already
+    sorted iterable of unsaved items (e.g. pending series occurrences) to be
+    merged into the pages.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descending = getattr(view, 'descending', False)
+        position = self.decode_cursor(request)
+
+        ordering = ('-start_time', '-id') if self.descending else ('start_time', 'id')
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        items = queryset[:self.page_size + 1]
+
+        get_extra_items = getattr(view, 'get_extra_items', None)
+        if get_extra_items is not None:
+            extra_items = (item for item in get_extra_items(position) if self.is_after(item, position))
+            items = heapq.merge(items, extra_items, key=self.get_position, reverse=self.descending)
+
+        page = []
+        self.has_next = False
+        for item in items:
+            if len(page) == self.page_size:
+                self.has_next = True
+                break
+            page.append(item)
+
+        self.next_position = self.get_position(page[-1]) if page else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    @staticmethod
+    def get_position(item):
+        # Unsaved items (pending series occurrences) have no id; they sort
+        # before saved ones at the same start time, and a series has at most
+        # one occurrence per start time, so its id tells them apart
+        if item.id:
+            return (item.start_time, item.id, 0)
+        return (item.start_time, 0, item.series_id or 0)
+
+    def get_position_filter(self, position):
+        start_time, item_id, _ = position
+        if self.descending:
+            return Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=item_id)
+        return Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=item_id)
+
+    def is_after(self, item, position):
+        """Whether an item comes after the cursor position in page order"""
+        if position is None:
+            return True
+        if self.descending:
+            return self.get_position(item) < position
+        return self.get_position(item) > position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def encode_cursor(self, position):
+        start_time, item_id, series_id = position
+        querystring = parse.urlencode({'t': start_time.isoformat(), 'i': item_id, 's': series_id})
+        return base64.urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            querystring = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            start_time = parse_datetime(tokens['t'][0])
+            item_id = int(tokens['i'][0])
+            series_id = int(tokens.get('s', ['0'])[0])
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if start_time is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (start_time, item_id, series_id)
@@ -1,10 +1,14 @@
+from datetime import timedelta
+from itertools import islice, takewhile
+from django.conf import settings
 from rest_framework import serializers
-from .models import WorkSpace, Hub, Desk, MeetingRoom, Booking, Location, Feature, Notification
+from dateutil.rrule import DAILY, rrule, rrulestr
+from .models import WorkSpace, Hub, Desk, MeetingRoom, Booking, BookingSeries, Location, Feature, Notification
 
 class LocationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Location
-        fields = ['id', 'name', 'address']
+        fields = ['id', 'name', 'address', 'opens_at', 'closes_at', 'open_days']
 
 class FeatureSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +23,11 @@ class WorkSpaceSerializer(serializers.ModelSerializer):
         model = WorkSpace
         fields = ['id', 'name', 'type', 'description', 'location', 'capacity', 
                   'is_available', 'features', 'hourly_rate']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the nested location and features with the workspaces"""
+        return queryset.select_related('location').prefetch_related('features')
         
     def create(self, validated_data):
         # Extract location and features data
@@ -45,19 +54,37 @@ class HubSerializer(serializers.ModelSerializer):
         model = Hub
         fields = ['id', 'name', 'workspace', 'capacity']
 
-class DeskSerializer(serializers.ModelSerializer):
+class BookableAvailabilityMixin:
+    """Serializes the ``is_available`` annotation from ``with_availability()``"""
+    
+    def get_is_available(self, obj):
+        if hasattr(obj, 'is_available'):
+            return obj.is_available
+        return obj.is_free()
+
+class DeskSerializer(BookableAvailabilityMixin, serializers.ModelSerializer):
     hub_name = serializers.CharField(source='hub.name', read_only=True)
+    is_available = serializers.SerializerMethodField()
     
     class Meta:
         model = Desk
         fields = ['id', 'name', 'hub', 'hub_name', 'is_available']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('hub')
 
-class MeetingRoomSerializer(serializers.ModelSerializer):
+class MeetingRoomSerializer(BookableAvailabilityMixin, serializers.ModelSerializer):
     workspace_name = serializers.CharField(source='workspace.name', read_only=True)
+    is_available = serializers.SerializerMethodField()
     
     class Meta:
         model = MeetingRoom
         fields = ['id', 'name', 'workspace', 'workspace_name', 'capacity', 'is_available']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('workspace')
 
 class BookingSerializer(serializers.ModelSerializer):
     workspace_name = serializers.CharField(source='work_space.name', read_only=True)
@@ -67,8 +94,20 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ['id', 'user', 'user_email', 'work_space', 'workspace_name', 'desk', 'meeting_room', 
                   'title', 'date', 'start_time', 'end_time', 'status', 'booking_date', 
-                  'attendees', 'notes']
-        read_only_fields = ['user', 'booking_date']
+                  'attendees', 'notes', 'series']
+        read_only_fields = ['user', 'booking_date', 'series']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the workspace and user used by workspace_name / user_email"""
+        return queryset.select_related('work_space', 'user')
+    
+    def validate(self, data):
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError("End time must be after start time.")
+        return data
     
     def create(self, validated_data):
         # Make sure we have a date field
@@ -77,6 +116,70 @@ class BookingSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
+class BookingSeriesSerializer(serializers.ModelSerializer):
+    workspace_name = serializers.CharField(source='work_space.name', read_only=True)
+    
+    class Meta:
+        model = BookingSeries
+        fields = ['id', 'user', 'work_space', 'workspace_name', 'desk', 'meeting_room', 'title',
+                  'start_time', 'end_time', 'rrule', 'until', 'status', 'attendees', 'notes', 'created_at']
+        read_only_fields = ['user', 'until', 'status', 'created_at']
+    
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        
+        desk, meeting_room = data.get('desk'), data.get('meeting_room')
+        if bool(desk) == bool(meeting_room):
+            raise serializers.ValidationError("Exactly one of desk and meeting room is required.")
+        if desk and desk.hub.workspace_id != data['work_space'].id:
+            raise serializers.ValidationError({'desk': ["Desk does not belong to this workspace."]})
+        if meeting_room and meeting_room.workspace_id != data['work_space'].id:
+            raise serializers.ValidationError({'meeting_room': ["Meeting room does not belong to this workspace."]})
+        
+        try:
+            rule = rrulestr(data['rrule'], dtstart=data['start_time'])
+        except (ValueError, TypeError) as e:
+            raise serializers.ValidationError({'rrule': [f"Invalid recurrence rule: {e}"]})
+        self.validate_rule_size(rule, data)
+        return data
+    
+    @staticmethod
+    def validate_rule_size(rule, data):
+        """
+        Keep the expansion of a rule cheap: at most daily, and at most
+        BOOKING_SERIES_MAX_OCCURRENCES occurrences in total, or within the
+        checking horizon for open-ended series
+        """
+        if not isinstance(rule, rrule):
+            raise serializers.ValidationError({'rrule': ["Only a single RRULE is supported."]})
+        if rule._freq > DAILY:
+            raise serializers.ValidationError({'rrule': ["Series can repeat at most daily."]})
+        
+        occurrences = iter(rule)
+        if not BookingSeries(rrule=data['rrule']).is_bounded():
+            horizon_end = data['start_time'] + timedelta(days=settings.BOOKING_SERIES_HORIZON_DAYS)
+            occurrences = takewhile(lambda start: start < horizon_end, occurrences)
+        limit = settings.BOOKING_SERIES_MAX_OCCURRENCES
+        if sum(1 for _ in islice(occurrences, limit + 1)) > limit:
+            raise serializers.ValidationError({'rrule': [f"Series can have at most {limit} occurrences."]})
+
+class BookingSpecSerializer(serializers.Serializer):
+    """A single booking request inside a bulk create"""
+    work_space = serializers.IntegerField()
+    desk = serializers.IntegerField(required=False, allow_null=True)
+    meeting_room = serializers.IntegerField(required=False, allow_null=True)
+    title = serializers.CharField(required=False, allow_blank=True, default='Untitled Booking')
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    attendees = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        return data
+
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
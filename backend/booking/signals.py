@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+
+from .catalog import CatalogCache
+from .models import WorkSpace, Location, Feature, Hub, Booking, OccupancyRollup
+
+# Fields that are stored on a workspace but never part of the cached catalog
+NON_CATALOG_FIELDS = {'embedding', 'embedding_hash', 'search_document'}
+
+
+def invalidate_catalog(sender, **kwargs):
+    """Bump the catalog version once the write is committed"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= NON_CATALOG_FIELDS:
+        return
+    transaction.on_commit(CatalogCache.bump_version)
+
+
+for model in (WorkSpace, Location, Feature, Hub):
+    post_save.connect(invalidate_catalog, sender=model, dispatch_uid=f'catalog_save_{model.__name__}')
+    post_delete.connect(invalidate_catalog, sender=model, dispatch_uid=f'catalog_delete_{model.__name__}')
+
+m2m_changed.connect(invalidate_catalog, sender=WorkSpace.features.through, dispatch_uid='catalog_features_changed')
+
+
+def refresh_denormalized(workspaces):
+    """Rebuild the search documents and feature ids of the workspaces"""
+    workspaces.update_search_documents()
+    workspaces.update_feature_ids()
+
+
+def update_workspace_search_document(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and set(update_fields) <= NON_CATALOG_FIELDS):
+        return
+    # A full save writes back the feature ids the instance was loaded with
+    refresh_denormalized(WorkSpace.objects.filter(pk=instance.pk))
+
+
+def update_related_search_documents(sender, instance, raw=False, **kwargs):
+    """A location or feature was renamed, rebuild the documents of every workspace using it"""
+    if raw:
+        return
+    instance.workspaces.all().update_search_documents()
+
+
+def update_features_search_documents(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Once cleared, the feature no longer knows which workspaces had it
+        instance._cleared_workspace_ids = list(instance.workspaces.values_list('id', flat=True))
+    elif reverse and action == 'post_clear':
+        refresh_denormalized(WorkSpace.objects.filter(pk__in=instance._cleared_workspace_ids))
+    elif reverse and action in ('post_add', 'post_remove'):
+        refresh_denormalized(WorkSpace.objects.filter(pk__in=pk_set))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        refresh_denormalized(WorkSpace.objects.filter(pk=instance.pk))
+
+
+def remember_feature_workspaces(sender, instance, **kwargs):
+    # Deleting a feature removes its workspace links without an m2m_changed signal
+    instance._cleared_workspace_ids = list(instance.workspaces.values_list('id', flat=True))
+
+
+def update_feature_workspaces(sender, instance, **kwargs):
+    refresh_denormalized(WorkSpace.objects.filter(pk__in=instance._cleared_workspace_ids))
+
+
+post_save.connect(update_workspace_search_document, sender=WorkSpace, dispatch_uid='search_workspace_save')
+post_save.connect(update_related_search_documents, sender=Location, dispatch_uid='search_location_save')
+post_save.connect(update_related_search_documents, sender=Feature, dispatch_uid='search_feature_save')
+m2m_changed.connect(update_features_search_documents, sender=WorkSpace.features.through,
+                    dispatch_uid='search_features_changed')
+pre_delete.connect(remember_feature_workspaces, sender=Feature, dispatch_uid='search_feature_pre_delete')
+post_delete.connect(update_feature_workspaces, sender=Feature, dispatch_uid='search_feature_delete')
+
+
+def remember_occupancy(sender, instance, raw=False, **kwargs):
+    """Read the stored occupancy of a booking loaded with deferred fields"""
+    if raw or instance.pk is None or hasattr(instance, '_occupancy'):
+        return
+    stored = Booking.objects.filter(pk=instance.pk).only('work_space', 'start_time', 'end_time', 'status').first()
+    instance._occupancy = stored.get_occupancy() if stored else None
+
+
+def update_occupancy(sender, instance, raw=False, **kwargs):
+    """Move a saved booking's booked time to where it now belongs in the rollups"""
+    if raw:
+        return
+    previous = getattr(instance, '_occupancy', None)
+    current = instance.get_occupancy()
+    if previous != current:
+        OccupancyRollup.objects.apply(added=[current], removed=[previous])
+    instance._occupancy = current
+
+
+def remove_occupancy(sender, instance, **kwargs):
+    OccupancyRollup.objects.apply(removed=[getattr(instance, '_occupancy', None)])
+    instance._occupancy = None
+
+
+pre_save.connect(remember_occupancy, sender=Booking, dispatch_uid='occupancy_booking_pre_save')
+post_save.connect(update_occupancy, sender=Booking, dispatch_uid='occupancy_booking_save')
+post_delete.connect(remove_occupancy, sender=Booking, dispatch_uid='occupancy_booking_delete')
@@ -0,0 +1,166 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking, BookingSeries, Desk, Location, MeetingRoom, WorkSpace
+
+
+def merge_intervals(intervals):
+    """Merge (start, end) intervals into sorted, non-overlapping ones in a single sweep"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_slots(busy, window_start, window_end, duration, granularity):
+    """
+    Slots of ``duration`` starting every ``granularity`` from window_start that
+    fit between the merged ``busy`` intervals, found in one pass over them.
+    """
+    slots = []
+    candidate = window_start
+    busy = iter(busy)
+    next_busy = next(busy, None)
+
+    while candidate + duration <= window_end:
+        slot_end = candidate + duration
+        # Skip busy intervals that ended before this candidate
+        while next_busy and next_busy[1] <= candidate:
+            next_busy = next(busy, None)
+
+        if next_busy is None or slot_end <= next_busy[0]:
+            slots.append((candidate, slot_end))
+            candidate += granularity
+        else:
+            # Jump to the first aligned candidate after the busy interval
+            steps = -(-(next_busy[1] - window_start) // granularity)
+            candidate = window_start + steps * granularity
+    return slots
+
+
+def business_hours(location, date):
+    """Opening window of a location on a date, or None when it is closed"""
+    tz = timezone.get_current_timezone()
+    if location is None:
+        opens_at, closes_at, open_days = Location.DEFAULT_OPENS_AT, Location.DEFAULT_CLOSES_AT, Location.ALL_DAYS
+    else:
+        opens_at, closes_at, open_days = location.opens_at, location.closes_at, location.open_days
+
+    if str(date.weekday()) not in open_days:
+        return None
+    return (
+        timezone.make_aware(datetime.combine(date, opens_at), tz),
+        timezone.make_aware(datetime.combine(date, closes_at), tz),
+    )
+
+
+class SlotFinder:
+    """
+    Finds free time slots across many workspaces at once.
+
+    All desks, meeting rooms, bookings and recurring series of the candidate
+    workspaces are loaded with one query each. Busy intervals are merged per
+    resource and swept once to produce the free slots, so the cost grows with
+    the number of bookings rather than slots x bookings.
+
+    A workspace offers a slot when at least one of its desks or meeting rooms
+    (or the workspace itself, if it has none) is free for the whole slot.
+    """
+
+    def __init__(self, duration, granularity=timedelta(minutes=30)):
+        # A slot grid that never advances would never end
+        if duration <= timedelta(0) or granularity <= timedelta(0):
+            raise ValueError("Duration and granularity must be positive")
+        self.duration = duration
+        self.granularity = granularity
+
+    def find(self, workspaces, date):
+        """Return ``{workspace: [(start, end), ...]}`` for the given date"""
+        workspaces = list(workspaces)
+        windows = {}
+        for workspace in workspaces:
+            window = business_hours(workspace.location, date)
+            if window:
+                windows[workspace.id] = window
+        if not windows:
+            return {workspace: [] for workspace in workspaces}
+
+        day_start = min(start for start, _ in windows.values())
+        day_end = max(end for _, end in windows.values())
+        workspace_ids = list(windows)
+
+        resources = defaultdict(set)
+        for desk_id, workspace_id in Desk.objects.filter(
+                hub__workspace__in=workspace_ids).values_list('id', 'hub__workspace_id'):
+            resources[workspace_id].add(('desk', desk_id))
+        for room_id, workspace_id in MeetingRoom.objects.filter(
+                workspace__in=workspace_ids).values_list('id', 'workspace_id'):
+            resources[workspace_id].add(('meeting_room', room_id))
+
+        in_workspaces = (
+            Q(work_space__in=workspace_ids)
+            | Q(desk__hub__workspace__in=workspace_ids)
+            | Q(meeting_room__workspace__in=workspace_ids)
+        )
+        bookings = list(Booking.objects.filter(
+            in_workspaces,
+            start_time__lt=day_end,
+            end_time__gt=day_start
+        ).exclude(status='cancelled').only('work_space_id', 'desk_id', 'meeting_room_id', 'start_time', 'end_time'))
+        for series in BookingSeries.objects.overlapping(day_start, day_end).filter(in_workspaces):
+            bookings.extend(series.virtual_bookings(day_start, day_end))
+
+        # Busy intervals per resource; workspace-wide bookings block every resource
+        busy = defaultdict(list)
+        for booking in bookings:
+            if booking.desk_id:
+                key = ('desk', booking.desk_id)
+            elif booking.meeting_room_id:
+                key = ('meeting_room', booking.meeting_room_id)
+            else:
+                key = ('workspace', booking.work_space_id)
+            busy[key].append((booking.start_time, booking.end_time))
+
+        results = {}
+        for workspace in workspaces:
+            window = windows.get(workspace.id)
+            if window is None:
+                results[workspace] = []
+                continue
+
+            shared = busy.get(('workspace', workspace.id), [])
+            keys = resources.get(workspace.id) or [('workspace', workspace.id)]
+            slots = set()
+            for key in keys:
+                resource_busy = busy.get(key, []) if key[0] == 'workspace' else busy.get(key, []) + shared
+                slots.update(free_slots(merge_intervals(resource_busy), window[0], window[1],
+                                        self.duration, self.granularity))
+            results[workspace] = sorted(slots)
+        return results
+
+    def search(self, date, workspace_type=None, capacity=None, features=None, location=None, limit=10):
+        """
+        Rank workspaces matching the criteria by their earliest free slot,
+        then by how tightly they fit the requested capacity, then by price.
+        """
+        workspaces = WorkSpace.objects.filter(is_available=True).matching(
+            workspace_type, capacity, location, features
+        ).select_related('location')
+
+        slots_by_workspace = self.find(workspaces.distinct(), date)
+        ranked = sorted(
+            ((workspace, slots) for workspace, slots in slots_by_workspace.items() if slots),
+            key=lambda item: (
+                item[1][0][0],
+                (item[0].capacity or 0) - (capacity or 0),
+                item[0].hourly_rate,
+            )
+        )
+        return ranked[:limit]
@@ -0,0 +1,32 @@
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def materialize_booking_series():
+    """
+    Turn the upcoming occurrences of every active booking series into
+    Booking rows, up to BOOKING_SERIES_MATERIALIZE_DAYS ahead
+    """
+    from .models import BookingSeries
+    
+    now = timezone.now()
+    until = now + timedelta(days=settings.BOOKING_SERIES_MATERIALIZE_DAYS)
+    series_list = BookingSeries.objects.overlapping(now, until).filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=until)
+    ).select_related('user', 'work_space', 'desk', 'meeting_room')
+    
+    count = 0
+    for series in series_list:
+        try:
+            count += series.materialize(until)
+        except Exception as e:
+            logger.error(f"Error materializing booking series {series.id}: {str(e)}")
+    
+    logger.info(f"Materialized {count} booking series occurrences")
+    return count
@@ -1,3 +1,643 @@
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from authentication.models import User
+from email_notifications.models import OutboxMessage
+from .availability import AvailabilityIndex
+from .catalog import CatalogCache
+from .models import (
+    WorkSpace, Hub, Desk, MeetingRoom, Booking, BookingSeries, Location, Feature, Notification, OccupancyRollup,
+    BOOKING_CONFLICT_MESSAGE
+)
+from .slots import SlotFinder, free_slots, merge_intervals
+
+
+class ListQueryCountTests(TestCase):
+    """
+    List endpoints must run a fixed number of queries whatever the number
+    of rows, i.e. no per-row lookups of related objects.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.location = Location.objects.create(name='East Wing')
+        cls.features = [Feature.objects.create(name=name) for name in ('Projector', 'Whiteboard')]
+        cls.workspace = WorkSpace.objects.create(name='Open Floor', type='desk', location=cls.location)
+        cls.hub = Hub.objects.create(name='Hub A', workspace=cls.workspace)
+        cls.start = timezone.now() + timedelta(days=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_rows(self, count):
+        """Add ``count`` more workspaces, desks, meeting rooms and bookings"""
+        for _ in range(count):
+            index = WorkSpace.objects.count()
+            workspace = WorkSpace.objects.create(
+                name=f'Room {index}', type='meeting', location=Location.objects.create(name=f'Floor {index}')
+            )
+            workspace.features.set(self.features)
+            desk = Desk.objects.create(name=f'Desk {index}', hub=self.hub)
+            MeetingRoom.objects.create(name=f'Room {index}', workspace=self.workspace)
+            Booking.objects.create(
+                user=self.user, work_space=workspace, desk=desk,
+                start_time=self.start + timedelta(hours=index), end_time=self.start + timedelta(hours=index, minutes=30)
+            )
+
+    def count_queries(self, url):
+        # Measure a cold catalog cache
+        CatalogCache.bump_version()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.add_rows(1)
+        baseline = self.count_queries(url)
+        self.add_rows(10)
+        self.assertEqual(self.count_queries(url), baseline, f"{url} runs extra queries per row")
+
+    def test_workspace_list(self):
+        self.assertConstantQueries('/api/booking/workspace/')
+
+    def test_ai_workspace_list(self):
+        self.assertConstantQueries('/api/ai/workspaces/')
+
+    def test_desk_list(self):
+        self.assertConstantQueries(f'/api/booking/hub/{self.hub.id}/desks/')
+
+    def test_meeting_room_list(self):
+        self.assertConstantQueries(f'/api/booking/workspace/{self.workspace.id}/meeting-rooms/')
+
+    def test_booking_list(self):
+        self.assertConstantQueries('/api/booking/list/?page_size=100')
+
+    def test_user_bookings_list(self):
+        self.assertConstantQueries(f'/api/users/{self.user.id}/bookings/?page_size=100')
+
+    def test_check_availability(self):
+        self.add_rows(1)
+        url = f'/api/booking/workspace/{self.workspace.id}/check-availability/'
+        data = {
+            'date': self.start.strftime('%Y-%m-%d'),
+            'start_time': '00:00',
+            'end_time': '23:59',
+        }
+
+        def count():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(url, data, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        baseline = count()
+        self.add_rows(10)
+        self.assertEqual(count(), baseline)
+
+
+class ResourceAvailabilityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Open Floor', type='desk')
+        cls.hub = Hub.objects.create(name='Hub A', workspace=cls.workspace)
+        cls.desk = Desk.objects.create(name='Desk 1', hub=cls.hub)
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=7)
+        for resource in ({'desk': cls.desk}, {'meeting_room': cls.room}):
+            Booking.objects.create(user=cls.user, work_space=cls.workspace, start_time=cls.start,
+                                   end_time=cls.start + timedelta(hours=1), **resource)
+        # A cancelled booking never makes a resource busy
+        Booking.objects.create(user=cls.user, work_space=cls.workspace, desk=cls.desk, status='cancelled',
+                               start_time=cls.start + timedelta(hours=2), end_time=cls.start + timedelta(hours=3))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def availability(self, url, start_hour=None, end_hour=None):
+        params = {}
+        if start_hour is not None:
+            params = {'start_time': (self.start + timedelta(hours=start_hour)).isoformat(),
+                      'end_time': (self.start + timedelta(hours=end_hour)).isoformat()}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['is_available'] for item in response.json()]
+
+    def test_desk_and_meeting_room_lists(self):
+        for url in (f'/api/booking/hub/{self.hub.id}/desks/',
+                    f'/api/booking/workspace/{self.workspace.id}/meeting-rooms/'):
+            with self.subTest(url=url):
+                # Free right now, busy while next week's booking lasts
+                self.assertEqual(self.availability(url), [True])
+                self.assertEqual(self.availability(url, 0, 1), [False])
+                self.assertEqual(self.availability(url, -1, 0), [True])
+                self.assertEqual(self.availability(url, 2, 3), [True])
+
+
+class CatalogCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        CatalogCache.bump_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.workspace = WorkSpace.objects.create(name='Quiet Desk', type='desk')
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.client.get('/api/booking/workspace/')
+        # Only the session and user lookups of the authentication remain
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/booking/workspace/')
+        self.assertEqual([w['name'] for w in response.json()], ['Quiet Desk'])
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get('/api/booking/workspace/')['ETag']
+        response = self.client.get('/api/booking/workspace/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates_catalog(self):
+        etag = self.client.get('/api/booking/workspace/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.workspace.features.add(Feature.objects.create(name='Monitor'))
+
+        response = self.client.get('/api/booking/workspace/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['features'][0]['name'], 'Monitor')
+
+
+class SlotFinderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.location = Location.objects.create(name='East Wing', opens_at=time(9, 0), closes_at=time(12, 0))
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting', capacity=8, location=cls.location)
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        # A Monday
+        cls.date = date(2030, 1, 7)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.date, time(hour, minute)))
+
+    def test_merge_intervals(self):
+        intervals = [(3, 5), (1, 2), (2, 4), (7, 8)]
+        self.assertEqual(merge_intervals(intervals), [(1, 5), (7, 8)])
+
+    def test_free_slots_skip_busy_intervals(self):
+        busy = [(self.at(10), self.at(10, 45))]
+        slots = free_slots(busy, self.at(9), self.at(12), timedelta(hours=1), timedelta(minutes=30))
+        self.assertEqual([start for start, _ in slots], [self.at(9), self.at(11)])
+
+    def test_find_respects_bookings_and_business_hours(self):
+        Booking.objects.create(
+            user=self.user, work_space=self.workspace, meeting_room=self.room,
+            start_time=self.at(9, 30), end_time=self.at(10, 30)
+        )
+        slots = SlotFinder(timedelta(hours=1)).find([self.workspace], self.date)[self.workspace]
+        self.assertEqual(slots, [(self.at(10, 30), self.at(11, 30)), (self.at(11), self.at(12))])
+
+    def test_closed_day_has_no_slots(self):
+        self.location.open_days = '01234'
+        self.location.save()
+        saturday = self.date + timedelta(days=5)
+        self.assertEqual(SlotFinder(timedelta(hours=1)).find([self.workspace], saturday)[self.workspace], [])
+
+    def test_non_positive_steps_are_rejected(self):
+        for duration, granularity in [(timedelta(hours=1), timedelta(0)), (timedelta(0), timedelta(minutes=30)),
+                                      (timedelta(hours=1), timedelta(minutes=-5))]:
+            with self.assertRaises(ValueError):
+                SlotFinder(duration, granularity)
+
+        self.client.force_login(self.user)
+        url = f'/api/ai/workspaces/{self.workspace.id}/suggest_times/'
+        for params in [{'granularity': 0}, {'granularity': -5}, {'duration': 0}]:
+            response = self.client.get(url, {'date': '2030-01-07', **params})
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/ai/workspaces/find_slots/', {'date': '2030-01-07', 'granularity': -5},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_filters_and_ranks(self):
+        WorkSpace.objects.create(name='Hot Desk', type='desk', capacity=1, location=self.location)
+        results = SlotFinder(timedelta(hours=2)).search(self.date, workspace_type='meeting', capacity=4)
+        self.assertEqual([workspace for workspace, _ in results], [self.workspace])
+        self.assertEqual(results[0][1][0], (self.at(9), self.at(11)))
+
+
+class OccupancyAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.admin = User.objects.create_superuser(
+            email='facilities@example.com', password='testpass123', first_name='Fac', last_name='Ilities'
+        )
+        cls.location = Location.objects.create(name='East Wing', opens_at=time(9, 0), closes_at=time(17, 0))
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting', location=cls.location)
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        # A Monday
+        cls.date = date(2030, 1, 7)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.date, time(hour, minute)))
+
+    def book(self, start, end):
+        return Booking.objects.create(
+            user=self.user, work_space=self.workspace, meeting_room=self.room, start_time=start, end_time=end
+        )
+
+    def rollups(self):
+        return {
+            timezone.localtime(rollup.bucket).hour: rollup.booked_seconds
+            for rollup in OccupancyRollup.objects.filter(workspace=self.workspace)
+        }
+
+    def test_rollups_follow_booking_changes(self):
+        booking = self.book(self.at(9, 30), self.at(11))
+        self.assertEqual(self.rollups(), {9: 1800, 10: 3600})
+
+        booking = Booking.objects.get(id=booking.id)
+        booking.end_time = self.at(10)
+        booking.save()
+        self.assertEqual(self.rollups(), {9: 1800, 10: 0})
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.rollups(), {9: 0, 10: 0})
+
+    def test_heatmap_and_utilization(self):
+        self.book(self.at(9), self.at(13))
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/booking/analytics/occupancy/', {'start': '2030-01-07', 'end': '2030-01-14'})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['heatmap']['booked_minutes'][0][9:13], [60.0] * 4)
+        self.assertEqual(data['heatmap']['utilization'][0][9], 1.0)
+        # 4 of the 7 x 8 open hours of the week
+        self.assertEqual(data['workspaces'][0]['utilization'], round(4 / 56, 4))
+        self.assertEqual(data['locations'][0]['booked_minutes'], 240.0)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/booking/analytics/occupancy/')
+        self.assertEqual(response.status_code, 403)
+
+
+class BookingSeriesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting')
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        # A Monday
+        cls.date = date(2030, 1, 7)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def at(self, week, hour=10):
+        return timezone.make_aware(datetime.combine(self.date + timedelta(weeks=week), time(hour)))
+
+    def create_series(self):
+        return BookingSeries.objects.create(
+            user=self.user, work_space=self.workspace, meeting_room=self.room, title='Weekly sync',
+            start_time=self.at(0), end_time=self.at(0, 11), rrule='FREQ=WEEKLY;COUNT=3'
+        )
+
+    def test_occurrences_expand_lazily(self):
+        series = self.create_series()
+        self.assertEqual(series.until, self.at(2, 11))
+        self.assertEqual(list(series.occurrences(self.at(0, 10), self.at(2))), [
+            (self.at(0), self.at(0, 11)), (self.at(1), self.at(1, 11))
+        ])
+        series.materialized_until = self.at(1)
+        self.assertEqual([start for start, _ in series.pending_occurrences(self.at(0), self.at(3))],
+                         [self.at(1), self.at(2)])
+
+    def test_materialize_reports_clashing_occurrences(self):
+        Booking.objects.create(
+            user=self.user, work_space=self.workspace, meeting_room=self.room,
+            start_time=self.at(1, 9), end_time=self.at(1, 11)
+        )
+        series = self.create_series()
+        self.assertEqual(series.materialize(self.at(3)), 3)
+
+        self.assertEqual(list(Booking.objects.filter(series=series).values_list('start_time', flat=True)),
+                         [self.at(0), self.at(2)])
+        notification = Notification.objects.get(type='booking_conflict')
+        self.assertIn('2030-01-14 10:00', notification.message)
+
+        # Already materialized occurrences are not created or reported again
+        self.assertEqual(series.materialize(self.at(3)), 0)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def post_series(self, **fields):
+        return self.client.post('/api/booking/series/create/', {
+            'work_space': self.workspace.id, 'meeting_room': self.room.id, 'title': 'Weekly sync',
+            'start_time': self.at(0).isoformat(), 'end_time': self.at(0, 11).isoformat(),
+            'rrule': 'FREQ=WEEKLY;COUNT=3', **fields
+        }, content_type='application/json')
+
+    def test_series_requests_are_validated(self):
+        other = WorkSpace.objects.create(name='Open Floor', type='desk')
+        other_room = MeetingRoom.objects.create(name='Room 2', workspace=other)
+        invalid = [
+            {'rrule': 'FREQ=MINUTELY;COUNT=10000000'},
+            {'rrule': 'FREQ=DAILY;COUNT=100000'},
+            {'rrule': 'FREQ=DAILY;UNTIL=99991231T000000Z'},
+            {'rrule': 'FREQ=DAILY;BYHOUR=8,9,10,11,12,13,14,15'},
+            {'meeting_room': None},
+            {'meeting_room': other_room.id},
+        ]
+        for fields in invalid:
+            with self.subTest(**fields):
+                self.assertEqual(self.post_series(**fields).status_code, 400)
+        self.assertFalse(BookingSeries.objects.exists())
+
+        self.assertEqual(self.post_series().status_code, 201)
+        self.assertEqual(self.post_series(rrule='FREQ=DAILY', start_time=self.at(4), end_time=self.at(4, 11)).status_code,
+                         201)
+
+    def test_bulk_create_respects_pending_occurrences(self):
+        self.create_series()
+        response = self.client.post('/api/booking/bulk-create/', {'bookings': [
+            {'work_space': self.workspace.id, 'meeting_room': self.room.id,
+             'start_time': self.at(1, 10).isoformat(), 'end_time': self.at(1, 12).isoformat()},
+            {'work_space': self.workspace.id, 'meeting_room': self.room.id,
+             'start_time': self.at(1, 11).isoformat(), 'end_time': self.at(1, 12).isoformat()},
+        ]}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['conflict', 'created'])
+
+
+class BookingListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Open Floor', type='desk')
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def book(self, start, **fields):
+        return Booking.objects.create(
+            user=self.user, work_space=self.workspace, start_time=start, end_time=start + timedelta(hours=1), **fields
+        )
+
+    def walk(self, **params):
+        """Every item of the list, one page at a time"""
+        items, cursor = [], None
+        while True:
+            response = self.client.get('/api/booking/list/', {'page_size': 1, **params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            items.extend((item['start_time'], item['id'], item['series']) for item in data['results'])
+            if not data['next']:
+                return items
+            cursor = parse_qs(urlparse(data['next']).query)['cursor'][0]
+
+    def test_pages_include_every_series_occurrence(self):
+        for _ in range(2):
+            self.book(self.start)
+        # Two series whose pending occurrences share their start times
+        series = [
+            BookingSeries.objects.create(
+                user=self.user, work_space=self.workspace, start_time=self.start,
+                end_time=self.start + timedelta(hours=1), rrule='FREQ=DAILY;COUNT=2'
+            )
+            for _ in range(2)
+        ]
+        items = self.walk()
+        self.assertEqual(len(items), 6)
+        self.assertEqual(len(set(items)), 6)
+        self.assertEqual(sorted(item[2] for item in items if item[1] is None), sorted([s.id for s in series] * 2))
+        self.assertEqual([item[0] for item in items], sorted(item[0] for item in items))
+
+    def test_when_and_status_filters(self):
+        past = self.book(self.start - timedelta(days=3))
+        older = self.book(self.start - timedelta(days=4))
+        upcoming = self.book(self.start)
+        cancelled = self.book(self.start + timedelta(hours=2), status='cancelled')
+
+        self.assertEqual([item[1] for item in self.walk(when='past')], [past.id, older.id])
+        self.assertEqual([item[1] for item in self.walk(when='upcoming')], [upcoming.id, cancelled.id])
+        self.assertEqual([item[1] for item in self.walk(status='cancelled')], [cancelled.id])
+        self.assertEqual(self.client.get('/api/booking/list/', {'when': 'someday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/booking/list/', {'cursor': 'garbage'}).status_code, 404)
+
+
+class BookingConstraintTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting')
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def book(self, start, end, **fields):
+        return Booking.objects.create(
+            user=self.user, work_space=self.workspace, meeting_room=self.room, start_time=start, end_time=end, **fields
+        )
+
+    def test_overlaps_are_rejected_by_the_database(self):
+        self.book(self.start, self.start + timedelta(hours=1))
+        with self.assertRaisesMessage(ValidationError, BOOKING_CONFLICT_MESSAGE):
+            self.book(self.start + timedelta(minutes=30), self.start + timedelta(hours=2))
+
+        # Touching ranges and cancelled bookings do not conflict
+        self.book(self.start + timedelta(hours=1), self.start + timedelta(hours=2))
+        self.book(self.start, self.start + timedelta(hours=1), status='cancelled')
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_other_integrity_errors_are_not_translated(self):
+        series = BookingSeries.objects.create(
+            user=self.user, work_space=self.workspace, start_time=self.start,
+            end_time=self.start + timedelta(hours=1), rrule='FREQ=DAILY;COUNT=2'
+        )
+        occurrence = dict(user=self.user, work_space=self.workspace, series=series,
+                          start_time=self.start, end_time=self.start + timedelta(hours=1))
+        Booking.objects.create(**occurrence)
+        with self.assertRaises(IntegrityError):
+            Booking.objects.create(**occurrence)
+
+    def test_empty_or_reversed_ranges_are_rejected(self):
+        self.client.force_login(self.user)
+        for end in (self.start, self.start - timedelta(hours=1)):
+            response = self.client.post('/api/booking/create/', {
+                'work_space': self.workspace.id, 'meeting_room': self.room.id,
+                'start_time': self.start.isoformat(), 'end_time': end.isoformat(),
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+
+class BookingBulkCreateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting')
+        cls.room = MeetingRoom.objects.create(name='Room 1', workspace=cls.workspace)
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def spec(self, start_hour, end_hour):
+        return {'work_space': self.workspace.id, 'meeting_room': self.room.id, 'title': 'Planning',
+                'start_time': (self.start + timedelta(hours=start_hour)).isoformat(),
+                'end_time': (self.start + timedelta(hours=end_hour)).isoformat()}
+
+    def bulk_create(self, *specs):
+        return self.client.post('/api/booking/bulk-create/', {'bookings': list(specs)}, content_type='application/json')
+
+    def test_items_conflicting_within_the_request(self):
+        response = self.bulk_create(self.spec(0, 2), self.spec(1, 3), self.spec(2, 3))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.json()['results']],
+                         ['created', 'conflict', 'created'])
+
+        # Notifications and outbox messages are written with the bookings
+        bookings = set(Booking.objects.values_list('id', flat=True))
+        self.assertEqual(len(bookings), 2)
+        self.assertEqual(set(Notification.objects.values_list('booking', flat=True)), bookings)
+        self.assertEqual({message.payload['booking_id'] for message in OutboxMessage.objects.all()}, bookings)
+
+    def test_resources_must_belong_to_the_workspace(self):
+        other = WorkSpace.objects.create(name='Open Floor', type='desk')
+        other_room = MeetingRoom.objects.create(name='Room 2', workspace=other)
+        other_desk = Desk.objects.create(name='Desk 1', hub=Hub.objects.create(name='Hub A', workspace=other))
+
+        response = self.bulk_create(
+            {**self.spec(0, 1), 'meeting_room': other_room.id},
+            {**self.spec(0, 1), 'meeting_room': None, 'desk': other_desk.id},
+            self.spec(0, 1),
+        )
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['invalid', 'invalid', 'created'])
+        self.assertIn('meeting_room', results[0]['errors'])
+        self.assertIn('desk', results[1]['errors'])
+
+    def test_conflict_found_by_the_database_rolls_back_everything(self):
+        # Another request took the slot after the in-memory check
+        with mock.patch.object(AvailabilityIndex, 'is_free', return_value=True):
+            response = self.bulk_create(self.spec(0, 1), self.spec(2, 4), self.spec(3, 5))
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertFalse(OccupancyRollup.objects.filter(booked_seconds__gt=0).exists())
+
+
+class AvailabilityIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Open Floor', type='desk')
+        cls.hub = Hub.objects.create(name='Hub A', workspace=cls.workspace)
+        cls.desks = [Desk.objects.create(name=f'Desk {i}', hub=cls.hub) for i in range(3)]
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def at(self, hour):
+        return self.start + timedelta(hours=hour)
+
+    def booking(self, desk, start_hour, end_hour):
+        return Booking(user=self.user, work_space=self.workspace, desk=desk,
+                       start_time=self.at(start_hour), end_time=self.at(end_hour))
+
+    def test_touching_intervals_do_not_overlap(self):
+        index = AvailabilityIndex(None, self.at(0), self.at(8), [self.booking(self.desks[0], 2, 4)])
+        desk = self.desks[0].id
+        self.assertTrue(index.is_free(desk=desk, start_time=self.at(0), end_time=self.at(2)))
+        self.assertTrue(index.is_free(desk=desk, start_time=self.at(4), end_time=self.at(5)))
+        self.assertFalse(index.is_free(desk=desk, start_time=self.at(3), end_time=self.at(5)))
+        self.assertFalse(index.is_free(desk=desk, start_time=self.at(1), end_time=self.at(6)))
+        # Other desks are unaffected
+        self.assertTrue(index.is_free(desk=self.desks[1].id, start_time=self.at(2), end_time=self.at(4)))
+
+    def test_unsorted_adds_keep_the_index_sorted(self):
+        index = AvailabilityIndex(None, self.at(0), self.at(8), [], desk_ids=[desk.id for desk in self.desks])
+        for start_hour, end_hour in [(6, 7), (1, 2), (4, 5)]:
+            index.add(self.booking(self.desks[0], start_hour, end_hour))
+
+        self.assertEqual([b.start_time for b in index.bookings], [self.at(1), self.at(4), self.at(6)])
+        self.assertEqual([b.start_time for b in index.conflicts(desk=self.desks[0].id, start_time=self.at(0),
+                                                                end_time=self.at(5))],
+                         [self.at(1), self.at(4)])
+        self.assertTrue(index.is_free(desk=self.desks[0].id, start_time=self.at(2), end_time=self.at(4)))
+        self.assertFalse(index.is_free(desk=self.desks[0].id, start_time=self.at(5), end_time=self.at(7)))
+
+    def test_free_desks(self):
+        index = AvailabilityIndex(None, self.at(0), self.at(8), [
+            self.booking(self.desks[0], 1, 3), self.booking(self.desks[1], 3, 4)
+        ], desk_ids=[desk.id for desk in self.desks])
+        self.assertEqual(index.free_desks(self.at(2), self.at(3)), [self.desks[1].id, self.desks[2].id])
+        self.assertEqual(index.free_desks(self.at(2), self.at(4)), [self.desks[2].id])
+        # Without a window, the index's whole window is checked
+        self.assertEqual(index.free_desks(), [self.desks[2].id])
+
+    def test_pending_bookings_make_a_desk_busy(self):
+        desk = self.desks[0]
+        Booking.objects.create(user=self.user, work_space=self.workspace, desk=desk,
+                               start_time=self.at(1), end_time=self.at(2), status='pending')
+        Booking.objects.create(user=self.user, work_space=self.workspace, desk=self.desks[1],
+                               start_time=self.at(1), end_time=self.at(2), status='cancelled')
+
+        index = AvailabilityIndex.for_workspace(self.workspace, self.at(0), self.at(8))
+        self.assertFalse(index.is_free(desk=desk.id, start_time=self.at(1), end_time=self.at(2)))
+        self.assertCountEqual(index.free_desks(self.at(1), self.at(2)), [self.desks[1].id, self.desks[2].id])
+
+    def test_for_resource_loads_bookings_and_pending_occurrences(self):
+        desk = self.desks[0]
+        Booking.objects.create(user=self.user, work_space=self.workspace, desk=desk,
+                               start_time=self.at(1), end_time=self.at(2))
+        Booking.objects.create(user=self.user, work_space=self.workspace, desk=desk,
+                               start_time=self.at(2), end_time=self.at(3), status='cancelled')
+        BookingSeries.objects.create(user=self.user, work_space=self.workspace, desk=desk,
+                                     start_time=self.at(4), end_time=self.at(5), rrule='FREQ=DAILY;COUNT=2')
 
-# Create your tests here.
+        index = AvailabilityIndex.for_resource(self.at(0), self.at(8), desk=desk.id)
+        self.assertEqual([b.start_time for b in index.bookings], [self.at(1), self.at(4)])
+        self.assertTrue(index.is_free(desk=desk.id, start_time=self.at(2), end_time=self.at(4)))
+        self.assertFalse(index.is_free(desk=desk.id, start_time=self.at(4), end_time=self.at(5)))
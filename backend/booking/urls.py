@@ -1,12 +1,16 @@
 from django.urls import path, include
 from .views import (
     BookingCreateView, 
+    BookingBulkCreateView,
+    BookingSeriesCreateView,
+    BookingSeriesCancelView,
     BookingListView, 
     WorkSpaceViewSet, 
     HubViewSet, 
     DeskViewSet, 
     MeetingRoomViewSet,
     BookingCancelView,
+    OccupancyAnalyticsView,
     CheckAvailabilityView,
     NotificationListView,
     NotificationCreateView,
@@ -19,12 +23,16 @@ router.register(r'workspace', WorkSpaceViewSet)
 
 urlpatterns = [
     path('create/', BookingCreateView.as_view(), name='booking-create'),
+    path('bulk-create/', BookingBulkCreateView.as_view(), name='booking-bulk-create'),
+    path('series/create/', BookingSeriesCreateView.as_view(), name='booking-series-create'),
+    path('series/<int:pk>/cancel/', BookingSeriesCancelView.as_view(), name='booking-series-cancel'),
     path('list/', BookingListView.as_view(), name='booking-list'),
     path('<int:pk>/cancel/', BookingCancelView.as_view(), name='booking-cancel'),
     path('workspace/<int:workspace_id>/check-availability/', CheckAvailabilityView.as_view(), name='check-availability'),
     path('workspace/<int:workspace_id>/hubs/', HubViewSet.as_view({'get': 'list'}), name='hub-list'),
     path('workspace/<int:workspace_id>/meeting-rooms/', MeetingRoomViewSet.as_view({'get': 'list'}), name='meeting-room-list'),
     path('hub/<int:hub_id>/desks/', DeskViewSet.as_view({'get': 'list'}), name='desk-list'),
+    path('analytics/occupancy/', OccupancyAnalyticsView.as_view(), name='occupancy-analytics'),
     path('notifications/list/', NotificationListView.as_view(), name='notification-list'),
     path('notifications/create/', NotificationCreateView.as_view(), name='notification-create'),
     path('notifications/<int:pk>/mark-as-read/', NotificationMarkAsReadView.as_view(), name='notification-mark-as-read'),
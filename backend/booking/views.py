@@ -2,43 +2,75 @@ from django.shortcuts import render
 
 # Create your views here.
 from rest_framework import viewsets, generics, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
-from .models import WorkSpace, Hub, Desk, MeetingRoom, Booking, Notification
-from .serializers import WorkSpaceSerializer, HubSerializer, DeskSerializer, MeetingRoomSerializer, BookingSerializer, NotificationSerializer
+from .models import (
+    WorkSpace, Hub, Desk, MeetingRoom, Booking, BookingSeries, Notification, OccupancyRollup,
+    BOOKING_CONFLICT_MESSAGE, EXCLUSION_VIOLATION
+)
+from .serializers import (
+    WorkSpaceSerializer, HubSerializer, DeskSerializer, MeetingRoomSerializer, BookingSerializer,
+    NotificationSerializer, BookingSpecSerializer, BookingSeriesSerializer
+)
+from .analytics import OccupancyReport
+from .availability import AvailabilityIndex, find_series_conflicts
+from .filters import BookingListMixin
+from .catalog import CatalogCache
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
-from datetime import datetime
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from datetime import datetime, timedelta
+import heapq
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import logging
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 
-from email_notifications.tasks import (
-    send_booking_email, 
-    send_email_in_thread,
-    schedule_booking_reminders,
-    cancel_scheduled_reminders
-)
+from email_notifications.models import OutboxMessage
+from email_notifications.outbox import BOOKING_CONFIRMED, BOOKING_CANCELLED
 
 # Get a logger for this file
 logger = logging.getLogger(__name__)
 
+def get_availability_window(request):
+    """
+    Read an optional ``start_time``/``end_time`` (ISO 8601) window from the
+    query string. Returns (None, None) to mean "right now".
+    """
+    start_time = request.query_params.get('start_time')
+    end_time = request.query_params.get('end_time')
+    if not start_time:
+        return None, None
+    
+    start_datetime = parse_datetime(start_time)
+    end_datetime = parse_datetime(end_time) if end_time else None
+    if start_datetime is None or (end_time and end_datetime is None):
+        raise ValidationError("Invalid start_time or end_time format")
+    
+    if timezone.is_naive(start_datetime):
+        start_datetime = timezone.make_aware(start_datetime)
+    if end_datetime and timezone.is_naive(end_datetime):
+        end_datetime = timezone.make_aware(end_datetime)
+    return start_datetime, end_datetime
+
 # WorkSpace ViewSet (for both hubs and meeting rooms)
 class WorkSpaceViewSet(viewsets.ModelViewSet):
-    queryset = WorkSpace.objects.all()
+    queryset = WorkSpaceSerializer.setup_eager_loading(WorkSpace.objects.all())
     serializer_class = WorkSpaceSerializer
     permission_classes = [IsAuthenticated]  # Make sure the user is authenticated
     
     def list(self, request, *args, **kwargs):
         """
-        Overriding list to include custom logic if necessary.
-        By default, it will return all the workspaces.
+        Return all the workspaces from the catalog cache.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        def build_catalog():
+            queryset = self.get_queryset()
+            serializer = self.get_serializer(queryset, many=True)
+            return list(serializer.data)
+
+        return CatalogCache.respond(request, 'workspaces', build_catalog)
 
 # Hub ViewSet (for desks inside a workspace)
 class HubViewSet(viewsets.ModelViewSet):
@@ -52,9 +84,12 @@ class HubViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         workspace_id = self.kwargs.get('workspace_id')
-        hubs = Hub.objects.filter(workspace_id=workspace_id)
-        serializer = HubSerializer(hubs, many=True)
-        return Response(serializer.data)
+        
+        def build_hubs():
+            hubs = Hub.objects.filter(workspace_id=workspace_id)
+            return list(HubSerializer(hubs, many=True).data)
+        
+        return CatalogCache.respond(request, f'hubs:{workspace_id}', build_hubs)
 
 # Desk ViewSet (for desks within a hub)
 class DeskViewSet(viewsets.ModelViewSet):
@@ -69,7 +104,13 @@ class DeskViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         hub_id = self.kwargs.get('hub_id')
-        desks = Desk.objects.filter(hub_id=hub_id)
+        try:
+            start_time, end_time = get_availability_window(request)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        desks = DeskSerializer.setup_eager_loading(
+            Desk.objects.filter(hub_id=hub_id).with_availability(start_time, end_time)
+        )
         serializer = DeskSerializer(desks, many=True)
         return Response(serializer.data)
 
@@ -85,7 +126,13 @@ class MeetingRoomViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         workspace_id = self.kwargs.get('workspace_id')
-        rooms = MeetingRoom.objects.filter(workspace_id=workspace_id)
+        try:
+            start_time, end_time = get_availability_window(request)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        rooms = MeetingRoomSerializer.setup_eager_loading(
+            MeetingRoom.objects.filter(workspace_id=workspace_id).with_availability(start_time, end_time)
+        )
         serializer = MeetingRoomSerializer(rooms, many=True)
         return Response(serializer.data)
 
@@ -112,137 +159,288 @@ class BookingCreateView(generics.CreateAPIView):
             
         work_space = get_object_or_404(WorkSpace, id=work_space_id)
 
+        # Overlapping bookings are rejected by the database constraints, so
+        # no availability flag has to be checked or updated here
+        booking_kwargs = {}
+
         # If booking a desk
         if desk_id:
-            desk_instance = get_object_or_404(Desk, id=desk_id)
-            # Check if the desk is available
-            if not desk_instance.is_available:
-                raise ValidationError("This desk is already booked for the selected time.")
-            # If desk is available, create the booking
-            booking = serializer.save(
-                user=self.request.user, 
-                desk=desk_instance,
-                work_space=work_space,  # Include the workspace here
-                title=title,
-                attendees=attendees,
-                notes=notes
-            )
-            # After booking, mark the desk as unavailable
-            desk_instance.is_available = False
-            desk_instance.save()
-            return booking
+            booking_kwargs['desk'] = get_object_or_404(Desk, id=desk_id)
 
         # If booking a meeting room
         elif meeting_room_id:
-            meeting_room_instance = get_object_or_404(MeetingRoom, id=meeting_room_id)
-            # Check if the meeting room is available
-            if not meeting_room_instance.is_available:
-                raise ValidationError("This meeting room is already booked for the selected time.")
-            # If meeting room is available, create the booking
-            booking = serializer.save(
-                user=self.request.user, 
-                meeting_room=meeting_room_instance,
-                work_space=work_space,  # Include the workspace here
-                title=title,
-                attendees=attendees,
-                notes=notes
-            )
-            # After booking, mark the meeting room as unavailable
-            meeting_room_instance.is_available = False
-            meeting_room_instance.save()
-            return booking
-        else:
-            # If neither desk nor meeting room is specified, just create a booking for the workspace
-            booking = serializer.save(
-                user=self.request.user,
-                work_space=work_space,
-                title=title,
-                attendees=attendees,
-                notes=notes
-            )
-            return booking
+            booking_kwargs['meeting_room'] = get_object_or_404(MeetingRoom, id=meeting_room_id)
+
+        # Create the booking for the desk, the meeting room or the whole workspace
+        booking = serializer.save(
+            user=self.request.user,
+            work_space=work_space,  # Include the workspace here
+            title=title,
+            attendees=attendees,
+            notes=notes,
+            **booking_kwargs
+        )
+        return booking
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            booking = self.perform_create(serializer)
-            
-            # Create a notification for the user
-            try:
-                notification = Notification.objects.create(
+            # The notification and the outbox message (confirmation email)
+            # are committed together with the booking
+            with transaction.atomic():
+                booking = self.perform_create(serializer)
+                Notification.objects.create(
                     user=request.user,
                     type='booking_confirmation',
                     title='Booking Confirmed',
                     message=f"Your booking for {booking.work_space.name} on {booking.date} from {booking.start_time.strftime('%H:%M')} to {booking.end_time.strftime('%H:%M')} has been confirmed.",
                     booking=booking
                 )
-                logger.info(f"Booking notification created for user {request.user.id}")
-            except Exception as notif_error:
-                logger.error(f"Error creating notification: {str(notif_error)}")
-        
-            # Send email notification
-            try:
-                # Prepare recipients list
-                recipients = []
-                if booking.attendees:
-                    recipients.extend(booking.attendees)
-                # Add the user's email if available
-                if request.user.email and request.user.email not in recipients:
-                    recipients.append(request.user.email)
-                
-                if recipients:
-                    
-                    # Prepare context for email template
-                    context = {
-                        'booking': {
-                            'id': booking.id,
-                            'title': booking.title,
-                            'workspace_name': booking.work_space.name,
-                            'date': booking.date.strftime('%Y-%m-%d'),
-                            'start_time': booking.start_time.strftime('%H:%M'),
-                            'end_time': booking.end_time.strftime('%H:%M'),
-                            'attendees': booking.attendees,
-                            'notes': booking.notes
-                        },
-                        'user': request.user.get_full_name() or request.user.email,
-                    }
-                    
-                    # Try to send via Celery
-                    try:
-                        send_booking_email.delay(recipients, "Your Booking Confirmation", "booking_confirmation", context)
-                        logger.info(f"Booking confirmation email queued with Celery for {recipients}")
-                        
-                        # Schedule reminder emails
-                        schedule_booking_reminders.delay(booking.id)
-                        logger.info(f"Reminder emails scheduled for booking {booking.id}")
-                        
-                    except Exception as celery_error:
-                        # Fall back to thread-based email
-                        logger.warning(f"Celery task failed, using thread-based email: {str(celery_error)}")
-                        send_email_in_thread(recipients, "Your Booking Confirmation", "booking_confirmation", context)
-                        logger.info(f"Booking confirmation email sent via thread for {recipients}")
-                else:
-                    logger.warning(f"No recipients for booking {booking.id} confirmation email")
-                    
-            except Exception as email_error:
-                logger.error(f"Error sending booking confirmation email: {str(email_error)}")
-                # Continue without sending email - don't break the booking process
+                OutboxMessage.objects.enqueue(BOOKING_CONFIRMED, {'booking_id': booking.id})
         
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except ValidationError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+# Booking Bulk Create View (to create many bookings in one request)
+class BookingBulkCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """
+        Create many bookings at once.
+        
+        Expected request data:
+        {
+            "bookings": [
+                {"work_space": 1, "desk": 3, "start_time": "...", "end_time": "...", "title": "..."},
+                ...
+            ]
+        }
+        
+        Every item is checked against existing bookings, pending occurrences
+        of booking series and the other items, all loaded up front. Items that conflict or are invalid are
+        reported individually; the rest are inserted with one bulk_create.
+        """
+        specs = request.data.get('bookings')
+        if not isinstance(specs, list) or not specs:
+            return Response({"error": "A non-empty list of bookings is required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        max_items = settings.BOOKING_BULK_CREATE_MAX_ITEMS
+        if len(specs) > max_items:
+            return Response({"error": f"At most {max_items} bookings can be created per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        results = [None] * len(specs)
+        candidates = []
+        for i, spec in enumerate(specs):
+            spec_serializer = BookingSpecSerializer(data=spec)
+            if spec_serializer.is_valid():
+                candidates.append((i, spec_serializer.validated_data))
+            else:
+                results[i] = {"index": i, "status": "invalid", "errors": spec_serializer.errors}
+        
+        # Resolve every referenced workspace, desk and meeting room at once
+        workspaces = WorkSpace.objects.in_bulk({data['work_space'] for _, data in candidates})
+        desks = Desk.objects.select_related('hub').in_bulk(
+            {data['desk'] for _, data in candidates if data.get('desk')}
+        )
+        meeting_rooms = MeetingRoom.objects.in_bulk(
+            {data['meeting_room'] for _, data in candidates if data.get('meeting_room')}
+        )
+        
+        resolved = []
+        for i, data in candidates:
+            errors = {}
+            if data['work_space'] not in workspaces:
+                errors['work_space'] = ["Workspace not found."]
+            if data.get('desk'):
+                if data['desk'] not in desks:
+                    errors['desk'] = ["Desk not found."]
+                elif desks[data['desk']].hub.workspace_id != data['work_space']:
+                    errors['desk'] = ["Desk does not belong to this workspace."]
+            if data.get('meeting_room'):
+                if data['meeting_room'] not in meeting_rooms:
+                    errors['meeting_room'] = ["Meeting room not found."]
+                elif meeting_rooms[data['meeting_room']].workspace_id != data['work_space']:
+                    errors['meeting_room'] = ["Meeting room does not belong to this workspace."]
+            if errors:
+                results[i] = {"index": i, "status": "invalid", "errors": errors}
+            else:
+                resolved.append((i, data))
+        
+        # Load every active booking and pending series occurrence that could
+        # conflict with the batch at once
+        index = None
+        if resolved:
+            window_start = min(data['start_time'] for _, data in resolved)
+            window_end = max(data['end_time'] for _, data in resolved)
+            index = AvailabilityIndex.for_resources(window_start, window_end, desks.keys(), meeting_rooms.keys())
+        
+        pending = []
+        for i, data in resolved:
+            desk_id = data.get('desk') or None
+            meeting_room_id = None if desk_id else (data.get('meeting_room') or None)
+            
+            if (desk_id or meeting_room_id) and not index.is_free(
+                desk=desk_id, meeting_room=meeting_room_id,
+                start_time=data['start_time'], end_time=data['end_time']
+            ):
+                results[i] = {"index": i, "status": "conflict", "error": BOOKING_CONFLICT_MESSAGE}
+                continue
+            
+            booking = Booking(
+                user=request.user,
+                work_space=workspaces[data['work_space']],
+                desk=desks.get(desk_id),
+                meeting_room=meeting_rooms.get(meeting_room_id),
+                title=data['title'],
+                date=data['start_time'].date(),
+                start_time=data['start_time'],
+                end_time=data['end_time'],
+                attendees=data['attendees'],
+                notes=data['notes']
+            )
+            # Later items in the batch must not overlap this one either
+            index.add(booking)
+            pending.append((i, booking))
+        
+        try:
+            with transaction.atomic():
+                created = Booking.objects.bulk_create([booking for _, booking in pending])
+                OccupancyRollup.objects.record(created)
+                Notification.objects.bulk_create([
+                    Notification(
+                        user=request.user,
+                        type='booking_confirmation',
+                        title='Booking Confirmed',
+                        message=f"Your booking for {booking.work_space.name} on {booking.date} from {booking.start_time.strftime('%H:%M')} to {booking.end_time.strftime('%H:%M')} has been confirmed.",
+                        booking=booking
+                    )
+                    for booking in created
+                ])
+                OutboxMessage.objects.enqueue_many(
+                    BOOKING_CONFIRMED, [{'booking_id': booking.id} for booking in created]
+                )
+        except IntegrityError as e:
+            # Another request booked one of the spaces after our conflict check
+            if getattr(e.__cause__, 'pgcode', None) == EXCLUSION_VIOLATION:
+                return Response({"error": BOOKING_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
+            raise
+        
+        for (i, _), booking in zip(pending, created):
+            results[i] = {"index": i, "status": "created", "booking": BookingSerializer(booking).data}
+        
+        return Response({
+            "created": len(created),
+            "failed": len(specs) - len(created),
+            "results": results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
 # Booking List View (to list all bookings for a user)
-class BookingListView(generics.ListAPIView):
+class BookingListView(BookingListMixin, generics.ListAPIView):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         # Get all bookings for the current user
-        return Booking.objects.filter(user=self.request.user)
+        return BookingSerializer.setup_eager_loading(Booking.objects.filter(user=self.request.user))
+
+    def get_extra_items(self, position):
+        """
+        Lazily expand the occurrences of the user's series that are not
+        materialized yet, from the cursor position up to the listing horizon,
+        in page order.
+        """
+        # Pending occurrences are always upcoming and confirmed
+        if self.descending or self.get_status() not in (None, 'confirmed'):
+            return []
+
+        window_start = position[0] if position else None
+        if self.get_when() == 'upcoming':
+            window_start = max(window_start or timezone.now(), timezone.now())
+        horizon_end = timezone.now() + timedelta(days=settings.BOOKING_SERIES_LIST_DAYS)
+
+        series_list = BookingSeries.objects.active().filter(
+            user=self.request.user, start_time__lt=horizon_end
+        ).select_related('user', 'work_space')
+
+        return heapq.merge(*[
+            self.expand_series(series, window_start, horizon_end)
+            for series in series_list
+        ], key=self.paginator.get_position)
+
+    @staticmethod
+    def expand_series(series, window_start, window_end):
+        window_start = max(filter(None, [window_start, series.materialized_until, series.start_time]))
+        for booking in series.virtual_bookings(window_start, window_end):
+            if booking.start_time >= window_start:
+                yield booking
+
+# Booking Series Create View (to create a recurring booking)
+class BookingSeriesCreateView(generics.CreateAPIView):
+    queryset = BookingSeries.objects.all()
+    serializer_class = BookingSeriesSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        series = BookingSeries(user=request.user, **data)
+        series.until = series.compute_until()
+
+        # Only the occurrences inside the horizon are expanded for checking;
+        # later bookings are checked against the series when they are made
+        horizon_end = timezone.now() + timedelta(days=settings.BOOKING_SERIES_HORIZON_DAYS)
+        conflicts = find_series_conflicts(series, horizon_end)
+        if conflicts:
+            return Response({
+                "error": BOOKING_CONFLICT_MESSAGE,
+                "conflicts": [conflict.isoformat() for conflict in conflicts]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            series.save()
+            # Upcoming occurrences become real bookings straight away
+            series.materialize(timezone.now() + timedelta(days=settings.BOOKING_SERIES_MATERIALIZE_DAYS))
+            Notification.objects.create(
+                user=request.user,
+                type='booking_confirmation',
+                title='Recurring Booking Confirmed',
+                message=f"Your recurring booking for {series.work_space.name} ({series.rrule}) has been confirmed.",
+            )
+
+        return Response(self.get_serializer(series).data, status=status.HTTP_201_CREATED)
+
+# Booking Series Cancel View (to cancel a recurring booking)
+class BookingSeriesCancelView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        series = get_object_or_404(BookingSeries, id=pk)
+
+        # Check if the user is the owner of the series
+        if series.user != request.user:
+            return Response({"error": "You don't have permission to cancel this booking series"},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        with transaction.atomic():
+            series.status = 'cancelled'
+            series.save(update_fields=['status'])
+            # Cancel the occurrences that were already materialized
+            upcoming = Booking.objects.filter(
+                series=series, start_time__gte=timezone.now()
+            ).exclude(status='cancelled').select_for_update()
+            OccupancyRollup.objects.discard(upcoming)
+            upcoming.update(status='cancelled')
+
+        return Response({"status": "cancelled"}, status=status.HTTP_200_OK)
 
 # Booking Cancel View (to cancel a booking)
 class BookingCancelView(APIView):
@@ -256,48 +454,15 @@ class BookingCancelView(APIView):
             return Response({"error": "You don't have permission to cancel this booking"}, 
                             status=status.HTTP_403_FORBIDDEN)
     
-        # Update booking status
-        booking.status = "cancelled"
-        booking.save()
-    
-        # Update workspace availability
-        if booking.desk:
-            booking.desk.is_available = True
-            booking.desk.save()
-        elif booking.meeting_room:
-            booking.meeting_room.is_available = True
-            booking.meeting_room.save()
-    
-        # Try to send cancellation email
-        try:
-            if hasattr(booking, 'attendees') and booking.attendees:
-                recipients = booking.attendees
-                # Add the user's email if available
-                if request.user.email and request.user.email not in recipients:
-                    recipients.append(request.user.email)
-                
-                # Render the HTML content from the template
-                context = {
-                    'booking': BookingSerializer(booking).data,
-                    'user': request.user.get_full_name() or request.user.email,
-                }
-                html_content = render_to_string(f'email/booking_cancellation.html', context)
-                text_content = render_to_string(f'email/booking_cancellation.txt', context)
-            
-                # Send email using Django's send_mail
-                from_email = settings.DEFAULT_FROM_EMAIL
-                send_mail(
-                    subject="Your Booking Has Been Cancelled",
-                    message=text_content,
-                    from_email=from_email,
-                    recipient_list=recipients,
-                    html_message=html_content,
-                    fail_silently=False,
-                )
-                logger.info(f"Cancellation email sent to {recipients}")
-        except Exception as email_error:
-            logger.error(f"Error sending cancellation email: {str(email_error)}")
-            # Continue without sending email
+        # Update booking status; the cancellation email goes out through the outbox
+        with transaction.atomic():
+            # Locked so that concurrent requests cancel (and email) only once
+            booking = Booking.objects.select_for_update().get(id=booking.id)
+            if booking.status == 'cancelled':
+                return Response({"status": "cancelled"}, status=status.HTTP_200_OK)
+            booking.status = "cancelled"
+            booking.save()
+            OutboxMessage.objects.enqueue(BOOKING_CANCELLED, {'booking_id': booking.id})
 
         return Response({"status": "cancelled"}, status=status.HTTP_200_OK)
 
@@ -317,39 +482,23 @@ class CheckAvailabilityView(APIView):
         
         # Convert string times to datetime objects
         try:
-            start_datetime = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
-            end_datetime = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
+            start_datetime = timezone.make_aware(datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M"))
+            end_datetime = timezone.make_aware(datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M"))
         except ValueError:
             return Response({"error": "Invalid date or time format"}, 
                             status=status.HTTP_400_BAD_REQUEST)
         
-        # Check for overlapping bookings
-        overlapping_bookings = []
+        # Load every confirmed booking for the workspace and window at once
+        index = AvailabilityIndex.for_workspace(workspace, start_datetime, end_datetime)
         
         if workspace.type == 'desk':
             # For desk type, check desk availability
-            desks = Desk.objects.filter(hub__workspace=workspace)
-            for desk in desks:
-                desk_bookings = Booking.objects.filter(
-                    desk=desk,
-                    start_time__lt=end_datetime,
-                    end_time__gt=start_datetime,
-                    status='confirmed'
-                )
-                if desk_bookings.exists():
-                    overlapping_bookings.extend(desk_bookings)
+            overlapping_bookings = index.desk_conflicts()
+            free_resources = {"availableDesks": index.free_desks()}
         else:
             # For meeting room type, check meeting room availability
-            meeting_rooms = MeetingRoom.objects.filter(workspace=workspace)
-            for room in meeting_rooms:
-                room_bookings = Booking.objects.filter(
-                    meeting_room=room,
-                    start_time__lt=end_datetime,
-                    end_time__gt=start_datetime,
-                    status='confirmed'
-                )
-                if room_bookings.exists():
-                    overlapping_bookings.extend(room_bookings)
+            overlapping_bookings = index.meeting_room_conflicts()
+            free_resources = {"availableMeetingRooms": index.free_meeting_rooms()}
         
         # Serialize overlapping bookings
         booking_serializer = BookingSerializer(overlapping_bookings, many=True)
@@ -358,7 +507,47 @@ class CheckAvailabilityView(APIView):
         return Response({
             "available": len(overlapping_bookings) == 0,
             "workspace": WorkSpaceSerializer(workspace).data,
-            "overlappingBookings": booking_serializer.data
+            "overlappingBookings": booking_serializer.data,
+            **free_resources
+        })
+
+# Occupancy Analytics View (utilization heatmap for facilities)
+class OccupancyAnalyticsView(APIView):
+    permission_classes = [IsAdminUser]
+    default_days = 30
+    
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            end_date = (datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+                        if request.query_params.get('end') else today + timedelta(days=1))
+            start_date = (datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+                          if request.query_params.get('start') else end_date - timedelta(days=self.default_days))
+        except ValueError:
+            return Response({"error": "Invalid date format, expected YYYY-MM-DD"}, 
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if start_date >= end_date:
+            return Response({"error": "start must be before end"}, 
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        workspaces = WorkSpace.objects.select_related('location').order_by('id')
+        try:
+            if request.query_params.get('location'):
+                workspaces = workspaces.filter(location_id=int(request.query_params['location']))
+            if request.query_params.get('workspace'):
+                workspaces = workspaces.filter(id=int(request.query_params['workspace']))
+        except ValueError:
+            return Response({"error": "location and workspace must be ids"}, 
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        report = OccupancyReport(workspaces, start_date, end_date)
+        return Response({
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "heatmap": report.heatmap(),
+            "workspaces": report.by_workspace(),
+            "locations": report.by_location()
         })
 
 # Add the missing notification views
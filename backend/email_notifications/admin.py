@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import OutboxMessage
 
-# Register your models here.
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'created_at', 'attempts', 'dispatched_at')
+    list_filter = ('topic', 'dispatched_at')
+    readonly_fields = ('created_at',)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class EmailNotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'email_notifications'
+
+    def ready(self):
+        from celery.signals import worker_process_init
+        from .rendering import email_renderer
+
+        # Compile the email templates once per worker process, before any task runs
+        worker_process_init.connect(lambda **kwargs: email_renderer.precompile(), weak=False,
+                                    dispatch_uid='precompile_email_templates')
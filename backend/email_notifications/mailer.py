@@ -0,0 +1,113 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .rendering import email_renderer
+
+logger = logging.getLogger(__name__)
+
+
+class BatchMailer:
+    """
+    Collects templated emails and sends them together over a single email
+    backend connection, instead of opening one per email.
+
+    Emails are rendered grouped by template with the shared, precompiled
+    email templates. Every recipient gets their own copy: with an Anymail backend
+    (Mailgun) that is one API call per email using batch sending (merge
+    data), with other backends one message per recipient over the shared
+    connection. Attendees therefore never see each other's addresses.
+    """
+
+    def __init__(self, connection=None):
+        self.connection = connection
+        self._emails = []
+
+    def __len__(self):
+        return len(self._emails)
+
+    def add(self, recipients, subject, template_prefix, context):
+        """Queue an email; returns its index in the results of ``send()``"""
+        self._emails.append((list(recipients), subject, template_prefix, context))
+        return len(self._emails) - 1
+
+    def truncate(self, size):
+        """Drop the emails queued after the first ``size``"""
+        del self._emails[size:]
+
+    @staticmethod
+    def supports_batch_send(connection):
+        # Anymail backends all name their ESP
+        return hasattr(connection, 'esp_name')
+
+    def _render(self):
+        """(index, recipients, subject, text, html) of every email, rendered per template"""
+        by_template = defaultdict(list)
+        for index, email in enumerate(self._emails):
+            by_template[email[2]].append(index)
+
+        rendered = []
+        for template_prefix, indices in by_template.items():
+            for index in indices:
+                recipients, subject, _, context = self._emails[index]
+                rendered.append((index, recipients, subject, *email_renderer.render(template_prefix, context)))
+        return rendered
+
+    def _build_messages(self, connection, recipients, subject, text, html):
+        def message(to):
+            email = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, to, connection=connection)
+            email.attach_alternative(html, 'text/html')
+            return email
+
+        if self.supports_batch_send(connection):
+            email = message(recipients)
+            # Sends a separate copy to each recipient in a single API call
+            email.merge_data = {recipient: {} for recipient in recipients}
+            return [email]
+        return [message([recipient]) for recipient in recipients]
+
+    def send(self):
+        """
+        Send every queued email and empty the batch. Returns one entry per
+        email, in the order they were added: None when it was sent, or the
+        exception that stopped it.
+        """
+        results = [None] * len(self._emails)
+        if not self._emails:
+            return results
+
+        try:
+            rendered = self._render()
+        except Exception as e:
+            logger.error(f"Error rendering email batch: {str(e)}")
+            self._emails = []
+            return [e] * len(results)
+
+        connection = self.connection or get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Could not open email connection: {str(e)}")
+            self._emails = []
+            return [e] * len(results)
+
+        try:
+            for index, recipients, subject, text, html in rendered:
+                try:
+                    for message in self._build_messages(connection, recipients, subject, text, html):
+                        message.send()
+                except Exception as e:
+                    logger.error(f"Failed to send email to {recipients}: {str(e)}")
+                    results[index] = e
+        finally:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing email connection: {str(e)}")
+
+        sent = sum(result is None for result in results)
+        logger.info(f"Sent {sent} of {len(results)} emails in one batch")
+        self._emails = []
+        return results
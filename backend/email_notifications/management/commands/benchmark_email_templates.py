@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Engine
+from django.template.loader import render_to_string
+from email_notifications.rendering import EmailTemplateRenderer, TEMPLATE_DIR
+
+TEMPLATES = ('booking_confirmation', 'booking_cancellation', 'booking_reminder')
+CONTEXT = {
+    'booking': {
+        'id': 42,
+        'title': 'Quarterly planning',
+        'workspace_name': 'Board Room',
+        'date': '2030-01-07',
+        'start_time': '10:00',
+        'end_time': '11:30',
+        'location': 'East Wing',
+        'attendees': ['ada@example.com', 'grace@example.com', 'alan@example.com'],
+        'notes': 'Bring the Q4 numbers & the roadmap.',
+    },
+    'user': 'Test Member',
+}
+
+
+class Command(BaseCommand):
+    help = ('Measures email renders per second: render_to_string without and with the cached loader, '
+            'and the email template renderer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Emails rendered per template and method')
+
+    def measure(self, render, iterations):
+        render()  # Warm up caches
+        started = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        return iterations / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        renderer = EmailTemplateRenderer()
+        renderer.precompile()
+
+        # Reads and compiles the templates on every render, like a loader without caching
+        uncached = Engine(dirs=[str(TEMPLATE_DIR.parent)], loaders=['django.template.loaders.filesystem.Loader'])
+
+        for template_prefix in TEMPLATES:
+            def render_uncached():
+                return (uncached.render_to_string(f'email/{template_prefix}.txt', CONTEXT),
+                        uncached.render_to_string(f'email/{template_prefix}.html', CONTEXT))
+
+            def render_cached():
+                return (render_to_string(f'email/{template_prefix}.txt', CONTEXT),
+                        render_to_string(f'email/{template_prefix}.html', CONTEXT))
+
+            # Every method must produce the same email
+            if not render_uncached() == render_cached() == renderer.render(template_prefix, CONTEXT):
+                self.stderr.write(self.style.ERROR(f'{template_prefix}: outputs differ'))
+
+            results = [
+                self.measure(render_uncached, iterations),
+                self.measure(render_cached, iterations),
+                self.measure(lambda: renderer.render(template_prefix, CONTEXT), iterations),
+            ]
+            self.stdout.write(self.style.SUCCESS(
+                f'{template_prefix:>22}: uncached {results[0]:,.0f}/s, cached loader {results[1]:,.0f}/s, '
+                f'renderer {results[2]:,.0f}/s ({results[2] / results[0]:.1f}x)'
+            ))
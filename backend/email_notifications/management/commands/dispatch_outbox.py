@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from email_notifications.outbox import dispatch_pending
+
+class Command(BaseCommand):
+    help = 'Carries out pending outbox messages (booking emails and reminders)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Number of messages handled per transaction')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running as a standalone dispatcher instead of draining once')
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_DISPATCH_INTERVAL,
+                            help='Seconds to wait when the outbox is empty (with --loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        while True:
+            dispatched = dispatch_pending(batch_size)
+            total += dispatched
+            if dispatched:
+                self.stdout.write(f'  {total} messages dispatched')
+            if dispatched < batch_size:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Dispatched {total} outbox messages'))
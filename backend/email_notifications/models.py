@@ -1,3 +1,54 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
-# Create your models here.
+
+class OutboxQuerySet(models.QuerySet):
+    def enqueue(self, topic, payload):
+        """
+        Record a side effect to be carried out once the surrounding
+        transaction commits; call it in the same transaction as the change
+        """
+        return self.create(topic=topic, payload=payload)
+
+    def enqueue_many(self, topic, payloads):
+        return self.bulk_create([OutboxMessage(topic=topic, payload=payload) for payload in payloads])
+
+    def pending(self, now=None):
+        """Messages due for (another) dispatch attempt"""
+        return self.filter(
+            dispatched_at__isnull=True,
+            available_at__lte=now or timezone.now(),
+            attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+        )
+
+    def purge(self, before):
+        """Delete messages dispatched before the given time"""
+        return self.filter(dispatched_at__lt=before).delete()
+
+
+class OutboxMessage(models.Model):
+    """
+    A side effect (email, reminder, ...) of a committed change, written in
+    the change's own transaction and carried out by the outbox dispatcher.
+    """
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not dispatched before this time; pushed back after each failed attempt
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at'], name='outbox_pending_idx',
+                         condition=Q(dispatched_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
@@ -0,0 +1,108 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .mailer import BatchMailer
+from .models import OutboxMessage
+from .tasks import get_booking_recipients, build_booking_email_context
+
+logger = logging.getLogger(__name__)
+
+BOOKING_CONFIRMED = 'booking.confirmed'
+BOOKING_CANCELLED = 'booking.cancelled'
+
+
+def get_booking(payload, status):
+    from booking.models import Booking
+
+    booking = Booking.objects.filter(id=payload['booking_id'], status=status).select_related(
+        'user', 'work_space').first()
+    if booking is None:
+        logger.info(f"Skipping outbox message for booking {payload['booking_id']}: no longer {status}")
+    return booking
+
+
+def send_booking_confirmation(payload, mailer):
+    booking = get_booking(payload, 'confirmed')
+    if booking is None:
+        return
+
+    recipients = get_booking_recipients(booking)
+    if recipients:
+        mailer.add(recipients, "Your Booking Confirmation", "booking_confirmation",
+                   build_booking_email_context(booking))
+    else:
+        logger.warning(f"No recipients for booking {booking.id} confirmation email")
+
+
+def send_booking_cancellation(payload, mailer):
+    booking = get_booking(payload, 'cancelled')
+    if booking is None:
+        return
+
+    recipients = get_booking_recipients(booking)
+    if recipients:
+        mailer.add(recipients, "Your Booking Has Been Cancelled", "booking_cancellation",
+                   build_booking_email_context(booking))
+
+
+HANDLERS = {
+    BOOKING_CONFIRMED: send_booking_confirmation,
+    BOOKING_CANCELLED: send_booking_cancellation,
+}
+
+
+def dispatch_pending(batch_size=None):
+    """
+    Carry out one batch of due outbox messages, oldest first, and return
+    how many were attempted.
+
+    Handlers queue their emails on a shared BatchMailer, which sends the
+    whole batch over one connection once every handler has run; a message
+    succeeds when its handler and all of its emails did. The batch is
+    locked with SKIP LOCKED so several dispatchers can run side by side
+    without handling a message twice. A failed message is retried later
+    with exponential backoff, until OUTBOX_MAX_ATTEMPTS. Delivery is at
+    least once: a message is carried out again if it fails after some of
+    its effects happened, or if the dispatcher dies before recording it.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    mailer = BatchMailer()
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.pending().select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        errors = {}
+        emails = {}
+        for message in messages:
+            first_email = len(mailer)
+            try:
+                handler = HANDLERS[message.topic]
+                # A failing handler must not break the batch's transaction
+                with transaction.atomic():
+                    handler(message.payload, mailer)
+            except Exception as e:
+                errors[message.id] = e
+                # Its emails go out when the message is retried
+                mailer.truncate(first_email)
+            emails[message.id] = range(first_email, len(mailer))
+
+        results = mailer.send()
+        for message in messages:
+            message.attempts += 1
+            error = errors.get(message.id) or next(
+                (results[i] for i in emails[message.id] if results[i] is not None), None)
+            if error is None:
+                message.dispatched_at = timezone.now()
+                continue
+            message.last_error = str(error)
+            message.available_at = timezone.now() + timedelta(
+                seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1))
+            logger.error(f"Error dispatching outbox message {message.id} ({message.topic}): {str(error)}")
+
+        OutboxMessage.objects.bulk_update(messages, ['attempts', 'last_error', 'available_at', 'dispatched_at'])
+    return len(messages)
@@ -0,0 +1,141 @@
+import atexit
+import logging
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Tells a worker thread to stop
+_STOP = object()
+
+
+class EmailQueueFull(Exception):
+    """The email pool stayed full for the whole submit timeout"""
+
+
+class EmailWorkerPool:
+    """
+    Process-wide, bounded pool of threads sending emails when Celery is not
+    available.
+
+    At most EMAIL_POOL_WORKERS threads send, and at most
+    EMAIL_POOL_QUEUE_SIZE emails wait for them. ``submit`` blocks for up to
+    EMAIL_POOL_SUBMIT_TIMEOUT seconds while the queue is full, then raises
+    EmailQueueFull so callers can shed load instead of piling up threads.
+    Failed sends are retried up to EMAIL_POOL_MAX_RETRIES times with full
+    jitter backoff (a random delay below EMAIL_POOL_RETRY_DELAY * 2**n).
+    Queued emails are drained when the process exits, for at most
+    EMAIL_POOL_DRAIN_TIMEOUT seconds.
+    """
+
+    def __init__(self, workers=None, queue_size=None, max_retries=None, retry_delay=None):
+        self.workers = workers or settings.EMAIL_POOL_WORKERS
+        self.max_retries = settings.EMAIL_POOL_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.EMAIL_POOL_RETRY_DELAY if retry_delay is None else retry_delay
+        self._queue = queue.Queue(maxsize=queue_size or settings.EMAIL_POOL_QUEUE_SIZE)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopping = False
+        # Send latencies in seconds of the most recent emails
+        self._latencies = deque(maxlen=1000)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+
+    def _start(self):
+        with self._lock:
+            if self._threads or self._stopping:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'email-pool-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.shutdown)
+
+    def submit(self, send, *args, timeout=None):
+        """
+        Queue ``send(*args)`` for a worker. Raises EmailQueueFull if no room
+        frees up within ``timeout`` seconds (default EMAIL_POOL_SUBMIT_TIMEOUT).
+        """
+        if self._stopping:
+            raise EmailQueueFull("The email pool is shutting down")
+        self._start()
+        try:
+            self._queue.put((send, args), timeout=settings.EMAIL_POOL_SUBMIT_TIMEOUT if timeout is None else timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise EmailQueueFull(f"{self._queue.maxsize} emails are already waiting to be sent")
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._send(*job)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, send, args):
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                send(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Giving up on email after {attempt + 1} attempts: {str(e)}")
+                    return
+                self.retried += 1
+                delay = random.uniform(0, self.retry_delay * 2 ** attempt)
+                logger.warning(f"Email send failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            else:
+                self._latencies.append(time.monotonic() - started)
+                self.sent += 1
+                return
+
+    def shutdown(self, timeout=None):
+        """Stop accepting emails and wait for the queued ones to be sent"""
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+            threads = list(self._threads)
+        if not threads:
+            return
+
+        deadline = time.monotonic() + (settings.EMAIL_POOL_DRAIN_TIMEOUT if timeout is None else timeout)
+        for _ in threads:
+            try:
+                self._queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        if self._queue.qsize():
+            logger.warning(f"Email pool stopped with {self._queue.qsize()} emails unsent")
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        return {
+            'workers': self.workers,
+            'queue_depth': self._queue.qsize(),
+            'queue_size': self._queue.maxsize,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'rejected': self.rejected,
+            'latency_p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            'latency_p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None,
+        }
+
+
+email_pool = EmailWorkerPool()
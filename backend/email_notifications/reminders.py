@@ -0,0 +1,93 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .mailer import BatchMailer
+from .tasks import get_booking_recipients, build_booking_email_context
+
+logger = logging.getLogger(__name__)
+
+
+def get_reminder_offsets():
+    return [timedelta(hours=hours) for hours in settings.BOOKING_REMINDER_HOURS]
+
+
+def build_reminder(booking, now):
+    """(subject, context) of the reminder email for a booking"""
+    context = build_booking_email_context(booking)
+    location = booking.work_space.location
+    context['booking']['location'] = location.name if location else "Not specified"
+    day = 'Today' if timezone.localdate(booking.start_time) == timezone.localdate(now) else 'Tomorrow'
+    return f"Reminder: Your Booking in {booking.work_space.name} {day}", context
+
+
+def send_due_reminders(batch_size=None):
+    """
+    Send one batch of due booking reminders over a shared BatchMailer and
+    return how many bookings were attempted.
+
+    A booking is due when one of its reminder windows (BOOKING_REMINDER_HOURS
+    before it starts) opened since ``reminder_sent_at``, so each window sends
+    at most one email and a sweep that ran late sends one for all the windows
+    it missed. The batch is locked with SKIP LOCKED so overlapping sweeps
+    never remind a booking twice. A failed reminder is retried by a later
+    sweep with exponential backoff, and given up after
+    BOOKING_REMINDER_MAX_ATTEMPTS, so it never holds back other bookings.
+    """
+    from booking.models import Booking
+
+    batch_size = batch_size or settings.BOOKING_REMINDER_BATCH_SIZE
+    now = timezone.now()
+    mailer = BatchMailer()
+
+    with transaction.atomic():
+        bookings = list(
+            Booking.objects.reminders_due(now, get_reminder_offsets())
+            .select_related('user', 'work_space__location')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('start_time', 'id')[:batch_size]
+        )
+        emails = {}
+        errors = {}
+        for booking in bookings:
+            recipients = get_booking_recipients(booking)
+            if not recipients:
+                logger.warning(f"No recipients for booking {booking.id} reminder")
+                continue
+            try:
+                subject, context = build_reminder(booking, now)
+            except Exception as e:
+                errors[booking.id] = e
+                continue
+            emails[booking.id] = mailer.add(recipients, subject, "booking_reminder", context)
+
+        results = mailer.send()
+        for booking in bookings:
+            error = errors.get(booking.id)
+            if error is None and booking.id in emails:
+                error = results[emails[booking.id]]
+            if error is None:
+                booking.reminder_sent_at = now
+                booking.reminder_attempts = 0
+                booking.reminder_retry_at = None
+                continue
+
+            booking.reminder_attempts += 1
+            if booking.reminder_attempts >= settings.BOOKING_REMINDER_MAX_ATTEMPTS:
+                logger.error(f"Giving up on the reminder for booking {booking.id} after "
+                             f"{booking.reminder_attempts} attempts: {str(error)}")
+                # Closes this window; the next one is tried afresh
+                booking.reminder_sent_at = now
+                booking.reminder_attempts = 0
+                booking.reminder_retry_at = None
+            else:
+                booking.reminder_retry_at = now + timedelta(
+                    seconds=settings.BOOKING_REMINDER_RETRY_DELAY * 2 ** (booking.reminder_attempts - 1))
+                logger.error(f"Error sending reminder for booking {booking.id}: {str(error)}")
+
+        # bulk_update() skips Booking.save(), which would re-check conflicts
+        Booking.objects.bulk_update(bookings, ['reminder_sent_at', 'reminder_attempts', 'reminder_retry_at'])
+    return len(bookings)
@@ -0,0 +1,63 @@
+import logging
+import threading
+from pathlib import Path
+
+from django.template import Context, engines
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates' / 'email'
+
+
+class EmailTemplateRenderer:
+    """
+    Renders the text and HTML parts of an email template pair.
+
+    Each pair is looked up and compiled once per process, on first use or
+    by ``precompile()`` when a worker starts, and both parts are rendered
+    from one shared Context instead of two render_to_string calls building
+    their own.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available_prefixes():
+        """Template prefixes having both a .txt and a .html file"""
+        return sorted(path.stem for path in TEMPLATE_DIR.glob('*.html') if path.with_suffix('.txt').exists())
+
+    def get_templates(self, template_prefix):
+        templates = self._templates.get(template_prefix)
+        if templates is None:
+            engine = engines['django']
+            # The engine-level templates, so a Context can be shared
+            templates = (
+                engine.get_template(f'email/{template_prefix}.txt').template,
+                engine.get_template(f'email/{template_prefix}.html').template,
+            )
+            with self._lock:
+                self._templates[template_prefix] = templates
+        return templates
+
+    def precompile(self):
+        """Load and compile every email template ahead of the first email"""
+        prefixes = self.available_prefixes()
+        for template_prefix in prefixes:
+            self.get_templates(template_prefix)
+        logger.info(f"Compiled {len(prefixes)} email templates")
+        return prefixes
+
+    def render(self, template_prefix, context):
+        """Return the ``(text, html)`` bodies of the email"""
+        text_template, html_template = self.get_templates(template_prefix)
+        shared = Context(context)
+        return text_template.render(shared), html_template.render(shared)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+email_renderer = EmailTemplateRenderer()
@@ -1,3 +1,290 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from authentication.models import User
+from booking.models import WorkSpace, Booking, MeetingRoom
+from .mailer import BatchMailer
+from .models import OutboxMessage
+from .outbox import dispatch_pending, BOOKING_CONFIRMED, BOOKING_CANCELLED
+from .pool import EmailWorkerPool, EmailQueueFull
+from .reminders import send_due_reminders
+from .tasks import send_booking_reminders
+from .rendering import EmailTemplateRenderer
+
+
+class OutboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def book(self, **data):
+        return self.client.post('/api/booking/create/', {
+            'work_space': self.workspace.id, 'title': 'Planning',
+            'start_time': self.start.isoformat(), 'end_time': (self.start + timedelta(hours=1)).isoformat(),
+            'date': self.start.date().isoformat(), 'attendees': ['guest@example.com'], **data
+        }, content_type='application/json')
+
+    def test_booking_emails_are_sent_by_the_dispatcher(self):
+        response = self.book()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.topic, BOOKING_CONFIRMED)
+
+        self.assertEqual(dispatch_pending(), 1)
+        # One copy per recipient
+        self.assertEqual([email.to for email in mail.outbox], [['guest@example.com'], ['member@example.com']])
+
+        # Dispatched messages are not sent again
+        self.assertEqual(dispatch_pending(), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_cancellation_is_queued_with_the_status_change(self):
+        booking = Booking.objects.create(
+            user=self.user, work_space=self.workspace, title='Planning', date=self.start.date(),
+            start_time=self.start, end_time=self.start + timedelta(hours=1)
+        )
+        response = self.client.post(f'/api/booking/{booking.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutboxMessage.objects.get().topic, BOOKING_CANCELLED)
+
+        dispatch_pending()
+        self.assertEqual(mail.outbox[0].subject, 'Your Booking Has Been Cancelled')
+        self.assertIn('Board Room', mail.outbox[0].body)
+
+        # Cancelling again sends nothing more
+        response = self.client.post(f'/api/booking/{booking.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_failed_messages_are_retried_later(self):
+        self.book()
+        with mock.patch('email_notifications.mailer.EmailMultiAlternatives.send', side_effect=OSError('SMTP down')):
+            dispatch_pending()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.attempts, message.last_error), (1, 'SMTP down'))
+        self.assertIsNone(message.dispatched_at)
+        self.assertGreater(message.available_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(dispatch_pending(), 0)
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(dispatch_pending(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_rejected_bookings_leave_no_message(self):
+        room = MeetingRoom.objects.create(name='Room 1', workspace=self.workspace)
+        self.book(meeting_room=room.id)
+        response = self.book(meeting_room=room.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+
+class BookingReminderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='member@example.com', password='testpass123', first_name='Test', last_name='Member'
+        )
+        cls.workspace = WorkSpace.objects.create(name='Board Room', type='meeting')
+
+    def book(self, starts_in, booked_ago=timedelta(days=7), **fields):
+        start = timezone.now() + starts_in
+        fields.setdefault('attendees', ['guest@example.com'])
+        booking = Booking.objects.create(
+            user=self.user, work_space=self.workspace, title='Planning', date=start.date(),
+            start_time=start, end_time=start + timedelta(hours=1), **fields
+        )
+        Booking.objects.filter(id=booking.id).update(booking_date=timezone.now() - booked_ago)
+        return booking
+
+    def test_each_window_sends_one_reminder(self):
+        booking = self.book(timedelta(minutes=30))
+        self.book(timedelta(minutes=30), status='cancelled')
+        self.book(timedelta(hours=30))
+
+        self.assertEqual(send_due_reminders(), 1)
+        self.assertEqual([email.to for email in mail.outbox], [['guest@example.com'], ['member@example.com']])
+        self.assertTrue(mail.outbox[0].subject.startswith('Reminder: Your Booking in Board Room'))
+        booking.refresh_from_db()
+        self.assertIsNotNone(booking.reminder_sent_at)
+
+        # Already reminded for the hour window
+        self.assertEqual(send_due_reminders(), 0)
+        # A reminder sent when the day window opened does not cover the hour window
+        Booking.objects.filter(id=booking.id).update(reminder_sent_at=booking.start_time - timedelta(hours=24))
+        self.assertEqual(send_due_reminders(), 1)
+
+    def test_windows_open_before_the_booking_are_skipped(self):
+        self.book(timedelta(hours=20), booked_ago=timedelta(hours=1))
+        self.book(timedelta(minutes=30), booked_ago=timedelta(0))
+        self.assertEqual(send_due_reminders(), 0)
+
+    def test_failed_reminders_are_retried_with_backoff(self):
+        booking = self.book(timedelta(minutes=30))
+        with mock.patch('email_notifications.mailer.EmailMultiAlternatives.send', side_effect=OSError('SMTP down')):
+            self.assertEqual(send_due_reminders(), 1)
+        booking.refresh_from_db()
+        self.assertIsNone(booking.reminder_sent_at)
+        self.assertEqual(booking.reminder_attempts, 1)
+        self.assertGreater(booking.reminder_retry_at, timezone.now())
+
+        # Not retried before its time
+        self.assertEqual(send_due_reminders(), 0)
+        Booking.objects.filter(id=booking.id).update(reminder_retry_at=timezone.now())
+        self.assertEqual(send_due_reminders(), 1)
+        booking.refresh_from_db()
+        self.assertIsNotNone(booking.reminder_sent_at)
+        self.assertEqual((booking.reminder_attempts, booking.reminder_retry_at), (0, None))
+
+    @override_settings(BOOKING_REMINDER_MAX_ATTEMPTS=2)
+    def test_reminders_are_given_up_after_the_last_attempt(self):
+        booking = self.book(timedelta(minutes=30))
+        with mock.patch('email_notifications.mailer.EmailMultiAlternatives.send', side_effect=OSError('SMTP down')):
+            send_due_reminders()
+            Booking.objects.filter(id=booking.id).update(reminder_retry_at=timezone.now())
+            send_due_reminders()
+        booking.refresh_from_db()
+        self.assertIsNotNone(booking.reminder_sent_at)
+        self.assertEqual(send_due_reminders(), 0)
+
+    @override_settings(BOOKING_REMINDER_BATCH_SIZE=1)
+    def test_failing_bookings_do_not_hold_back_later_ones(self):
+        self.book(timedelta(minutes=20), attendees=['bounce@example.com'])
+        later = self.book(timedelta(minutes=40))
+
+        def send(email):
+            if email.to == ['bounce@example.com']:
+                raise OSError('Mailbox unavailable')
+            mail.outbox.append(email)
+
+        with mock.patch('email_notifications.mailer.EmailMultiAlternatives.send', autospec=True, side_effect=send):
+            self.assertEqual(send_booking_reminders(), 2)
+        later.refresh_from_db()
+        self.assertIsNotNone(later.reminder_sent_at)
+
+
+class BatchMailerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.context = {'booking': {'title': 'Planning', 'workspace_name': 'Board Room'}, 'user': 'Test Member'}
+
+    def test_batch_shares_one_connection(self):
+        connection = mock.MagicMock(spec=['open', 'close', 'send_messages'])
+        connection.send_messages.side_effect = lambda messages: len(messages)
+        mailer = BatchMailer(connection)
+        mailer.add(['a@example.com', 'b@example.com'], 'Confirmed', 'booking_confirmation', self.context)
+        mailer.add(['c@example.com'], 'Cancelled', 'booking_cancellation', self.context)
+        mailer.add(['d@example.com'], 'Confirmed', 'booking_confirmation', self.context)
+
+        self.assertEqual(mailer.send(), [None, None, None])
+        connection.open.assert_called_once()
+        connection.close.assert_called_once()
+        sent = [call.args[0][0] for call in connection.send_messages.call_args_list]
+        self.assertEqual([message.to for message in sent], [['a@example.com'], ['b@example.com'],
+                                                            ['d@example.com'], ['c@example.com']])
+        self.assertEqual(len(mailer), 0)
+
+    def test_anymail_backends_batch_send_each_email(self):
+        connection = mock.MagicMock(spec=['open', 'close', 'send_messages', 'esp_name'])
+        connection.send_messages.side_effect = lambda messages: len(messages)
+        mailer = BatchMailer(connection)
+        mailer.add(['a@example.com', 'b@example.com'], 'Confirmed', 'booking_confirmation', self.context)
+        mailer.send()
+
+        message = connection.send_messages.call_args.args[0][0]
+        self.assertEqual(message.to, ['a@example.com', 'b@example.com'])
+        self.assertEqual(message.merge_data, {'a@example.com': {}, 'b@example.com': {}})
+
+    def test_failures_are_reported_per_email(self):
+        connection = mock.MagicMock(spec=['open', 'close', 'send_messages'])
+        connection.send_messages.side_effect = lambda messages: (
+            (_ for _ in ()).throw(OSError('rejected')) if messages[0].to == ['b@example.com'] else 1)
+        mailer = BatchMailer(connection)
+        mailer.add(['a@example.com'], 'Confirmed', 'booking_confirmation', self.context)
+        mailer.add(['b@example.com'], 'Confirmed', 'booking_confirmation', self.context)
+        results = mailer.send()
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], OSError)
+
+
+class EmailTemplateRendererTests(SimpleTestCase):
+
+    def test_renders_like_render_to_string(self):
+        renderer = EmailTemplateRenderer()
+        self.assertEqual(renderer.precompile(), ['booking_cancellation', 'booking_confirmation', 'booking_reminder'])
+        context = {'booking': {'title': 'Q&A', 'workspace_name': 'Board Room', 'attendees': ['a@example.com']},
+                   'user': 'Test Member'}
+        for prefix in renderer.available_prefixes():
+            self.assertEqual(renderer.render(prefix, context), (
+                render_to_string(f'email/{prefix}.txt', context),
+                render_to_string(f'email/{prefix}.html', context),
+            ))
+
+    def test_templates_are_loaded_once(self):
+        renderer = EmailTemplateRenderer()
+        with mock.patch('email_notifications.rendering.engines') as engines:
+            engines.__getitem__.return_value.get_template.return_value.template.render.return_value = ''
+            renderer.render('booking_reminder', {})
+            renderer.render('booking_reminder', {})
+        self.assertEqual(engines.__getitem__.return_value.get_template.call_count, 2)
+
+
+class EmailWorkerPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = EmailWorkerPool(workers=1, queue_size=2, max_retries=2, retry_delay=0)
+        self.addCleanup(self.pool.shutdown, timeout=5)
+
+    def test_full_queue_applies_backpressure(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocked_send():
+            started.set()
+            release.wait(5)
+        self.pool.submit(blocked_send)
+        started.wait(5)
+        # The worker is busy: two emails fit in the queue, the third does not
+        self.pool.submit(mock.Mock())
+        self.pool.submit(mock.Mock())
+        with self.assertRaises(EmailQueueFull):
+            self.pool.submit(mock.Mock(), timeout=0.05)
+        self.assertEqual(self.pool.stats()['queue_depth'], 2)
+        self.assertEqual(self.pool.stats()['rejected'], 1)
+
+        release.set()
+        self.pool.shutdown(timeout=5)
+        self.assertEqual(self.pool.stats()['sent'], 3)
+        self.assertEqual(self.pool.stats()['queue_depth'], 0)
+
+    def test_failures_are_retried_then_dropped(self):
+        flaky = mock.Mock(side_effect=[OSError('timeout'), None])
+        broken = mock.Mock(side_effect=OSError('refused'))
+        self.pool.submit(flaky, 'a')
+        self.pool.submit(broken)
+        self.pool.shutdown(timeout=5)
+
+        self.assertEqual(flaky.call_count, 2)
+        flaky.assert_called_with('a')
+        self.assertEqual(broken.call_count, 3)
+        stats = self.pool.stats()
+        self.assertEqual((stats['sent'], stats['failed'], stats['retried']), (1, 1, 3))
+        self.assertIsNotNone(stats['latency_p50_ms'])
+        with self.assertRaises(EmailQueueFull):
+            self.pool.submit(flaky)
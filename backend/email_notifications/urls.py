@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import SendEmailView
+from .views import SendEmailView, EmailPoolStatsView
 
 urlpatterns = [
     path('send/', SendEmailView.as_view(), name='send_email'),
+    path('pool/stats/', EmailPoolStatsView.as_view(), name='email_pool_stats'),
 ]
@@ -1,9 +1,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 import logging
-from .tasks import send_booking_email, send_email_in_thread
+from .pool import email_pool, EmailQueueFull
+from .tasks import send_booking_email, queue_email
 
 logger = logging.getLogger(__name__)
 
@@ -53,10 +54,18 @@ class SendEmailView(APIView):
                 send_booking_email.delay(recipients, subject, template, context)
                 return Response({"success": True, "message": "Email scheduled for delivery via Celery"})
             except Exception as celery_error:
-                logger.warning(f"Celery task failed, falling back to thread-based email: {str(celery_error)}")
-                # Fall back to thread-based email
-                send_email_in_thread(recipients, subject, template, context)
-                return Response({"success": True, "message": "Email scheduled for delivery via thread"})
+                logger.warning(f"Celery task failed, falling back to the email pool: {str(celery_error)}")
+                # Fall back to the in-process email pool
+                try:
+                    queue_email(recipients, subject, template, context)
+                except EmailQueueFull as full_error:
+                    logger.error(f"Email pool full, rejecting email: {str(full_error)}")
+                    return Response(
+                        {"error": "Too many emails are waiting to be sent, please try again later"},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        headers={"Retry-After": "30"}
+                    )
+                return Response({"success": True, "message": "Email scheduled for delivery via the email pool"})
             
         except Exception as e:
             logger.error(f"Error scheduling email: {str(e)}")
@@ -64,3 +73,13 @@ class SendEmailView(APIView):
                 {"error": f"Failed to schedule email: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class EmailPoolStatsView(APIView):
+    """
+    Queue depth, outcome counts and send latency of this process's email pool
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(email_pool.stats())
@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import VideoConferenceConsumer
+
+websocket_urlpatterns = [
+    path('ws/video/<str:room_id>/', VideoConferenceConsumer.as_asgi()),
+]
@@ -174,6 +174,7 @@ export function ImprovedChat() {
     { id: "initial-greeting", content: fallbackResponses.greeting, sender: "ai", isTyping: false, completed: true, role: "assistant" },
   ])
   const [inputValue, setInputValue] = useState("")
+  const [conversationId, setConversationId] = useState(null)
   const [isTyping, setIsTyping] = useState(false)
   const [isRecording, setIsRecording] = useState(false)
   const [isThinking, setIsThinking] = useState(false)
@@ -465,7 +466,8 @@ export function ImprovedChat() {
         // Log authentication status for debugging
         console.log("Auth status:", user ? "Logged in" : "Not logged in")
 
-        const aiResponse = await sendMessageToAI(inputValue, conversationHistory)
+        const aiResponse = await sendMessageToAI(inputValue, conversationHistory, conversationId)
+        setConversationId(aiResponse.conversation_id)
 
         // IMPORTANT: Always hide thinking state when getting a response
         setIsThinking(false)
@@ -106,6 +106,28 @@ async function fetchAPI(endpoint, options = {}) {
   }
 }
 
+/**
+ * Fetches every page of a cursor-paginated list, following `next` until it is null
+ */
+async function fetchAllPages(endpoint) {
+  const separator = endpoint.includes("?") ? "&" : "?"
+  const results = []
+  let data = await fetchAPI(endpoint)
+
+  while (true) {
+    if (!data.results) {
+      // Not paginated
+      return data
+    }
+    results.push(...data.results)
+    if (!data.next) {
+      return results
+    }
+    const cursor = new URL(data.next).searchParams.get("cursor")
+    data = await fetchAPI(`${endpoint}${separator}cursor=${encodeURIComponent(cursor)}`)
+  }
+}
+
 /**
  * Attempts to refresh the access token using the refresh token
  */
@@ -267,8 +289,8 @@ export const userApi = {
 
   getUserBookings: async (userId) => {
     try {
-      // Fetch bookings for a specific user
-      return await fetchAPI(`/users/${userId}/bookings/`)
+      // Fetch bookings for a specific user (every page of the cursor-paginated list)
+      return await fetchAllPages(`/users/${userId}/bookings/?page_size=100`)
     } catch (error) {
       console.error(`Error fetching bookings for user with ID ${userId}:`, error)
       throw error
@@ -397,8 +419,9 @@ export const workspaceApi = {
 export const bookingApi = {
   getAll: async () => {
     try {
-      const data = await fetchAPI("/booking/list/")
-      return data.map((booking) => ({
+      // The list is cursor-paginated; fetch every page, 100 bookings at a time
+      const bookings = await fetchAllPages("/booking/list/?page_size=100")
+      return bookings.map((booking) => ({
         id: booking.id,
         title:
           booking.title ||
@@ -432,8 +455,9 @@ export const bookingApi = {
 
   getByUser: async (userId) => {
     try {
-      const data = await fetchAPI("/booking/list/")
-      return data.map((booking) => ({
+      // The list is cursor-paginated; fetch every page, 100 bookings at a time
+      const bookings = await fetchAllPages("/booking/list/?page_size=100")
+      return bookings.map((booking) => ({
         id: booking.id,
         title:
           booking.title ||
@@ -670,10 +670,11 @@ function getAuthToken() {
 /**
  * Send a message to the AI assistant
  * @param {string} message - The user's message
- * @param {Array} conversationHistory - Previous messages for context
+ * @param {Array} conversationHistory - Previous messages for context, used to start a conversation
+ * @param {number|null} conversationId - Conversation returned by an earlier reply, kept on the server
  * @returns {Promise} - Response from the AI assistant
  */
-export async function sendMessageToAI(message, conversationHistory = []) {
+export async function sendMessageToAI(message, conversationHistory = [], conversationId = null) {
   try {
     // Format conversation history for the backend
     const formattedHistory = conversationHistory.map((msg) => ({
@@ -701,10 +702,12 @@ export async function sendMessageToAI(message, conversationHistory = []) {
     const response = await fetch(apiUrl, {
       method: "POST",
       headers,
-      body: JSON.stringify({
-        message,
-        conversation_history: formattedHistory,
-      }),
+      // The server keeps the history of an existing conversation
+      body: JSON.stringify(
+        conversationId
+          ? { message, conversation_id: conversationId }
+          : { message, conversation_history: formattedHistory },
+      ),
       credentials: "include", // Include cookies in the request
     })
 